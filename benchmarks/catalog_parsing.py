@@ -0,0 +1,189 @@
+"""Benchmark of the catalog handling of data migrations on a synthetic catalog.
+
+Runs the steps a data migration goes through once the catalog is downloaded
+(filter by timestamp, storages, summary, partition paths, update and
+upload, the upload requests being left out) with Catalog, which reads the
+partitions from the catalog file on every pass, and with the previous
+implementation, which held every partition in memory with its
+metadata parsed. Each one runs in its own process, for its peak memory.
+
+Before timing, both are checked to upload the same catalog on a small
+sample, sorted in several runs.
+
+    PYTHONPATH=src python benchmarks/catalog_parsing.py [--rows N] [--skip-previous]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from functools import reduce
+
+from hdx_cli.cli_interface.migrate import catalog_operations
+from hdx_cli.cli_interface.migrate.catalog_operations import Catalog, TIMESTAMP_FORMAT
+
+HEADER = ['created', 'modified', 'min_timestamp', 'max_timestamp', 'manifest_size',
+          'data_size', 'index_size', 'root_path', 'data_path', 'active', 'rows', 'mem_size',
+          'metadata', 'shard_key', 'lock', 'storage_id']
+STORAGES = ['11111111-aaaa-4aaa-8aaa-111111111111', '22222222-bbbb-4bbb-8bbb-222222222222']
+START = datetime(2024, 1, 1)
+
+
+def write_catalog(file_path: str, rows: int) -> None:
+    randomizer = random.Random(0)
+    with open(file_path, 'w', newline='', encoding='utf-8') as catalog_file:
+        writer = csv.writer(catalog_file)
+        writer.writerow(HEADER)
+        for index in range(rows):
+            min_timestamp = START + timedelta(seconds=randomizer.randrange(365 * 86400))
+            max_timestamp = min_timestamp + timedelta(seconds=randomizer.randrange(3600))
+            storage_id = STORAGES[index % len(STORAGES)]
+            writer.writerow([
+                '2024-06-01 00:00:00', '2024-06-01 00:00:00',
+                min_timestamp.strftime(TIMESTAMP_FORMAT), max_timestamp.strftime(TIMESTAMP_FORMAT),
+                randomizer.randrange(10_000), randomizer.randrange(10_000_000),
+                randomizer.randrange(100_000), 'project-uuid/table-uuid',
+                f'{index % 100}/{index:x}', 'true', randomizer.randrange(1_000_000),
+                randomizer.randrange(1_000_000),
+                str({'storage_id': storage_id, 'shard_key': '42', 'format': 'hdx'}),
+                '42', '', storage_id])
+
+
+class PreviousPartition:
+    def __init__(self, values):
+        (self.created, self.modified, self.min_timestamp, self.max_timestamp,
+         self.manifest_size, self.data_size, self.index_size, self.root_path, self.data_path,
+         self.active, self.rows, self.mem_size, metadata, self.shard_key, self.lock,
+         self.storage_id) = values
+        self.metadata = json.loads(metadata.replace("'", '"'))
+
+    def get_partition_path(self):
+        return "/".join([str(self.root_path).strip(), str(self.data_path).strip()])
+
+    def to_list(self):
+        return [self.created, self.modified, self.min_timestamp, self.max_timestamp,
+                self.manifest_size, self.data_size, self.index_size, self.root_path,
+                self.data_path, self.active, self.rows, self.mem_size,
+                json.dumps(self.metadata), self.shard_key, self.lock, self.storage_id]
+
+    def get_partition_size(self):
+        return int(self.manifest_size) + int(self.index_size) + int(self.data_size)
+
+
+def previous_migration(file_path, from_date, to_date, target, upload_chunk):
+    with open(file_path, newline='', encoding='utf-8') as catalog_file:
+        reader = csv.reader(catalog_file)
+        next(reader, None)
+        partitions = [PreviousPartition(row) for row in reader]
+    partitions = [partition for partition in partitions
+                  if datetime.strptime(partition.min_timestamp, TIMESTAMP_FORMAT) >= from_date and
+                  datetime.strptime(partition.max_timestamp, TIMESTAMP_FORMAT) <= to_date]
+    partitions_by_storage = {}
+    for partition in partitions:
+        partitions_by_storage.setdefault(partition.storage_id, []).append(
+            ('db/hdx/' + partition.get_partition_path(), partition.get_partition_size()))
+    reduce(lambda count, item: count + item.get_partition_size(), partitions, 0)
+    reduce(lambda count, item: count + int(item.rows), partitions, 0)
+    for partition in partitions:
+        partition.root_path = 'new-project/new-table'
+        partition.metadata['storage_id'] = target
+        partition.storage_id = target
+        partition.lock = None
+    partitions = sorted(partitions,
+                        key=lambda item: datetime.strptime(item.max_timestamp, TIMESTAMP_FORMAT))
+    for index in range(0, len(partitions), 250):
+        csv_buffer = io.StringIO()
+        csv_writer = csv.writer(csv_buffer)
+        for partition in partitions[index:index + 250]:
+            csv_writer.writerow(partition.to_list())
+        upload_chunk(csv_buffer.getvalue().encode('utf-8'))
+
+
+def streaming_migration(file_path, from_date, to_date, target, upload_chunk):
+    catalog_operations.rest_ops.create_file = (
+        lambda url, *, file_stream, **kwargs: upload_chunk(file_stream))
+    catalog = Catalog()
+    catalog.catalog_path = file_path
+    catalog.filter_by_timestamp(from_date, to_date)
+    catalog.get_storage_ids()
+    catalog.get_summary_information()
+    for _ in catalog.iter_partition_files():
+        pass
+    catalog.update('new-project', 'new-table', target)
+    catalog.upload(_StandInProfile())
+
+
+class _StandInProfile:
+    scheme, hostname, org_id = 'https', 'target.example.com', 'org'
+
+    class auth:  # pylint:disable=invalid-name
+        token_type, token = 'Bearer', 'token'
+
+
+MIGRATIONS = {'previous': previous_migration, 'streaming': streaming_migration}
+MIGRATION_ARGS = (datetime(2024, 1, 15), datetime(2024, 12, 15), 'target-storage')
+
+
+def check_same_upload(work_dir: str) -> None:
+    file_path = os.path.join(work_dir, 'sample.csv')
+    write_catalog(file_path, 2000)
+    uploads = {}
+    catalog_operations.SORT_RUN_SIZE = 300
+    for name, migration in MIGRATIONS.items():
+        chunks = []
+        migration(file_path, *MIGRATION_ARGS, chunks.append)
+        uploads[name] = b''.join(chunks)
+    assert uploads['previous'] == uploads['streaming'], 'the uploaded catalogs differ'
+
+
+def run_migration(name: str, file_path: str) -> None:
+    uploaded = []
+    started_at = time.perf_counter()
+    MIGRATIONS[name](file_path, *MIGRATION_ARGS, lambda chunk: uploaded.append(len(chunk)))
+    elapsed = time.perf_counter() - started_at
+    # Linux reports kilobytes
+    print(json.dumps({'seconds': elapsed, 'peak_mb': resource.getrusage(
+        resource.RUSAGE_SELF).ru_maxrss / 1024, 'uploaded_mb': sum(uploaded) / 2 ** 20}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--skip-previous', action='store_true',
+                        help='Do not run the previous implementation, which needs several '
+                             'GB of memory for millions of rows.')
+    parser.add_argument('--run', choices=list(MIGRATIONS), help=argparse.SUPPRESS)
+    parser.add_argument('--catalog', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run_migration(args.run, args.catalog)
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        check_same_upload(work_dir)
+        file_path = os.path.join(work_dir, 'catalog.csv')
+        write_catalog(file_path, args.rows)
+        print(f'{args.rows} partitions, {os.path.getsize(file_path) / 2 ** 20:.0f} MB catalog')
+        print(f"{'IMPLEMENTATION':<16} {'seconds':>8} {'peak MB':>8}")
+        for name in MIGRATIONS:
+            if name == 'previous' and args.skip_previous:
+                continue
+            result = subprocess.run([sys.executable, __file__, '--run', name,
+                                     '--catalog', file_path],
+                                    capture_output=True, text=True, check=False)
+            if result.returncode:
+                print(f'{name:<16} failed (exit status {result.returncode})')
+                continue
+            measures = json.loads(result.stdout)
+            print(f"{name:<16} {measures['seconds']:>8.1f} {measures['peak_mb']:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Micro-benchmark of loading the user context of a profile.
+
+Compares load_user_context, which parses the profile configuration and the
+token cache once each, with the previous way of loading it: the token cache
+parsed once and the profile configuration parsed again for the default
+project and table, with a dataclasses.asdict round trip of the context.
+
+'first load' is what a single hdxcli invocation pays; 'repeated load' is a
+later load in the same process, served from the memoized files.
+
+    PYTHONPATH=src python benchmarks/config_loading.py [--profiles N] [--repeat N]
+"""
+import argparse
+import dataclasses as dc
+import tempfile
+import timeit
+from datetime import datetime
+from pathlib import Path
+
+import toml
+
+from hdx_cli.library_api.common import config_files
+from hdx_cli.library_api.common.auth_utils import load_user_context
+from hdx_cli.library_api.common.context import ProfileLoadContext, ProfileUserContext
+from hdx_cli.library_api.userdata.token import AuthInfo
+
+
+def write_config(config_dir: Path, profiles: int) -> ProfileLoadContext:
+    config_file = config_dir / 'config.toml'
+    with open(config_file, 'w', encoding='utf-8') as stream:
+        toml.dump({f'profile_{index}': {'username': f'user_{index}',
+                                        'hostname': f'cluster-{index}.example.com',
+                                        'projectname': 'project',
+                                        'tablename': 'table',
+                                        'scheme': 'https'}
+                   for index in range(profiles)}, stream)
+    with open(config_dir / 'profile_0', 'w', encoding='utf-8') as stream:
+        toml.dump({'org_id': 'org', 'username': 'user_0', 'hostname': 'cluster-0.example.com',
+                   'token': {'auth_token': 'token', 'token_type': 'Bearer',
+                             'expires_at': datetime(2100, 1, 1)}}, stream)
+    return ProfileLoadContext('profile_0', config_file)
+
+
+def previous_load_user_context(load_context: ProfileLoadContext) -> ProfileUserContext:
+    config_file = Path(load_context.profile_config_file)
+    with open(config_file.parent / load_context.profilename, 'r', encoding='utf-8') as stream:
+        cache = toml.load(stream)
+    user_context = ProfileUserContext(username=cache['username'],
+                                      hostname=cache['hostname'],
+                                      profilename=load_context.profilename,
+                                      auth=AuthInfo(cache['token']['auth_token'],
+                                                    cache['token']['expires_at'],
+                                                    cache['org_id']),
+                                      org_id=cache['org_id'],
+                                      profile_config_file=config_file)
+    with open(config_file, 'r', encoding='utf-8') as stream:
+        profile = toml.load(stream)[load_context.profilename]
+    user_ctx_dict = dc.asdict(user_context) | {'projectname': profile['projectname'],
+                                                'tablename': profile['tablename'],
+                                                'scheme': profile['scheme']}
+    new_user_context = ProfileUserContext(**user_ctx_dict)
+    new_user_context.auth = user_context.auth
+    return new_user_context
+
+
+def _time(function, repeat: int) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        load_context = write_config(Path(config_dir), args.profiles)
+        assert (previous_load_user_context(load_context) ==
+                load_user_context(load_context))
+
+        def first_load():
+            config_files.forget_toml_file(load_context.profile_config_file)
+            config_files.forget_toml_file(Path(config_dir) / load_context.profilename)
+            load_user_context(load_context)
+
+        previous_ms = _time(lambda: previous_load_user_context(load_context), args.repeat)
+        first_ms = _time(first_load, args.repeat)
+        repeated_ms = _time(lambda: load_user_context(load_context), args.repeat)
+
+    print(f'{args.profiles} profiles in the configuration file')
+    print(f"{'LOAD':<16} {'ms':>8} {'SPEEDUP':>8}")
+    print(f"{'previous':<16} {previous_ms:>8.3f}")
+    print(f"{'first load':<16} {first_ms:>8.3f} {previous_ms / first_ms:>7.1f}x")
+    print(f"{'repeated load':<16} {repeated_ms:>8.3f} {previous_ms / repeated_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Micro-benchmark of the JSON codec used for REST payloads.
+
+Compares json_util (orjson when installed) with the standard library on a
+transform body with many output columns, the largest payload the CLI
+usually handles. Indented command output is always written by json.
+
+    PYTHONPATH=src python benchmarks/json_codec.py [--columns N] [--repeat N]
+"""
+import argparse
+import json
+import timeit
+
+from hdx_cli.library_api.utility.json_util import JSON_CODEC, json_dumps_bytes, json_loads
+
+
+def make_transform(columns: int) -> dict:
+    output_columns = [{'name': f'column_{index}',
+                       'datatype': {'type': 'string' if index % 3 else 'uint64',
+                                    'index': bool(index % 2),
+                                    'default': None,
+                                    'source': {'from_input_field': f'field.{index}'}}}
+                      for index in range(columns)]
+    output_columns[0]['datatype'].update(type='datetime', primary=True,
+                                         format='2006-01-02 15:04:05')
+    return {'name': 'big_transform',
+            'type': 'json',
+            'settings': {'is_default': True,
+                         'compression': 'none',
+                         'format_details': {'flattening': {'active': True, 'depth': 2}},
+                         'output_columns': output_columns}}
+
+
+def _time(function, repeat: int) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--columns', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    transform = make_transform(args.columns)
+    encoded = json.dumps(transform).encode('utf-8')
+
+    cases = [
+        ('parse response', lambda: json.loads(encoded), lambda: json_loads(encoded)),
+        ('encode request body', lambda: json.dumps(transform).encode('utf-8'),
+         lambda: json_dumps_bytes(transform)),
+    ]
+    print(f'{args.columns} output columns, {len(encoded) / 1024:.0f} KiB, codec: {JSON_CODEC}')
+    print(f"{'OPERATION':<22} {'json ms':>9} {'codec ms':>9} {'SPEEDUP':>8}")
+    for name, stdlib_function, codec_function in cases:
+        stdlib_ms = _time(stdlib_function, args.repeat)
+        codec_ms = _time(codec_function, args.repeat)
+        print(f'{name:<22} {stdlib_ms:>9.2f} {codec_ms:>9.2f} {stdlib_ms / codec_ms:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""Startup and import-time benchmark of representative hdxcli commands.
+
+Every command runs in a fresh interpreter through the installed entry point,
+hdx_cli.launcher:main, as it does when called from a shell script, against a
+throwaway HDX_CONFIG_DIR and a local stand-in for the cluster, so no network
+access or real profile is needed.
+
+For each command it measures:
+  - cold wall time: a run that compiles every module from source, with
+    empty hdxcli caches
+  - warm wall time: median of --repeat later runs
+  - import time: total of 'python -X importtime', and the heaviest top-level
+    imports
+
+It exits with status 1 if a command exceeds its budget in startup_budgets.json
+(warm wall time, import time) or imports a module it must not import, so that
+new heavy imports on the startup path are caught. Wall times depend on the
+load of the machine; --imports-only leaves them out of the check, as CI does
+on shared runners.
+
+    PYTHONPATH=src python benchmarks/startup.py [--repeat N] [--budgets FILE]
+                                                [--budget-scale X] [--top N]
+                                                [--imports-only]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import toml
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARKS_DIR.parent
+DEFAULT_BUDGETS_FILE = BENCHMARKS_DIR / 'startup_budgets.json'
+# What the hdxcli console script runs
+ENTRY_POINT = 'from hdx_cli.launcher import main; main()'
+
+ORG_ID = '00000000-0000-0000-0000-000000000000'
+PROJECT_ID = '11111111-1111-1111-1111-111111111111'
+TABLE_ID = '22222222-2222-2222-2222-222222222222'
+
+DDL = """CREATE TABLE events (
+  ts TIMESTAMP PRIMARY KEY,
+  name STRING,
+  value BIGINT
+);
+"""
+USER_CHOICES = {'ingest_type': 'json',
+                'primary_key': 'ts',
+                'compression': 'none',
+                'csv_indexes': [],
+                'csv_delimiter': ',',
+                'add_ignored_fields_as_string_columns': False}
+
+
+def _standin_responses(projects: int):
+    org_path = f'/config/v1/orgs/{ORG_ID}'
+    project_listing = [{'name': f'project_{index}',
+                        'uuid': f'{index:08d}-0000-0000-0000-000000000000'}
+                       for index in range(projects - 1)]
+    project_listing.append({'name': 'bench', 'uuid': PROJECT_ID})
+    return {
+        '/version': 'v4.0.0',
+        f'{org_path}/projects/': project_listing,
+        f'{org_path}/projects/{PROJECT_ID}/': {'name': 'bench', 'uuid': PROJECT_ID},
+        f'{org_path}/projects/{PROJECT_ID}/tables/': [{'name': 'events', 'uuid': TABLE_ID}],
+        f'{org_path}/projects/{PROJECT_ID}/tables/{TABLE_ID}/': {'name': 'events',
+                                                                 'uuid': TABLE_ID},
+        f'{org_path}/projects/{PROJECT_ID}/tables/{TABLE_ID}/transforms/': [],
+    }
+
+
+def start_standin_server(projects: int) -> ThreadingHTTPServer:
+    """Serve the GETs of the benchmarked commands on a free local port"""
+    responses = _standin_responses(projects)
+
+    class StandinHandler(BaseHTTPRequestHandler):
+        def do_GET(self):  # pylint:disable=invalid-name
+            if (body := responses.get(self.path)) is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            content = json.dumps(body).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *_):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandinHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def write_config(config_dir: Path, hostname: str) -> None:
+    """Profile 'default' on hostname with a token that does not expire, so
+    no login is attempted"""
+    with open(config_dir / 'config.toml', 'w', encoding='utf-8') as config_file:
+        toml.dump({'default': {'username': 'bench', 'hostname': hostname,
+                               'scheme': 'http', 'projectname': 'bench',
+                               'tablename': 'events'}}, config_file)
+    with open(config_dir / 'default', 'w', encoding='utf-8') as cache_file:
+        toml.dump({'org_id': ORG_ID, 'username': 'bench', 'hostname': hostname,
+                   'token': {'auth_token': 'bench', 'token_type': 'Bearer',
+                             'expires_at': datetime(2100, 1, 1)}}, cache_file)
+
+
+def benchmark_commands(work_dir: Path):
+    ddl_file = work_dir / 'events.sql'
+    ddl_file.write_text(DDL, encoding='utf-8')
+    user_choices_file = work_dir / 'user_choices.json'
+    user_choices_file.write_text(json.dumps(USER_CHOICES), encoding='utf-8')
+    return {
+        'version': ['version'],
+        '--help': ['--help'],
+        'project list': ['project', 'list'],
+        'transform map-from --no-apply': [
+            'transform', 'map-from', str(ddl_file), 'bench_transform', '--no-apply',
+            '--ddl-custom-mapping', str(REPO_DIR / 'ddl_mappings' / 'sql_to_hdx_mapping.json'),
+            '--user-choices', str(user_choices_file)],
+    }
+
+
+def _run(args, env, *, importtime=False):
+    interpreter = [sys.executable, '-X', 'importtime'] if importtime else [sys.executable]
+    start = time.perf_counter()
+    result = subprocess.run([*interpreter, '-c', ENTRY_POINT, *args],
+                            env=env,
+                            stdin=subprocess.DEVNULL,
+                            capture_output=True,
+                            check=False)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stderr = result.stderr.decode('utf-8', errors='replace')
+    if result.returncode != 0:
+        raise RuntimeError(f"'hdxcli {' '.join(args)}' failed "
+                           f"(exit status {result.returncode}):\n"
+                           f"{result.stdout.decode('utf-8', errors='replace')}{stderr}")
+    return elapsed_ms, stderr
+
+
+def parse_importtime(stderr: str):
+    """Total import time in ms, top-level imports as (cumulative ms, name)
+    and the names of every imported module"""
+    total_us = 0
+    top_level = []
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        modules.add(name.strip())
+        if not name.startswith('  '):
+            top_level.append((int(cumulative_us) / 1000, name.strip()))
+    return total_us / 1000, sorted(top_level, reverse=True), modules
+
+
+def check_budget(budget, warm_ms, import_ms, modules, scale, imports_only=False):
+    violations = []
+    if not imports_only and 'wall_ms' in budget and warm_ms > budget['wall_ms'] * scale:
+        violations.append(f"warm wall time {warm_ms:.0f} ms > {budget['wall_ms'] * scale:.0f} ms")
+    if 'import_ms' in budget and import_ms > budget['import_ms'] * scale:
+        violations.append(f"import time {import_ms:.0f} ms > {budget['import_ms'] * scale:.0f} ms")
+    for forbidden in budget.get('forbidden_modules', []):
+        if forbidden in modules:
+            violations.append(f'imports {forbidden}')
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--budgets', type=Path, default=DEFAULT_BUDGETS_FILE)
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='Multiply every time budget, for slower machines')
+    parser.add_argument('--imports-only', action='store_true',
+                        help='Check import time and forbidden modules, not wall times')
+    parser.add_argument('--top', type=int, default=5,
+                        help='Heaviest top-level imports shown per command')
+    parser.add_argument('--projects', type=int, default=200,
+                        help='Projects listed by the stand-in server')
+    args = parser.parse_args()
+
+    with open(args.budgets, 'r', encoding='utf-8') as budgets_file:
+        budgets = json.load(budgets_file)
+
+    server = start_standin_server(args.projects)
+    failures = {}
+    with tempfile.TemporaryDirectory(prefix='hdxcli-startup-') as work_dir:
+        work_dir = Path(work_dir)
+        config_dir = work_dir / 'config'
+        config_dir.mkdir()
+        write_config(config_dir, f'127.0.0.1:{server.server_address[1]}')
+        env = dict(os.environ,
+                   HDX_CONFIG_DIR=str(config_dir),
+                   PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_DIR / 'src'),
+                                                            os.environ.get('PYTHONPATH')])))
+        # Bytecode is looked up in, and never written to, an empty directory
+        cold_env = dict(env,
+                        PYTHONPYCACHEPREFIX=str(work_dir / 'no-pycache'),
+                        PYTHONDONTWRITEBYTECODE='1')
+
+        print(f"{'COMMAND':<30} {'cold ms':>8} {'warm ms':>8} {'import ms':>10} "
+              f"{'budget ms':>10}  RESULT")
+        for name, command in benchmark_commands(work_dir).items():
+            shutil.rmtree(config_dir / 'cache', ignore_errors=True)
+            cold_ms, _ = _run(command, cold_env)
+            warm_ms = statistics.median(_run(command, env)[0] for _ in range(args.repeat))
+            import_ms, top_level, modules = parse_importtime(
+                _run(command, env, importtime=True)[1])
+            budget = budgets.get(name, {})
+            violations = check_budget(budget, warm_ms, import_ms, modules, args.budget_scale,
+                                      imports_only=args.imports_only)
+            budget_ms = None if args.imports_only else budget.get('wall_ms')
+            budget_str = f'{budget_ms * args.budget_scale:.0f}' if budget_ms else '-'
+            print(f"{name:<30} {cold_ms:>8.0f} {warm_ms:>8.0f} {import_ms:>10.0f} "
+                  f"{budget_str:>10}  {'FAIL' if violations else 'ok'}")
+            for cumulative_ms, module in top_level[:args.top]:
+                print(f"{'':<4}{module:<42} {cumulative_ms:>8.1f} ms")
+            if violations:
+                failures[name] = violations
+    server.shutdown()
+
+    for name, violations in failures.items():
+        for violation in violations:
+            print(f'FAIL {name}: {violation}', file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
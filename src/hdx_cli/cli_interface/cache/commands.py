@@ -0,0 +1,84 @@
+import click
+
+from ...library_api.common.generic_resource import (warm_resource_ids,
+                                                    DEFAULT_RESOLVE_CONCURRENCY)
+from ...library_api.common.http_cache import HTTP_CACHE
+from ...library_api.common.logging import get_logger
+from ...library_api.common.resolution_store import RESOLUTION_STORE
+from ...library_api.common.schema_cache import SCHEMA_CACHE
+from ...library_api.utility.decorators import report_error_and_exit, ensure_logged_in
+
+logger = get_logger()
+
+HTTP_CACHE_NAMESPACE = 'http'
+SCHEMA_CACHE_NAMESPACE = 'schemas'
+
+
+def _format_row(columns):
+    return ''.join(f'{column:<{width}}' for column, width in
+                   zip(columns, (30, 20, 20, 10, 12, 10)))
+
+
+@click.group(help='Inspect, prewarm and clear the local caches')
+@click.pass_context
+def cache(ctx: click.Context):
+    pass
+
+
+@click.command(help='Show entries, size and hit ratio per host, profile and namespace.')
+@click.pass_context
+@report_error_and_exit(exctype=Exception)
+def stats(ctx: click.Context):
+    logger.info(f'{"-" * 102}')
+    logger.info(_format_row(('host', 'profile', 'namespace', 'entries', 'size', 'hit ratio')))
+    logger.info(f'{"-" * 102}')
+    for scope in RESOLUTION_STORE.stats():
+        lookups = scope['hits'] + scope['misses']
+        hit_ratio = f'{scope["hits"] / lookups:.1%}' if lookups else '-'
+        logger.info(_format_row((scope['host'], scope['profile'], scope['namespace'],
+                                 scope['entries'], scope['size'], hit_ratio)))
+    logger.info(f'{"-" * 102}')
+    logger.info(f'Resolution store: {RESOLUTION_STORE.db_path} '
+                f'({RESOLUTION_STORE.size_on_disk()} bytes)')
+    http_entries, http_size = HTTP_CACHE.stats()
+    logger.info(f'HTTP cache: {HTTP_CACHE.cache_dir} ({http_entries} entries, '
+                f'{http_size} bytes)')
+    schema_entries = list(SCHEMA_CACHE.cache_dir.glob('*.json'))
+    logger.info(f'Settings schema cache: {SCHEMA_CACHE.cache_dir} ({len(schema_entries)} entries, '
+                f'{sum(entry.stat().st_size for entry in schema_entries)} bytes)')
+
+
+@click.command(help='Resolve the ids of every project, table and transform of the profile, '
+                    'so later commands do not need to look them up.')
+@click.option('--concurrency', type=click.IntRange(min=1), default=DEFAULT_RESOLVE_CONCURRENCY,
+              help=f'Maximum number of requests in flight '
+                   f'(default: {DEFAULT_RESOLVE_CONCURRENCY}).')
+@click.pass_context
+@report_error_and_exit(exctype=Exception)
+@ensure_logged_in
+def warm(ctx: click.Context, concurrency: int):
+    user_profile = ctx.parent.obj['usercontext']
+    resolved = warm_resource_ids(user_profile, max_workers=concurrency)
+    logger.info(f'Cached the ids of {resolved} resources')
+
+
+@click.command(help='Remove the cached entries of all namespaces, or only of one.')
+@click.option('--namespace', default=None, metavar='NAMESPACE',
+              help="Namespace shown by 'cache stats', "
+                   f"'{HTTP_CACHE_NAMESPACE}' for the HTTP cache or "
+                   f"'{SCHEMA_CACHE_NAMESPACE}' for the settings schema cache.")
+@click.pass_context
+@report_error_and_exit(exctype=Exception)
+def clear(ctx: click.Context, namespace: str):
+    if namespace in (None, HTTP_CACHE_NAMESPACE):
+        HTTP_CACHE.clear()
+    if namespace in (None, SCHEMA_CACHE_NAMESPACE):
+        SCHEMA_CACHE.clear()
+    if namespace not in (HTTP_CACHE_NAMESPACE, SCHEMA_CACHE_NAMESPACE):
+        RESOLUTION_STORE.clear(namespace)
+    logger.info(f'Cleared {namespace if namespace else "all"} cache entries')
+
+
+cache.add_command(stats)
+cache.add_command(warm)
+cache.add_command(clear)
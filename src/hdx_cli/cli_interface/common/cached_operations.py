@@ -1,11 +1,16 @@
-import json
-import requests
-
-from ...library_api.common.config_constants import HDX_CONFIG_DIR
-from ...library_api.common.exceptions import HdxCliException, ResourceNotFoundException
+from ...library_api.common import rest_operations as rest_ops
+from ...library_api.common.exceptions import (HdxCliException,
+                                              HttpException,
+                                              ResourceNotFoundException)
 from ...library_api.common.context import ProfileUserContext
-from ...library_api.utility.decorators import find_in_disk_cache
-from ...library_api.common.generic_resource import access_resource
+from ...library_api.utility.decorators import (find_in_disk_cache,
+                                               get_from_disk_cache,
+                                               set_in_disk_cache,
+                                               remove_from_disk_cache)
+from ...library_api.common.generic_resource import (access_resource,
+                                                    resolve_path,
+                                                    resource_id_key,
+                                                    RESOURCE_IDS_NAMESPACE)
 from ...library_api.common.logging import get_logger
 
 logger = get_logger()
@@ -40,10 +45,10 @@ def find_projects(user_ctx: ProfileUserContext):
     url = f"{scheme}://{hostname}/config/v1/orgs/{user_ctx.org_id}/projects/"
     headers = {"Authorization": f"{token.token_type} {token.token}",
                "Accept": "application/json"}
-    result = requests.get(url, headers=headers, timeout=timeout)
-    if result.status_code != 200:
-        raise HdxCliException(f"Error getting projects.")
-    return json.loads(result.content)
+    try:
+        return rest_ops.list(url, headers=headers, timeout=timeout)
+    except HttpException as exc:
+        raise HdxCliException("Error getting projects.") from exc
 
 
 def find_batch(user_ctx: ProfileUserContext):
@@ -54,14 +59,18 @@ def find_batch(user_ctx: ProfileUserContext):
     url = f"{scheme}://{hostname}/config/v1/orgs/{user_ctx.org_id}/jobs/batch/"
     headers = {"Authorization": f"{token.token_type} {token.token}",
                "Accept": "application/json"}
-    result = requests.get(url, headers=headers, timeout=timeout)
-    if result.status_code != 200:
-        raise HdxCliException("Error getting projects.")
-    return json.loads(result.content)
+    try:
+        return rest_ops.list(url, headers=headers, timeout=timeout)
+    except HttpException as exc:
+        raise HdxCliException("Error getting projects.") from exc
+
 
+def _projects_path(user_ctx):
+    return f"/config/v1/orgs/{user_ctx.org_id}/projects/"
 
-@find_in_disk_cache(cache_file=HDX_CONFIG_DIR / "cache/cache.bin",
-                    namespace="projects_ids")
+
+@find_in_disk_cache(namespace="projects_ids",
+                    collection_path=_projects_path)
 def find_project_id(user_ctx, project_name):
     projects = find_projects(user_ctx)
     return [t["uuid"] for t in projects if t["name"] == project_name]
@@ -69,18 +78,15 @@ def find_project_id(user_ctx, project_name):
 
 def _find_project_resource(user_ctx: ProfileUserContext, resource):
     """resource parameter is 'functions' or 'tables', 'dictionaries' or anything project-level"""
-    project_id = [ p for p in find_projects(user_ctx)
-                    if p["name"] == user_ctx.projectname][0]["uuid"]
+    url = resolve_path(user_ctx, [("projects", user_ctx.projectname), (resource, None)]).url
     token = user_ctx.auth
-    hostname = user_ctx.hostname
-    scheme = user_ctx.scheme
-    url = f"{scheme}://{hostname}/config/v1/orgs/{user_ctx.org_id}/projects/{project_id}/{resource}"
+    timeout = user_ctx.timeout
     headers={"Authorization": f"{token.token_type} {token.token}",
              "Accept": "application/json"}
-    result = requests.get(url, headers=headers)
-    if result.status_code != 200:
-        raise HdxCliException(f"Error getting projects.")
-    return json.loads(result.content)
+    try:
+        return rest_ops.list(url, headers=headers, timeout=timeout)
+    except HttpException as exc:
+        raise HdxCliException("Error getting projects.") from exc
 
 
 def find_tables(user_ctx: ProfileUserContext):
@@ -95,35 +101,33 @@ def find_functions(user_ctx: ProfileUserContext):
     return _find_project_resource(user_ctx, 'functions')
 
 
-@find_in_disk_cache(cache_file=HDX_CONFIG_DIR / "cache/cache.bin",
-                    namespace="tables_ids")
+def _tables_path(user_ctx):
+    if project_ids := find_project_id(user_ctx, user_ctx.projectname):
+        return f"{_projects_path(user_ctx)}{project_ids[0]}/tables/"
+    return None
+
+
+@find_in_disk_cache(namespace="tables_ids",
+                    collection_path=_tables_path,
+                    scope_fields=("projectname",))
 def find_table_id(user_ctx, table_name):
     tables = find_tables(user_ctx)
     return [t["uuid"] for t in tables if t["name"] == table_name]
 
 
 def find_transforms(user_ctx: ProfileUserContext):
-    try:
-        project_id = [p for p in find_projects(user_ctx) if p["name"] == user_ctx.projectname][0]["uuid"]
-    except IndexError as exc:
-        raise ResourceNotFoundException(f'Cannot find project name: {user_ctx.projectname}') from exc
-
-    try:
-        table_id = [p for p in find_tables(user_ctx) if p["name"] == user_ctx.tablename][0]["uuid"]
-    except IndexError as exc:
-        raise ResourceNotFoundException(f'Cannot find table name: {user_ctx.tablename}') from exc
-
+    url = resolve_path(user_ctx, [("projects", user_ctx.projectname),
+                                  ("tables", user_ctx.tablename),
+                                  ("transforms", None)]).url
     token = user_ctx.auth
-    hostname = user_ctx.hostname
-    scheme = user_ctx.scheme
-    url = f"{scheme}://{hostname}/config/v1/orgs/{user_ctx.org_id}/projects/{project_id}/tables/{table_id}/transforms"
+    timeout = user_ctx.timeout
     headers = {
         "Authorization": f"{token.token_type} {token.token}",
         "Accept": "application/json"}
-    result = requests.get(url, headers=headers)
-    if result.status_code != 200:
-        raise HdxCliException(f"Error getting projects.")
-    return json.loads(result.content)
+    try:
+        return rest_ops.list(url, headers=headers, timeout=timeout)
+    except HttpException as exc:
+        raise HdxCliException("Error getting projects.") from exc
 
 
 def find_storages(user_ctx: ProfileUserContext):
@@ -134,10 +138,10 @@ def find_storages(user_ctx: ProfileUserContext):
     url = f"{scheme}://{hostname}/config/v1/orgs/{user_ctx.org_id}/storages/"
     headers = {"Authorization": f"{token.token_type} {token.token}",
                "Accept": "application/json"}
-    result = requests.get(url, headers=headers, timeout=timeout)
-    if result.status_code != 200:
-        raise HdxCliException(f"Error getting storages.")
-    return json.loads(result.content)
+    try:
+        return rest_ops.list(url, headers=headers, timeout=timeout)
+    except HttpException as exc:
+        raise HdxCliException("Error getting storages.") from exc
 
 
 def find_pools(user_ctx: ProfileUserContext):
@@ -148,14 +152,40 @@ def find_pools(user_ctx: ProfileUserContext):
     url = f"{scheme}://{hostname}/config/v1/pools/"
     headers = {"Authorization": f"{token.token_type} {token.token}",
                "Accept": "application/json"}
-    result = requests.get(url, headers=headers, timeout=timeout)
-    if result.status_code != 200:
-        raise HdxCliException(f"Error getting pools.")
-    return json.loads(result.content)
+    try:
+        return rest_ops.list(url, headers=headers, timeout=timeout)
+    except HttpException as exc:
+        raise HdxCliException("Error getting pools.") from exc
+
 
+def _transforms_path(user_ctx):
+    if ((tables_path := _tables_path(user_ctx)) and
+            (table_ids := find_table_id(user_ctx, user_ctx.tablename))):
+        return f"{tables_path}{table_ids[0]}/transforms/"
+    return None
 
-@find_in_disk_cache(cache_file=HDX_CONFIG_DIR / "cache/cache.bin",
-                    namespace="transforms_ids")
+
+@find_in_disk_cache(namespace="transforms_ids",
+                    collection_path=_transforms_path,
+                    scope_fields=("projectname", "tablename"))
 def find_transform_id(user_ctx, transform_name):
     transforms = find_transforms(user_ctx)
     return [t["uuid"] for t in transforms if t["name"] == transform_name]
+
+
+def get_cached_resource_id(user_ctx, resource_path, resource_name, filter_field='name'):
+    """Id of a resource of the collection in resource_path, as seen the last time
+    it was looked up. It may be stale: the resource could have been deleted or renamed."""
+    return get_from_disk_cache(RESOURCE_IDS_NAMESPACE, user_ctx,
+                               resource_id_key(resource_path, resource_name, filter_field))
+
+
+def cache_resource_id(user_ctx, resource_path, resource_name, resource_id, filter_field='name'):
+    set_in_disk_cache(RESOURCE_IDS_NAMESPACE, user_ctx,
+                      resource_id_key(resource_path, resource_name, filter_field), resource_id,
+                      path=resource_path)
+
+
+def forget_resource_id(user_ctx, resource_path, resource_name, filter_field='name'):
+    remove_from_disk_cache(RESOURCE_IDS_NAMESPACE, user_ctx,
+                           resource_id_key(resource_path, resource_name, filter_field))
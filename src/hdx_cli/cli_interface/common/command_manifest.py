@@ -0,0 +1,88 @@
+"""Manifest of the command tree used by shell completion.
+
+Built by walking the click commands, which imports all of them, and written
+as JSON so completion requests can be answered without importing them (see
+library_api/common/completion.py).
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import click
+
+from ...library_api.common.completion import MANIFEST_VERSION, RESOURCE_KINDS
+from ...library_api.common.fingerprint import code_fingerprint
+
+__all__ = ['build_manifest', 'write_manifest']
+
+# Arguments and options whose value is the name of a resource of that kind
+_NAME_PARAMS = {'project_name': 'project', 'projectname': 'project',
+                'table_name': 'table', 'tablename': 'table',
+                'transform_name': 'transform',
+                'profile_name': 'profile'}
+_NAME_OPTIONS = {'--project': 'project', '--table': 'table', '--transform': 'transform',
+                 '--profile': 'profile'}
+
+
+def _value_kind(param: click.Parameter, group_name: Optional[str]) -> Optional[str]:
+    if isinstance(param.type, (click.Path, click.File)):
+        return 'file'
+    if isinstance(param, click.Option):
+        return next((_NAME_OPTIONS[opt] for opt in param.opts if opt in _NAME_OPTIONS), None)
+    if param.name == 'resource_name' and group_name in RESOURCE_KINDS:
+        return group_name
+    return _NAME_PARAMS.get(param.name)
+
+
+def _param_entry(param: click.Parameter, group_name: Optional[str]) -> Dict[str, Any]:
+    entry = {'kind': _value_kind(param, group_name),
+             'choices': (list(param.type.choices)
+                         if isinstance(param.type, click.Choice) else None)}
+    if isinstance(param, click.Option):
+        entry.update(opts=[*param.opts, *param.secondary_opts],
+                     flag=param.is_flag or param.count,
+                     multiple=param.multiple,
+                     help=(param.help or '').split('\n')[0])
+    else:
+        entry.update(name=param.name, nargs=param.nargs)
+    return entry
+
+
+def _command_entry(ctx: click.Context, command: click.Command,
+                   group_name: Optional[str]) -> Dict[str, Any]:
+    entry = {'help': command.get_short_help_str(limit=80),
+             'hidden': command.hidden,
+             'options': [_param_entry(param, group_name)
+                         for param in command.get_params(ctx)
+                         if isinstance(param, click.Option) and not param.hidden],
+             'arguments': [_param_entry(param, group_name)
+                           for param in command.params if isinstance(param, click.Argument)],
+             'commands': {}}
+    if isinstance(command, click.Group):
+        for name in command.list_commands(ctx):
+            if subcommand := command.get_command(ctx, name):
+                entry['commands'][name] = _command_entry(
+                    click.Context(subcommand, parent=ctx, info_name=name), subcommand,
+                    group_name or name)
+    return entry
+
+
+def build_manifest(cli: click.Group) -> Dict[str, Any]:
+    return {'version': MANIFEST_VERSION,
+            'fingerprint': code_fingerprint(),
+            'root': _command_entry(click.Context(cli, info_name='hdxcli'), cli, None)}
+
+
+def write_manifest(cli: click.Group, manifest_path: Path) -> Dict[str, Any]:
+    """Build the manifest of cli, write it atomically to manifest_path and
+    return it"""
+    manifest = build_manifest(cli)
+    manifest_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=manifest_path.parent,
+                                                       suffix='.tmp')
+    with os.fdopen(file_descriptor, 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(temporary_path, manifest_path)
+    return manifest
@@ -0,0 +1,170 @@
+"""Run one command against several profiles: hdxcli --profiles a,b ... or
+hdxcli --all-profiles ...
+
+Logins happen first, concurrently when --password is given (a login that
+needs to prompt for the password can only be done one at a time). The command
+then runs for every profile in a separate hdxcli process, a bounded number of
+them at a time, since the state of a command (logging, caches, options) is
+per process. Each process finds the token of its profile already cached, so
+--password is not passed on and does not show in the process list. With
+--profiles-jobs 1 there is nothing to run in parallel, and the command runs in
+this process for one profile after the other, without the startup of a new
+interpreter each time.
+"""
+import contextlib
+import io
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import click
+
+from ...library_api.common.config_files import load_toml_file
+from ...library_api.common.daemon_client import LOCAL_COMMANDS
+from ...library_api.common.exceptions import LogicException
+from ...library_api.common.logging import get_logger
+from .lazy_group import LazyGroup
+
+logger = get_logger()
+
+__all__ = ['FanOutGroup', 'fan_out_profiles', 'run_for_profiles', 'DEFAULT_PROFILES_JOBS']
+
+DEFAULT_PROFILES_JOBS = 8
+# Global options that select the profiles, not passed to each process, and
+# the password, already used by the logins
+FAN_OUT_PARAMS = frozenset({'profile', 'profiles', 'all_profiles', 'profiles_jobs',
+                            'profiles_output', 'password'})
+SUBCOMMAND_ARGV = 'hdx_cli.subcommand_argv'
+
+
+class FanOutGroup(LazyGroup):
+    """LazyGroup that keeps the subcommand and its arguments in
+    ctx.meta, so they can be run again for other profiles"""
+
+    def resolve_command(self, ctx: click.Context, args: List[str]):
+        # Called with the subcommand and its arguments before the group
+        # callback runs
+        ctx.meta[SUBCOMMAND_ARGV] = list(args)
+        return super().resolve_command(ctx, args)
+
+
+def fan_out_profiles(profiles: Optional[str], all_profiles: bool,
+                     profile_config_file) -> List[str]:
+    """Names of the profiles selected by --profiles or --all-profiles"""
+    existing_profiles = list(load_toml_file(profile_config_file))
+    if all_profiles:
+        return existing_profiles
+    names = list(dict.fromkeys(name.strip() for name in profiles.split(',') if name.strip()))
+    if unknown_profiles := [name for name in names if name not in existing_profiles]:
+        raise LogicException(f"Profile(s) not found: {', '.join(unknown_profiles)}.")
+    if not names:
+        raise LogicException('No profiles given.')
+    return names
+
+
+def _login(profile_name: str, user_options: Dict) -> Optional[Exception]:
+    """None if profile_name is logged in, the error otherwise"""
+    # pylint:disable=import-outside-toplevel
+    from ...library_api.common.auth_utils import load_user_context
+    from ...library_api.common.context import ProfileLoadContext
+    try:
+        load_user_context(ProfileLoadContext(profile_name, user_options['profile_config_file']),
+                          **user_options)
+        return None
+    except Exception as exc:  # pylint:disable=broad-except
+        return exc
+
+
+def _run(profile_name: str, command: List[str]) -> Dict:
+    result = subprocess.run([sys.executable, '-m', 'hdx_cli.main', '--profile', profile_name,
+                             *command],
+                            stdin=subprocess.DEVNULL,
+                            capture_output=True,
+                            text=True,
+                            check=False)
+    return {'profile': profile_name, 'exit_code': result.returncode,
+            'output': result.stdout, 'errors': result.stderr}
+
+
+def _run_in_process(cli: click.Group, profile_name: str, command: List[str]) -> Dict:
+    """_run in this process. Commands run this way must not overlap, their
+    output is captured by replacing the standard streams."""
+    # pylint:disable=import-outside-toplevel
+    from ...library_api.common.command_runner import run_in_process
+    output, errors = io.StringIO(), io.StringIO()
+    saved_stdin = sys.stdin
+    # Same as the stdin of the processes, prompts get no answer
+    sys.stdin = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+            exit_code = run_in_process(cli, ['--profile', profile_name, *command])
+    finally:
+        sys.stdin = saved_stdin
+    # As a process reports it, sys.exit(-1) is 255
+    return {'profile': profile_name, 'exit_code': exit_code % 256,
+            'output': output.getvalue(), 'errors': errors.getvalue()}
+
+
+def _json_output(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _log_tagged(profile_name: str, text: str) -> None:
+    for line in text.splitlines():
+        logger.info(f'[{profile_name}] {line}')
+
+
+def run_for_profiles(ctx: click.Context, profile_names: List[str], user_options: Dict, *,
+                     jobs: int, output_format: str, offline: bool = False) -> int:
+    """Run the subcommand of ctx for every profile and return the exit
+    status of the first one that failed, or 0. offline (--from-snapshot)
+    commands need no login."""
+    # Only needed when fanning out, hdx_cli.main imports this module on startup
+    # pylint:disable=import-outside-toplevel
+    from ...library_api.common.command_runner import global_option_args
+    argv = ctx.meta.get(SUBCOMMAND_ARGV)
+    if not argv:
+        raise LogicException('A command is needed with --profiles or --all-profiles.')
+    if argv[0] in LOCAL_COMMANDS:
+        raise LogicException(f"'{argv[0]}' cannot be run for several profiles.")
+    command = [*global_option_args(ctx, exclude=FAN_OUT_PARAMS), *argv]
+
+    if offline:
+        login_errors = dict.fromkeys(profile_names)
+    else:
+        login_jobs = jobs if user_options['password'] else 1
+        with ThreadPoolExecutor(max_workers=min(login_jobs, len(profile_names))) as executor:
+            login_errors = dict(zip(profile_names,
+                                    executor.map(lambda name: _login(name, user_options),
+                                                 profile_names)))
+    in_process = jobs == 1
+    with ThreadPoolExecutor(max_workers=min(jobs, len(profile_names))) as executor:
+        futures = {} if in_process else {name: executor.submit(_run, name, command)
+                                         for name in profile_names
+                                         if login_errors[name] is None}
+        results = []
+        for name in profile_names:
+            if login_errors[name] is not None:
+                result = {'profile': name, 'exit_code': 1, 'output': '',
+                          'errors': f'Error: {str(login_errors[name]) or "login failed"}\n'}
+            elif in_process:
+                result = _run_in_process(ctx.find_root().command, name, command)
+            else:
+                result = futures[name].result()
+            results.append(result)
+            if output_format == 'text':
+                _log_tagged(name, result['output'])
+                _log_tagged(name, result['errors'])
+
+    failed = [result['exit_code'] for result in results if result['exit_code']]
+    if output_format == 'json':
+        logger.info(json.dumps([{**result, 'output': _json_output(result['output'])}
+                                for result in results], indent=2))
+    else:
+        logger.info(f'{len(results)} profiles, {len(failed)} failed')
+    return failed[0] if failed else 0
@@ -0,0 +1,30 @@
+import importlib
+from typing import Dict, List, Optional
+
+import click
+
+
+class LazyGroup(click.Group):
+    """click.Group whose subcommands are registered by import path,
+    'package.module:attribute', and only imported when they are invoked
+    (or listed, as in --help). Short commands then do not pay for the
+    imports of all the others."""
+
+    def __init__(self, *args, lazy_subcommands: Optional[Dict[str, str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = dict(lazy_subcommands or {})
+
+    def add_lazy_command(self, name: str, import_path: str) -> None:
+        self.lazy_subcommands[name] = import_path
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted({*super().list_commands(ctx), *self.lazy_subcommands})
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name in self.commands or cmd_name not in self.lazy_subcommands:
+            return super().get_command(ctx, cmd_name)
+        module_name, attribute = self.lazy_subcommands[cmd_name].split(':')
+        command = getattr(importlib.import_module(module_name), attribute)
+        # Cache it, so it is not looked up again
+        self.add_command(command, cmd_name)
+        return command
@@ -1,4 +1,4 @@
-import io
+import tempfile
 
 from urllib.parse import urlparse
 
@@ -221,13 +221,15 @@ def _migrate_dict_file(source_profile, target_profile, dictionary, source_projec
     headers = {'Authorization': f'{source_profile.auth.token_type} {source_profile.auth.token}',
                'Accept': '*/*'}
     timeout = source_profile.timeout
-    contents = lro.get(query_endpoint, headers=headers, timeout=timeout, fmt='verbatim')
-    try:
-        _create_dictionary_file_for_project(target_project_name, d_file, contents,
-                                            target_profile)
-    except HttpException:
-        # Dictionary file existed, no need to create it
-        pass
+    with tempfile.TemporaryFile() as contents:
+        lro.download(query_endpoint, headers=headers, timeout=timeout, file_obj=contents)
+        contents.seek(0)
+        try:
+            _create_dictionary_file_for_project(target_project_name, d_file, contents,
+                                                target_profile)
+        except HttpException:
+            # Dictionary file existed, no need to create it
+            pass
 
 
 def _create_dictionary_file_for_project(project_name,
@@ -242,6 +244,6 @@ def _create_dictionary_file_for_project(project_name,
     file_url = f'{project_url}dictionaries/files/'
     timeout = profile.timeout
     lro.create_file(file_url, headers=headers,
-                    file_stream=io.BytesIO(contents),
+                    file_stream=contents,
                     remote_filename=dict_file,
                     timeout=timeout)
@@ -1,18 +1,20 @@
-from typing import Optional, List, Tuple, Dict, Any
+from typing import Optional, List, Tuple, Dict, Any, Iterator
 
 import json
 import click
 
 from ...library_api.common.exceptions import (
     LogicException,
-    TransformNotFoundException,
     HdxCliException,
     ActionNotAvailableException
 )
 from ...library_api.common import rest_operations as rest_ops
+from ...library_api.common.generic_resource import resolve_path
 from ...library_api.common.logging import get_logger
+from ...library_api.common.schema_cache import SCHEMA_CACHE
 from ...library_api.userdata.token import AuthInfo
 from ...library_api.utility.functions import heuristically_get_resource_kind
+from ...library_api.utility.json_util import json_dumps
 from .cached_operations import * #pylint:disable=wildcard-import,unused-wildcard-import
 
 logger = get_logger()
@@ -111,19 +113,59 @@ def basic_show(profile,
                indent: Optional[bool] = False,
                filter_field: Optional[str] = 'name'
                ):
+    indentation = DEFAULT_INDENTATION if indent else None
+    _, resource = find_resource(profile, resource_path, resource_name, filter_field=filter_field)
+    if not resource:
+        raise ResourceNotFoundException('Cannot find resource.')
+    return json_dumps(resource, indent=indentation)
+
+
+def _get_resource_url(profile, resource_path, resource):
+    scheme = profile.scheme
+    if 'url' in resource:
+        return resource['url'].replace('https://', f'{scheme}://')
+    # the role resource is the only one with id instead of uuid
+    resource_id = resource['uuid'] if 'uuid' in resource else resource['id']
+    return f"{scheme}://{profile.hostname}{resource_path}{resource_id}"
+
+
+def find_resource(profile,
+                  resource_path,
+                  resource_name,
+                  *,
+                  filter_field: Optional[str] = 'name'
+                  ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """Return the url and the body of the resource of the collection in
+    resource_path whose filter_field is resource_name, or (None, None).
+
+    When the id of the resource is known from a previous lookup, the resource
+    is fetched directly. The collection is only scanned when the id is
+    unknown or stale (the resource was deleted or renamed).
+    """
     hostname = profile.hostname
     scheme = profile.scheme
     timeout = profile.timeout
-    list_url = f'{scheme}://{hostname}{resource_path}'
     auth_info: AuthInfo = profile.auth
     headers = {'Authorization': f'{auth_info.token_type} {auth_info.token}',
                'Accept': 'application/json'}
-    indentation = DEFAULT_INDENTATION if indent else None
-    resources = rest_ops.list(list_url, headers=headers, timeout=timeout)
-    for resource in resources:
+    if resource_id := get_cached_resource_id(profile, resource_path, resource_name, filter_field):
+        url = f'{scheme}://{hostname}{resource_path}{resource_id}'
+        try:
+            resource = rest_ops.get(f'{url}/', headers=headers, timeout=timeout)
+        except HttpException as exc:
+            if exc.error_code != 404:
+                raise
+        else:
+            if isinstance(resource, dict) and resource.get(filter_field) == resource_name:
+                return _get_resource_url(profile, resource_path, resource), resource
+
+    for resource in iter_resources(profile, resource_path):
         if resource.get(filter_field) == resource_name:
-            return json.dumps(resource, indent=indentation)
-    raise ResourceNotFoundException('Cannot find resource.')
+            if resource_id := resource.get('uuid', resource.get('id')):
+                cache_resource_id(profile, resource_path, resource_name, resource_id, filter_field)
+            return _get_resource_url(profile, resource_path, resource), resource
+    forget_resource_id(profile, resource_path, resource_name, filter_field)
+    return None, None
 
 
 def basic_transform(ctx: click.Context):
@@ -132,48 +174,20 @@ def basic_transform(ctx: click.Context):
     if not project_name or not table_name:
         raise HdxCliException(f"No project/table parameters provided and "
                               f"no project/table set in profile '{profile_info.profilename}'")
-    hostname = profile_info.hostname
-    org_id = profile_info.org_id
-    scheme = profile_info.scheme
-    timeout = profile_info.timeout
-    list_projects_url = f'{scheme}://{hostname}/config/v1/orgs/{org_id}/projects/'
-    token = profile_info.auth
-    headers = {'Authorization': f'{token.token_type} {token.token}',
-               'Accept': 'application/json'}
-    projects_list = rest_ops.list(list_projects_url,
-                                  headers=headers,
-                                  timeout=timeout)
-
-    try:
-        project_id = [p['uuid'] for p in projects_list if p['name'] == project_name][0]
-
-        list_tables_url = f'{scheme}://{hostname}/config/v1/orgs/{org_id}/projects/{project_id}/tables'
-        tables_list = rest_ops.list(list_tables_url,
-                                    headers=headers,
-                                    timeout=timeout)
-        table_id = [t['uuid'] for t in tables_list if t['name'] == table_name][0]
-
-        transforms_path = f'/config/v1/orgs/{org_id}/projects/{project_id}/tables/{table_id}/transforms/'
-        transforms_url = f'{scheme}://{hostname}{transforms_path}'
-
-        transforms_list = rest_ops.list(transforms_url,
-                                        headers=headers,
-                                        timeout=timeout)
-    except IndexError as idx_err:
-        raise LogicException('Cannot find resource.') from idx_err
-
-    if not profile_info.transformname:
+    transforms_path = resolve_path(profile_info, [('projects', project_name),
+                                                  ('tables', table_name),
+                                                  ('transforms', None)]).path
+    if profile_info.transformname:
+        # Raises TransformNotFoundException if it does not exist
+        resolve_path(profile_info, [('transforms', profile_info.transformname)],
+                     base_path=transforms_path)
+    else:
+        transforms_list = get_resource_list(profile_info, transforms_path)
         try:
             transform_name = [t['name'] for t in transforms_list if t['settings']['is_default']][0]
             profile_info.transformname = transform_name
         except:
             pass
-    else:
-        try:
-            transform_name = [t['name'] for t in transforms_list if t['name'] == profile_info.transformname][0]
-            profile_info.transformname = transform_name
-        except IndexError as ex:
-            raise TransformNotFoundException(f'Transform not found: {profile_info.transformname}') from ex
     ctx.obj = {'resource_path':
                transforms_path,
                'usercontext': profile_info}
@@ -271,31 +285,14 @@ def _format_settings_header(headers_and_spacing: List[Tuple[str, int]]):
     return "".join(format_strings)
 
 
-def _do_for_each_setting(settings_dict, prefix="", resource=None):
-    for setting_name, setting_val in settings_dict.items():
-        if setting_val.get("read_only"):
-            continue
-        if setting_val.get("type") == "nested object" and setting_val.get('children'):
-            the_prefix = prefix + "." if prefix else ""
-            settings_dict = setting_val.get("children")
-            _for_each_setting(settings_dict,
-                              the_prefix + setting_name,
-                              resource)
-        else:
-            full_key_name = (setting_name if not prefix
-                             else prefix + "." + setting_name)
-            the_value_in_resource = None
-            try:
-                the_value_in_resource = _get_dotted_key_from_dict(full_key_name, resource)
-            except KeyError:
-                the_value_in_resource = KeyAbsent()
-            logger.info(_format_setting(full_key_name, setting_val.get("type"),
-                                        the_value_in_resource))
-
-
-def _for_each_setting(settings_dict, prefix="",
-                      resource=None):
-    _do_for_each_setting(settings_dict, prefix, resource)
+def _for_each_setting(settings_index, resource=None):
+    for full_key_name, setting_type in settings_index:
+        try:
+            the_value_in_resource = _get_dotted_key_from_dict(full_key_name, resource)
+        except KeyError:
+            the_value_in_resource = KeyAbsent()
+        logger.info(_format_setting(full_key_name, setting_type,
+                                    the_value_in_resource))
 
 
 def _cleanup_some_fields_when_updateworkaround(body_dict):
@@ -342,13 +339,11 @@ def basic_settings(profile,
     headers = {"Authorization": f"{auth.token_type} {auth.token}",
                "Accept": "application/json"}
 
-    options = rest_ops.options(settings_url,
-                               headers=headers,
-                               timeout=timeout)
-    try:
-        actions = options["actions"]["POST"]
-    except KeyError as exc:
-        raise ActionNotAvailableException("The 'settings' action is not available on this resource.") from exc
+    schema = SCHEMA_CACHE.get(profile, settings_url,
+                              headers=headers,
+                              timeout=timeout)
+    if schema.actions is None:
+        raise ActionNotAvailableException("The 'settings' action is not available on this resource.")
 
     resource_kind_plural, resource_kind = heuristically_get_resource_kind(resource_path)
     if not getattr(profile, resource_kind + "name"):
@@ -365,7 +360,7 @@ def basic_settings(profile,
         logger.info(f'{"-" * (90 + 30 + 40)}')
         logger.info(_format_settings_header([("name", 90), ("type", 30), ("value", 40)]))
         logger.info(f'{"-" * (90 + 30 + 40)}')
-        _for_each_setting(actions, resource=resource)
+        _for_each_setting(schema.index, resource=resource)
     elif key and not value:
         try:
             logger.info(f"{key}: {_get_dotted_key_from_dict(key, resource)}")
@@ -396,36 +391,20 @@ def basic_delete(profile,
                  *,
                  params=None,
                  filter_field='name'):
-    hostname = profile.hostname
-    scheme = profile.scheme
     timeout = profile.timeout
-    list_url = f'{scheme}://{hostname}{resource_path}'
     auth = profile.auth
     headers = {'Authorization': f'{auth.token_type} {auth.token}',
                'Accept': 'application/json'}
-    resources = rest_ops.list(list_url,
-                              headers=headers,
-                              timeout=timeout)
-    url = None
-    for a_resource in resources:
-        if a_resource[filter_field] == resource_name:
-            if 'url' in a_resource:
-                url = a_resource['url'].replace('https://', f'{scheme}://')
-            else:
-                try:
-                    url = f"{scheme}://{hostname}{resource_path}{a_resource['uuid']}"
-                except KeyError:
-                    # the role resource is the only one with id instead of uuid
-                    url = f"{scheme}://{hostname}{resource_path}{a_resource['id']}"
-            break
+    url, _ = find_resource(profile, resource_path, resource_name, filter_field=filter_field)
     if not url:
         return False
     rest_ops.delete(url, headers=headers, timeout=timeout, params=params)
+    forget_resource_id(profile, resource_path, resource_name, filter_field)
     return True
 
 
 def basic_list(profile, resource_path, filter_field: Optional[str] = 'name'):
-    resources = get_resource_list(profile, resource_path)
+    resources = iter_resources(profile, resource_path)
 
     for resource in resources:
         if isinstance(resource, str):
@@ -442,31 +421,18 @@ def _get_resource_information(profile,
                               resource_name,
                               action,
                               indent: Optional[bool] = False):
-    hostname = profile.hostname
-    scheme = profile.scheme
     timeout = profile.timeout
-    list_url = f'{scheme}://{hostname}{resource_path}'
     auth_info: AuthInfo = profile.auth
     headers = {'Authorization': f'{auth_info.token_type} {auth_info.token}',
                'Accept': 'application/json'}
-    resources = rest_ops.list(list_url,
-                              headers=headers,
-                              timeout=timeout)
-    url = None
     indentation = DEFAULT_INDENTATION if indent else None
-    for resource in resources:
-        if resource['name'] == resource_name:
-            if 'url' in resource:
-                url = resource['url'].replace('https://', f'{scheme}://')
-            else:
-                url = f"{scheme}://{hostname}{resource_path}{resource['uuid']}"
-            break
+    url, _ = find_resource(profile, resource_path, resource_name)
     if not url:
         raise ResourceNotFoundException(f'Cannot find resource {resource_name}.')
 
     url += f'/{action}'
     response = rest_ops.get(url, headers=headers, timeout=timeout)
-    return json.dumps(response, indent=indentation)
+    return json_dumps(response, indent=indentation)
 
 
 def basic_stats(profile, resource_path, resource_name, indent):
@@ -498,3 +464,38 @@ def get_resource_list(profile, resource_path, **kwargs):
                               timeout=timeout,
                               params=kwargs)
     return resources
+
+
+def iter_resources(profile,
+                   resource_path,
+                   page_size: Optional[int] = None,
+                   **kwargs) -> Iterator[Any]:
+    """Yield the resources of resource_path one by one. For paginated
+    endpoints, which return envelopes with 'results' and 'next', the next
+    page is only requested once the previous one has been consumed, so
+    callers that stop early do not download the rest. Only the first
+    request is memoized: later pages are not kept once consumed."""
+    hostname = profile.hostname
+    scheme = profile.scheme
+    timeout = profile.timeout
+    url = f'{scheme}://{hostname}{resource_path}'
+    auth_info: AuthInfo = profile.auth
+    headers = {'Authorization': f'{auth_info.token_type} {auth_info.token}',
+               'Accept': 'application/json'}
+    params = dict(kwargs, page_size=page_size) if page_size else kwargs
+    first_page = True
+    while url:
+        page = rest_ops.list(url,
+                             headers=headers,
+                             timeout=timeout,
+                             params=params,
+                             memo=first_page)
+        first_page = False
+        if not isinstance(page, dict) or 'results' not in page:
+            yield from page
+            return
+        yield from page['results']
+        # The next link already carries the query parameters
+        params = None
+        if url := page.get('next'):
+            url = url.replace('https://', f'{scheme}://')
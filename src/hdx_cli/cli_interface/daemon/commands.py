@@ -0,0 +1,76 @@
+import time
+
+import click
+
+from ...library_api.common.config_constants import DAEMON_SOCKET_FILE, DAEMON_LOG_FILE
+from ...library_api.common.daemon import serve, DEFAULT_IDLE_TIMEOUT
+from ...library_api.common.daemon_client import send_control, spawn_daemon, NO_DAEMON_ENV
+from ...library_api.common.exceptions import HdxCliException
+from ...library_api.common.logging import get_logger
+from ...library_api.utility.decorators import report_error_and_exit
+
+logger = get_logger()
+
+START_TIMEOUT = 15
+
+
+@click.group(help='Keep a warm hdxcli process that runs the commands of this config '
+                  f'directory, so short commands start in milliseconds. Set {NO_DAEMON_ENV}=1 '
+                  'to run a command without it.')
+@click.pass_context
+def daemon(ctx: click.Context):
+    pass
+
+
+@click.command(help='Start the daemon in the background.')
+@click.option('--idle-timeout', type=click.IntRange(min=1), default=DEFAULT_IDLE_TIMEOUT,
+              help=f'Exit after this many seconds without commands '
+                   f'(default: {DEFAULT_IDLE_TIMEOUT}).')
+@click.option('--foreground', is_flag=True, default=False,
+              help='Run the daemon in this process instead.')
+@click.pass_context
+@report_error_and_exit(exctype=Exception)
+def start(ctx: click.Context, idle_timeout, foreground):
+    if answer := send_control('status'):
+        logger.info(f"The hdxcli daemon is already running (pid {answer['status']['pid']})")
+        return
+    if foreground:
+        serve(ctx.find_root().command, DAEMON_SOCKET_FILE, idle_timeout=idle_timeout)
+        return
+
+    spawn_daemon(idle_timeout)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if answer := send_control('status'):
+            logger.info(f"Started the hdxcli daemon (pid {answer['status']['pid']})")
+            return
+        time.sleep(0.05)
+    raise HdxCliException(f'The hdxcli daemon did not start, see {DAEMON_LOG_FILE}.')
+
+
+@click.command(help='Stop the daemon.')
+@click.pass_context
+@report_error_and_exit(exctype=Exception)
+def stop(ctx: click.Context):
+    if not send_control('stop'):
+        logger.info('The hdxcli daemon is not running')
+        return
+    logger.info('Stopped the hdxcli daemon')
+
+
+@click.command(help='Show whether the daemon is running.')
+@click.pass_context
+@report_error_and_exit(exctype=Exception)
+def status(ctx: click.Context):
+    if not (answer := send_control('status')):
+        logger.info('The hdxcli daemon is not running')
+        return
+    daemon_status = answer['status']
+    logger.info(f"The hdxcli daemon is running (pid {daemon_status['pid']}, "
+                f"up {daemon_status['uptime']:.0f}s, "
+                f"{daemon_status['commands_run']} commands run)")
+
+
+daemon.add_command(start)
+daemon.add_command(stop)
+daemon.add_command(status)
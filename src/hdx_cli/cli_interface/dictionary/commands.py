@@ -3,7 +3,7 @@ import json
 import click
 
 from ..common.migration import migrate_a_dictionary
-from ...library_api.common.generic_resource import access_resource
+from ...library_api.common.generic_resource import resolve_path
 from ...library_api.utility.decorators import report_error_and_exit, ensure_logged_in
 from ...library_api.common.exceptions import (ResourceNotFoundException,
                                               MissingSettingsException,
@@ -45,13 +45,8 @@ def dictionary(ctx: click.Context,
         raise ResourceNotFoundException(
             f"No project parameter provided and "
             f"no project set in profile '{user_profile.profilename}'")
-    project_body = access_resource(user_profile, [('projects', project_name)])
-    if not project_body:
-        raise ResourceNotFoundException(f"Project '{project_name}' not found.")
-
-    project_id = project_body.get('uuid')
-    org_id = user_profile.org_id
-    resource_path = f'/config/v1/orgs/{org_id}/projects/{project_id}/dictionaries/'
+    resource_path = resolve_path(user_profile, [('projects', project_name),
+                                                ('dictionaries', None)]).path
     ctx.obj = {'resource_path': resource_path,
                'usercontext': user_profile}
 
@@ -3,12 +3,12 @@ import json
 import click
 
 from ..common.migration import migrate_a_function
-from ...library_api.common.generic_resource import access_resource
+from ...library_api.common.generic_resource import resolve_path
 from ...library_api.userdata.token import AuthInfo
 from ...library_api.common import rest_operations as rest_ops
 from ...library_api.common.context import ProfileUserContext
 from ...library_api.utility.decorators import report_error_and_exit, ensure_logged_in
-from ...library_api.common.exceptions import LogicException, ResourceNotFoundException
+from ...library_api.common.exceptions import LogicException
 from ...library_api.common.logging import get_logger
 from ..common.rest_operations import (delete as command_delete,
                                       list_ as command_list,
@@ -42,13 +42,9 @@ def function(ctx: click.Context,
         raise LogicException(f"No project parameter provided and "
                              f"no project set in profile '{user_profile.profilename}'")
 
-    project_body = access_resource(user_profile, [('projects', project_name)])
-    if not project_body:
-        raise ResourceNotFoundException(f"Project '{project_name}' not found.")
-
-    project_id = project_body.get('uuid')
-    org_id = user_profile.org_id
-    ctx.obj = {'resource_path': f'/config/v1/orgs/{org_id}/projects/{project_id}/functions/',
+    resource_path = resolve_path(user_profile, [('projects', project_name),
+                                                ('functions', None)]).path
+    ctx.obj = {'resource_path': resource_path,
                'usercontext': user_profile}
 
 
@@ -5,6 +5,7 @@ from ...library_api.common import rest_operations as rest_ops
 from ...library_api.common.context import ProfileUserContext, ProfileLoadContext
 from ...library_api.common.logging import get_logger
 from ...library_api.utility.decorators import report_error_and_exit, ensure_logged_in
+from ...library_api.utility.json_util import json_dumps
 from ..common.undecorated_click_commands import basic_create_with_body_from_string
 
 from ..common.undecorated_click_commands import basic_transform
@@ -90,7 +91,7 @@ def _basic_show(ctx: click.Context, transform_name: str, indent: bool = False):
             timeout = user_profile.timeout
             result = rest_ops.list(resource_url, headers={}, timeout=timeout)
             indentation = DEFAULT_INDENTATION if indent else None
-            return json.dumps(result, indent=indentation)
+            return json_dumps(result, indent=indentation)
     else:
         raise ValueError(f'No transform named {transform_name}.')
 
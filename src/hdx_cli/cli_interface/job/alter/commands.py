@@ -1,15 +1,16 @@
-import json
 from functools import partial
+from itertools import chain
 
 import click
 
-from ...common.undecorated_click_commands import DEFAULT_INDENTATION, get_resource_list
+from ...common.undecorated_click_commands import DEFAULT_INDENTATION, iter_resources
 from ....library_api.common.context import ProfileUserContext
 from ....library_api.common.exceptions import ResourceNotFoundException, LogicException
 from ....library_api.common.logging import get_logger
 from ....library_api.common import rest_operations as rest_ops
 from ....library_api.userdata.token import AuthInfo
 from ....library_api.utility.decorators import report_error_and_exit, dynamic_confirmation_prompt
+from ....library_api.utility.json_util import json_dumps
 from ....library_api.utility.functions import heuristically_get_resource_kind
 
 logger = get_logger()
@@ -97,7 +98,7 @@ def show(ctx: click.Context, job_name: str, indent: bool,):
     resource_path = ctx.parent.obj.get('resource_path')
     job = _get_alter_job(profile, resource_path, job_name)
     indentation = DEFAULT_INDENTATION if indent else None
-    logger.info(json.dumps(job, indent=indentation))
+    logger.info(json_dumps(job, indent=indentation))
 
 
 _confirmation_prompt = partial(
@@ -213,7 +214,7 @@ def verify_alter(profile: ProfileUserContext,
     results = rest_ops.get(url, headers=headers, timeout=timeout).get('results')
     if results:
         indentation = DEFAULT_INDENTATION if indentation else None
-        return json.dumps(results[0], indent=indentation)
+        return json_dumps(results[0], indent=indentation)
 
 
 def _create_alter_job(profile: ProfileUserContext, resource_path: str, alter_job) -> None:
@@ -233,7 +234,7 @@ def _get_alter_job(profile: ProfileUserContext, resource_path: str, job_name: st
         if not (job_name := getattr(profile, resource_kind + 'name')):
             raise LogicException(f'No default {resource_kind} found in profile.')
 
-    alter_jobs = get_resource_list(profile, resource_path).get('results')
+    alter_jobs = iter_resources(profile, resource_path)
     for job in alter_jobs:
         if job.get('name') == job_name:
             return job
@@ -247,7 +248,7 @@ def list_alter_jobs(profile: ProfileUserContext,
                     project_to_filter: str,
                     table_to_filter: str
                     ) -> None:
-    default_alter_job_list = get_resource_list(profile, resource_path).get('results')
+    default_alter_job_list = iter_resources(profile, resource_path)
 
     if status_to_filter is not None:
         default_alter_job_list = filter(
@@ -259,15 +260,13 @@ def list_alter_jobs(profile: ProfileUserContext,
         default_alter_job_list = filter(
             lambda x: x.get('settings', {}).get('table_name') == table_to_filter, default_alter_job_list)
 
-    filtered_and_reduced_data = list(
-        map(lambda x: (x.get('name'),
-                       f'{x.get("settings", {}).get("project_name")}.'
-                       f'{x.get("settings", {}).get("table_name")}',
-                       x.get('status')),
-            default_alter_job_list)
-    )
-
-    if not filtered_and_reduced_data:
+    # Rows are printed as pages arrive, the header only once there is one
+    filtered_and_reduced_data = map(lambda x: (x.get('name'),
+                                               f'{x.get("settings", {}).get("project_name")}.'
+                                               f'{x.get("settings", {}).get("table_name")}',
+                                               x.get('status')),
+                                    default_alter_job_list)
+    if (first_alter_job := next(filtered_and_reduced_data, None)) is None:
         return
 
     logger.info(f'{"-" * (20 + 40 + 15)}')
@@ -275,7 +274,7 @@ def list_alter_jobs(profile: ProfileUserContext,
                 f'{"table":40}'
                 f'{"status":15}')
     logger.info(f'{"-" * (20 + 40 + 15)}')
-    for alter_job in filtered_and_reduced_data:
+    for alter_job in chain((first_alter_job,), filtered_and_reduced_data):
         logger.info(f"{alter_job[0]:<20}"
                     f"{alter_job[1]:<40}"
                     f"{alter_job[2]:<15}")
@@ -1,11 +1,14 @@
+import contextlib
 import csv
+import heapq
 import io
 import json
 import os
 import tempfile
-import time
 from datetime import datetime
-from functools import reduce
+from itertools import islice
+from operator import attrgetter
+from typing import Callable, Iterable, Iterator, Optional
 
 from hdx_cli.library_api.common import rest_operations as rest_ops
 from hdx_cli.library_api.common.logging import get_logger
@@ -20,6 +23,9 @@ from hdx_cli.library_api.common.exceptions import (
 logger = get_logger()
 
 TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Partitions sorted in memory at a time for the upload, larger catalogs are
+# sorted in runs spilled to temporary files
+SORT_RUN_SIZE = 50_000
 
 
 def _get_metadata(metadata):
@@ -31,23 +37,32 @@ def _set_metadata(metadata):
 
 
 class Partition:
+    __slots__ = ('created', 'modified', 'min_timestamp', 'max_timestamp', 'manifest_size',
+                 'data_size', 'index_size', 'root_path', 'data_path', 'active', 'rows',
+                 'mem_size', '_raw_metadata', '_metadata', 'shard_key', 'lock', 'storage_id',
+                 '_metadata_storage_id')
+
     def __init__(self, values):
-        self.created = values[0]
-        self.modified = values[1]
-        self.min_timestamp = values[2]
-        self.max_timestamp = values[3]
-        self.manifest_size = values[4]
-        self.data_size = values[5]
-        self.index_size = values[6]
-        self.root_path = values[7]
-        self.data_path = values[8]
-        self.active = values[9]
-        self.rows = values[10]
-        self.mem_size = values[11]
-        self.metadata = _set_metadata(values[12])
-        self.shard_key = values[13]
-        self.lock = values[14]
-        self.storage_id = values[15]
+        (self.created, self.modified, self.min_timestamp, self.max_timestamp,
+         self.manifest_size, self.data_size, self.index_size, self.root_path, self.data_path,
+         self.active, self.rows, self.mem_size, self._raw_metadata, self.shard_key, self.lock,
+         self.storage_id) = values
+        self._metadata = None
+        # Storage set with set_storage_id, not yet written to the metadata
+        self._metadata_storage_id = None
+
+    @property
+    def metadata(self) -> dict:
+        # Parsed on first use, most partitions are only counted or filtered
+        if self._metadata is None:
+            self._metadata = _set_metadata(self._raw_metadata)
+            if self._metadata_storage_id is not None:
+                self._metadata['storage_id'] = self._metadata_storage_id
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, metadata: dict) -> None:
+        self._metadata = metadata
 
     def get_partition_path(self):
         return "/".join([str(self.root_path).strip(), str(self.data_path).strip()])
@@ -58,6 +73,24 @@ class Partition:
                 self.data_path, self.active, self.rows, self.mem_size,
                 _get_metadata(self.metadata), self.shard_key, self.lock, self.storage_id]
 
+    def set_storage_id(self, storage_id: str) -> None:
+        self.storage_id = storage_id
+        if self._metadata is None:
+            self._metadata_storage_id = storage_id
+        else:
+            self._metadata['storage_id'] = storage_id
+
+    def to_raw_list(self):
+        """Values as read from the catalog: metadata is only serialized
+        again if it was parsed"""
+        return [self.created, self.modified, self.min_timestamp, self.max_timestamp,
+                self.manifest_size, self.data_size, self.index_size, self.root_path,
+                self.data_path, self.active, self.rows, self.mem_size,
+                (self._raw_metadata
+                 if self._metadata is None and self._metadata_storage_id is None
+                 else _get_metadata(self.metadata)),
+                self.shard_key, self.lock, self.storage_id]
+
     def get_manifest_size(self):
         return int(self.manifest_size)
 
@@ -71,7 +104,7 @@ class Partition:
         return self.get_manifest_size() + self.get_index_size() + self.get_data_size()
 
 
-def _get_bytes_from_catalog(partitions: list[Partition]) -> bytes:
+def _get_bytes_from_catalog(partitions: Iterable[Partition]) -> bytes:
     csv_buffer = io.StringIO()
     csv_writer = csv.writer(csv_buffer)
     for partition in partitions:
@@ -79,44 +112,93 @@ def _get_bytes_from_catalog(partitions: list[Partition]) -> bytes:
     return csv_buffer.getvalue().encode('utf-8')
 
 
-def _get_catalog_from_bytes(file: bytes) -> list[Partition]:
-    csv_catalog = io.StringIO(file.decode('utf-8'))
-    reader = csv.reader(csv_catalog, delimiter=',')
-    # Jump csv header
-    reader.__next__()
-    return [Partition(row) for row in reader]
+def iter_catalog_file(file_path: str) -> Iterator[Partition]:
+    """Partitions of the catalog in file_path, read one row at a time"""
+    with open(file_path, newline='', encoding='utf-8') as catalog_file:
+        reader = csv.reader(catalog_file, delimiter=',')
+        # Jump csv header
+        next(reader, None)
+        for row in reader:
+            yield Partition(row)
 
 
-def save_catalog_to_temporal_file(catalog: bytes, project_id: str, table_id: str) -> None:
-    try:
-        temp_path = tempfile.gettempdir()
-        file_path = f'{temp_path}/{project_id}_{table_id}_catalog'
-        with open(file_path, 'wb') as file:
-            file.write(catalog)
-    except Exception as exc:
-        logger.debug(f"An error occurred while saving the catalog to a temporal file: {exc}")
-        pass
+def _get_temporal_catalog_path(project_id: str, table_id: str) -> str:
+    temp_path = tempfile.gettempdir()
+    return f'{temp_path}/{project_id}_{table_id}_catalog'
 
 
-def get_catalog_from_temporal_file(project_id: str, table_id: str) -> list[Partition]:
-    temp_path = tempfile.gettempdir()
-    file_path = f'{temp_path}/{project_id}_{table_id}_catalog'
-    if not os.path.exists(file_path):
-        return []
+def download_catalog_to_temporal_file(download_catalog_url: str,
+                                      headers: dict,
+                                      project_id: str,
+                                      table_id: str) -> str:
+    """Stream the catalog to its temporal file, which is only replaced once the
+    download is complete. Returns the path of the file."""
+    file_path = _get_temporal_catalog_path(project_id, table_id)
+    file_descriptor, partial_path = tempfile.mkstemp(dir=os.path.dirname(file_path))
+    try:
+        with os.fdopen(file_descriptor, 'wb') as file:
+            rest_ops.download(download_catalog_url, headers=headers, timeout=180, file_obj=file)
+        os.replace(partial_path, file_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+    return file_path
+
 
-    with open(file_path, 'rb') as file:
-        return _get_catalog_from_bytes(file.read())
+def get_temporal_catalog_path(project_id: str, table_id: str) -> Optional[str]:
+    """Path of the previously downloaded catalog, or None if there is none
+    or it has no partitions"""
+    file_path = _get_temporal_catalog_path(project_id, table_id)
+    if not os.path.exists(file_path) or next(iter_catalog_file(file_path), None) is None:
+        return None
+    return file_path
 
 
 def chunked_iterable(iterable, chunk_size):
-    for i in range(0, len(iterable), chunk_size):
-        yield iterable[i:i + chunk_size]
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _sorted_partitions(partitions: Iterable[Partition],
+                       key: Callable[[Partition], str],
+                       run_size: int) -> Iterator[Partition]:
+    """partitions sorted by key (stable), holding at most run_size of them in
+    memory: larger inputs are sorted in runs written to temporary files and
+    merged. Partitions must not have been modified, runs keep the values read
+    from the catalog."""
+    iterator = iter(partitions)
+    run = sorted(islice(iterator, run_size), key=key)
+    if len(run) < run_size:
+        yield from run
+        return
+
+    with contextlib.ExitStack() as stack:
+        run_files = []
+        while run:
+            run_file = stack.enter_context(
+                tempfile.TemporaryFile('w+', newline='', encoding='utf-8'))
+            csv.writer(run_file).writerows(partition.to_raw_list() for partition in run)
+            run_file.seek(0)
+            run_files.append(run_file)
+            run = sorted(islice(iterator, run_size), key=key)
+        yield from heapq.merge(*((Partition(row) for row in csv.reader(run_file))
+                                 for run_file in run_files),
+                               key=key)
 
 
 class Catalog:
+    """Catalog of a table, kept in the file it was downloaded to. Partitions
+    are read from it on every pass; filters and updates are recorded and
+    applied to each partition as it is read, so the catalog is never held in
+    memory as a whole."""
+
     def __init__(self):
-        self.partitions: list[Partition] = []
-        self.total_size = 0
+        self.catalog_path: Optional[str] = None
+        # Rows, partitions and size of the filtered catalog, once a pass counted them
+        self._summary: Optional[tuple[int, int, int]] = None
+        self._filters: list[Callable[[Partition], bool]] = []
+        self._updates: list[Callable[[Partition], None]] = []
 
     def download(self,
                  profile: ProfileUserContext,
@@ -124,12 +206,13 @@ class Catalog:
                  table_id: str,
                  temp_catalog: bool = False
                  ) -> None:
-        self.partitions = (
-            get_catalog_from_temporal_file(project_id, table_id)
+        self._summary = None
+        self.catalog_path = (
+            get_temporal_catalog_path(project_id, table_id)
             if temp_catalog
-            else []
+            else None
         )
-        if self.partitions:
+        if self.catalog_path:
             return
 
         download_catalog_url = (
@@ -138,11 +221,30 @@ class Catalog:
         headers = {'Authorization': f"{profile.auth.token_type} {profile.auth.token}",
                    'Accept': 'application/json'}
         try:
-            catalog = rest_ops.get(download_catalog_url, headers=headers, fmt='csv', timeout=180)
-            self.partitions = _get_catalog_from_bytes(catalog)
-            save_catalog_to_temporal_file(catalog, project_id, table_id)
+            self.catalog_path = download_catalog_to_temporal_file(download_catalog_url, headers,
+                                                                  project_id, table_id)
         except HttpException as exc:
             raise HdxCliException(f"Some error occurred while downloading the catalog: {exc}")
+        except OSError as exc:
+            raise HdxCliException(f"Could not save the downloaded catalog: {exc}") from exc
+
+    def _iter_unmodified_partitions(self) -> Iterator[Partition]:
+        if not self.catalog_path:
+            return iter(())
+        partitions = iter_catalog_file(self.catalog_path)
+        for partition_filter in self._filters:
+            partitions = filter(partition_filter, partitions)
+        return partitions
+
+    def _apply_updates(self, partitions: Iterable[Partition]) -> Iterator[Partition]:
+        for partition in partitions:
+            for update in self._updates:
+                update(partition)
+            yield partition
+
+    def iter_partitions(self) -> Iterator[Partition]:
+        """Partitions that passed the filters, with the updates applied"""
+        return self._apply_updates(self._iter_unmodified_partitions())
 
     def upload(self, profile: ProfileUserContext, chunk_size: int=250) -> None:
         upload_catalog_url = (
@@ -151,107 +253,104 @@ class Catalog:
         headers = {'Authorization': f"{profile.auth.token_type} {profile.auth.token}",
                    'Accept': 'application/json'}
 
-        self.partitions = sorted(
-            self.partitions,
-            key=lambda item: datetime.strptime(item.max_timestamp, TIMESTAMP_FORMAT)
-        )
+        # Timestamps are zero-padded TIMESTAMP_FORMAT strings, their order is
+        # the order of the times. Updates keep timestamps, they are applied
+        # after sorting so runs keep the values read from the catalog.
+        partitions = self._apply_updates(
+            _sorted_partitions(self._iter_unmodified_partitions(),
+                               key=attrgetter('max_timestamp'),
+                               run_size=SORT_RUN_SIZE))
 
-        for chunk in chunked_iterable(self.partitions, chunk_size):
+        for chunk in chunked_iterable(partitions, chunk_size):
             catalog_file = _get_bytes_from_catalog(chunk)
-            retries = 3
-            for attempt in range(retries):
-                try:
-                    rest_ops.create_file(
-                        upload_catalog_url,
-                        headers=headers,
-                        file_stream=catalog_file,
-                        timeout=60,
-                        remote_filename=None
-                    )
-                    time.sleep(1)
-                    break
-                except HttpException as exc:
-                    message_error = str(exc.message)
-                    if 'existing entries in Catalog' in message_error:
-                        time.sleep(1)
-                        break
-                    else:
-                        if attempt < retries - 1:
-                            sleep_time = 2 ** attempt
-                            time.sleep(sleep_time)
-                        else:
-                            message_error = f'An error occurred while uploading the catalog: {exc}.'
-                            raise HdxCliException(message_error) from exc
+            # Uploading a chunk again is harmless, its entries are reported as existing
+            try:
+                rest_ops.create_file(
+                    upload_catalog_url,
+                    headers=headers,
+                    file_stream=catalog_file,
+                    timeout=60,
+                    remote_filename=None,
+                    idempotent=True
+                )
+            except HttpException as exc:
+                if 'existing entries in Catalog' not in str(exc.message):
+                    message_error = f'An error occurred while uploading the catalog: {exc}.'
+                    raise HdxCliException(message_error) from exc
 
     def update(self, project_uuid: str, table_uuid: str, target_storage_uuid: str) -> None:
-        for partition in self.partitions:
+        def update_partition(partition: Partition) -> None:
             partition.root_path = f'{project_uuid}/{table_uuid}'
-            partition.metadata['storage_id'] = target_storage_uuid
-            partition.storage_id = target_storage_uuid
+            partition.set_storage_id(target_storage_uuid)
             # This mitigates problems when there was some deleted alter job, without cancellation.
             partition.lock = None
+        self._updates.append(update_partition)
 
     def update_with_shared_storages(self, equivalent_storages: dict[str, str]) -> None:
-        for partition in self.partitions:
-            new_storage_uuid = equivalent_storages.get(partition.storage_id)
-
-            if not new_storage_uuid and not partition.storage_id:
-                new_storage_uuid = equivalent_storages.get('default')
-
-            if not new_storage_uuid:
+        def new_storage_uuid(storage_id: str) -> Optional[str]:
+            new_uuid = equivalent_storages.get(storage_id)
+            if not new_uuid and not storage_id:
+                new_uuid = equivalent_storages.get('default')
+            return new_uuid
+
+        # Checked now, for all the partitions, as when they are updated
+        for storage_id in {partition.storage_id for partition in self.iter_partitions()}:
+            if not new_storage_uuid(storage_id):
                 raise ResourceNotFoundException(
-                    f"The storage with uuid '{partition.storage_id}' was not found "
+                    f"The storage with uuid '{storage_id}' was not found "
                     "in the destination cluster."
                 )
-            partition.storage_id = new_storage_uuid
-            partition.metadata['storage_id'] = new_storage_uuid
+
+        def update_partition(partition: Partition) -> None:
+            partition.set_storage_id(new_storage_uuid(partition.storage_id))
             # This mitigates problems when there was some deleted alter job, without cancellation.
             partition.lock = None
+        self._updates.append(update_partition)
 
     def filter_by_timestamp(self, from_date: datetime, to_date: datetime) -> None:
         if not (from_date or to_date):
             return
 
-        self.partitions = list(filter(
-            lambda item: (not from_date or datetime.strptime(item.min_timestamp,
-                                                                 TIMESTAMP_FORMAT) >= from_date) and
-                         (not to_date or datetime.strptime(item.max_timestamp,
-                                                                 TIMESTAMP_FORMAT) <= to_date),
-            self.partitions
-        ))
-        if not self.partitions:
+        # Compared as TIMESTAMP_FORMAT strings, in the same order as the times
+        from_timestamp = from_date.strftime(TIMESTAMP_FORMAT) if from_date else None
+        to_timestamp = to_date.strftime(TIMESTAMP_FORMAT) if to_date else None
+        self._filters.append(
+            lambda item: (not from_timestamp or item.min_timestamp >= from_timestamp) and
+                         (not to_timestamp or item.max_timestamp <= to_timestamp))
+        self._summary = None
+        if next(self._iter_unmodified_partitions(), None) is None:
             raise CatalogException("No partitions found matching the given date range.")
 
     def get_summary_information(self) -> tuple[int, int, int]:
-        row_count = reduce(lambda count, item: count + int(item.rows), self.partitions, 0)
-        return row_count, len(self.partitions), self.get_total_size()
+        if self._summary is None:
+            row_count, partition_count, total_size = 0, 0, 0
+            for partition in self._iter_unmodified_partitions():
+                row_count += int(partition.rows)
+                partition_count += 1
+                total_size += partition.get_partition_size()
+            self._summary = row_count, partition_count, total_size
+        return self._summary
 
     def get_total_size(self) -> int:
-        if not self.total_size:
-            self.total_size = reduce(
-                lambda count, item: count + item.get_partition_size(),
-                self.partitions,
-                0
-            )
-        return self.total_size
-
-    def get_partitions_by_storage(self) -> dict[str, list[tuple[str, int]]]:
-        partitions_by_storage = {}
-        for partition in self.partitions:
-            split_path = partition.get_partition_path().split('/')
-            # Add 'db/hdx' to the partition path
-            split_path.insert(0, 'db/hdx')
-            partition_path = '/'.join(split_path)
-            partition_size = (
-                    partition.get_manifest_size() +
-                    partition.get_index_size() +
-                    partition.get_data_size()
-            )
-            partition_files_path = [(partition_path, partition_size)]
-
-            storage_id = partition.storage_id
-            if partitions_by_storage.get(storage_id):
-                partitions_by_storage[storage_id].extend(partition_files_path)
-            else:
-                partitions_by_storage[storage_id] = partition_files_path
-        return partitions_by_storage
+        return self.get_summary_information()[2]
+
+    def get_storage_ids(self) -> set[str]:
+        """Storages of the partitions that passed the filters"""
+        storage_ids = set()
+        # Counted on the way, the summary is usually needed next
+        row_count, partition_count, total_size = 0, 0, 0
+        for partition in self.iter_partitions():
+            storage_ids.add(partition.storage_id)
+            row_count += int(partition.rows)
+            partition_count += 1
+            total_size += partition.get_partition_size()
+        self._summary = row_count, partition_count, total_size
+        return storage_ids
+
+    def iter_partition_files(self) -> Iterator[tuple[str, str, int]]:
+        """Storage id, path under 'db/hdx' and size of each partition that
+        passed the filters, read from the catalog file as they are consumed"""
+        for partition in self.iter_partitions():
+            yield (partition.storage_id,
+                   f'db/hdx/{partition.get_partition_path()}',
+                   partition.get_partition_size())
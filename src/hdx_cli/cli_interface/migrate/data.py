@@ -1,7 +1,8 @@
 import sys
 import threading
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from queue import Queue
+from typing import Callable, Iterable, Iterator
 
 from .helpers import (
     print_summary,
@@ -17,6 +18,7 @@ from hdx_cli.library_api.common.context import ProfileUserContext
 from hdx_cli.library_api.common.logging import get_logger
 from hdx_cli.library_api.common.storage import get_storage_default_by_table
 from hdx_cli.library_api.common.rest_operations import post_with_retries
+from hdx_cli.library_api.common.sessions import set_pool_size
 from hdx_cli.library_api.common.exceptions import MigrationFailureException
 
 logger = get_logger()
@@ -33,7 +35,23 @@ def show_and_confirm_data_migration(catalog: Catalog) -> bool:
     return confirm_action()
 
 
-def migrate_partitions_threaded(migration_list: list,
+def _map_bounded(executor: ThreadPoolExecutor,
+                 function: Callable,
+                 items: Iterable,
+                 max_pending: int
+                 ) -> None:
+    """Like executor.map, but items are taken as workers free up, so no more
+    than max_pending of them are held at a time"""
+    pending = set()
+    for item in items:
+        if len(pending) >= max_pending:
+            _, pending = wait(pending, return_when=FIRST_COMPLETED)
+        pending.add(executor.submit(function, item))
+    wait(pending)
+
+
+def migrate_partitions_threaded(migration_items: Iterable,
+                                total_items: int,
                                 migrated_sizes_queue: Queue,
                                 exceptions: Queue,
                                 rc_config: RcloneAPIConfig,
@@ -43,8 +61,10 @@ def migrate_partitions_threaded(migration_list: list,
     base_url = rc_config.get_url()
     url = f"{base_url}/sync/copy"
 
+    # One pooled connection per worker, so rclone calls keep their connections alive
+    set_pool_size(concurrency)
+
     failed_items = Queue()
-    total_items = len(migration_list)
     max_failures = int(total_items * 0.10)
 
     migration_done = threading.Event()
@@ -87,7 +107,7 @@ def migrate_partitions_threaded(migration_list: list,
             migrated_sizes_queue.put(from_to_path[2])
 
     with ThreadPoolExecutor(max_workers=concurrency) as executor:
-        executor.map(sync_partition, migration_list)
+        _map_bounded(executor, sync_partition, migration_items, max_pending=2 * concurrency)
 
     failed_count = failed_items.qsize()
     if failed_count == 0 or not exceptions.empty():
@@ -108,14 +128,14 @@ def migrate_partitions_threaded(migration_list: list,
         executor.map(sync_partition_retry, retry_failed_items)
 
 
-def get_migration_list(src_remote: RCloneRemote,
-                       trg_remote: RCloneRemote,
-                       partition_paths: list,
-                       target_project_id: str,
-                       target_table_id: str
-                       ):
-    migration_list = []
-    for source_partition_path, partition_size in partition_paths:
+def iter_migration_items(source_remotes: dict[str, RCloneRemote],
+                         trg_remote: RCloneRemote,
+                         catalog: Catalog,
+                         target_project_id: str,
+                         target_table_id: str
+                         ) -> Iterator[tuple[str, str, int]]:
+    for storage_id, source_partition_path, partition_size in catalog.iter_partition_files():
+        src_remote = source_remotes[storage_id]
         path_from = (
             f"{src_remote.name}:"
             f"{src_remote.bucket_name}{src_remote.bucket_path}"
@@ -133,8 +153,7 @@ def get_migration_list(src_remote: RCloneRemote,
             f"{target_partition_path}"
         )
 
-        migration_list.append((path_from, path_to, partition_size))
-    return migration_list
+        yield path_from, path_to, partition_size
 
 
 def migrate_data(target_profile: ProfileUserContext,
@@ -156,56 +175,61 @@ def migrate_data(target_profile: ProfileUserContext,
         target_profile,
         target_data.storages
     )
-    partitions_by_storage = catalog.get_partitions_by_storage()
-    partitions_size = catalog.get_total_size()
+    # Partitions are read from the catalog file as they are migrated, only
+    # their storages are gathered up front
+    source_storage_ids = catalog.get_storage_ids()
+    _, total_partitions, partitions_size = catalog.get_summary_information()
 
-    migration_list = []
     migrated_sizes_queue = Queue()
     exceptions = Queue()
     remotes = {}
+    source_remotes = {}
 
-    for source_storage_id, partitions_to_migrate in partitions_by_storage.items():
-        try:
-            source_remote = get_remote(
+    try:
+        for source_storage_id in source_storage_ids:
+            source_remotes[source_storage_id] = get_remote(
                 remotes,
                 source_storages,
                 source_storage_id,
                 rc_config,
                 "source"
             )
-            target_remote = get_remote(
-                remotes,
-                target_data.storages,
-                target_storage_id,
-                rc_config,
-                "target"
-            )
-        except Exception as exc:
-            exceptions.put(exc)
-            close_remotes(remotes)
-            raise
-
-        migration_list.extend(
-            get_migration_list(
-                source_remote,
-                target_remote,
-                partitions_to_migrate,
-                target_data.get_project_id(),
-                target_data.get_table_id()
-            )
+        target_remote = get_remote(
+            remotes,
+            target_data.storages,
+            target_storage_id,
+            rc_config,
+            "target"
         )
+    except Exception as exc:
+        exceptions.put(exc)
+        close_remotes(remotes)
+        raise
+
+    migration_items = iter_migration_items(
+        source_remotes,
+        target_remote,
+        catalog,
+        target_data.get_project_id(),
+        target_data.get_table_id()
+    )
 
     if not show_and_confirm_data_migration(catalog):
         logger.info(f'{" Migration Process Finished ":=^50}')
         logger.info('')
         sys.exit(0)
 
-    threading.Thread(
+    migration_thread = threading.Thread(
         target=migrate_partitions_threaded,
-        args=(migration_list, migrated_sizes_queue, exceptions, rc_config, concurrency, remotes)
-    ).start()
+        args=(migration_items, total_partitions, migrated_sizes_queue, exceptions, rc_config,
+              concurrency, remotes)
+    )
+    migration_thread.start()
 
     monitor_progress(partitions_size, migrated_sizes_queue, exceptions)
+    # The byte total can be reached before every partition is read from the
+    # catalog (empty partitions), which must not change under the thread
+    migration_thread.join()
 
     close_remotes(remotes)
     if exceptions.qsize() != 0:
@@ -1,6 +1,6 @@
 import copy
-import io
 import json
+import tempfile
 from urllib.parse import urlparse
 
 from hdx_cli.cli_interface.migrate.helpers import MigrationData
@@ -180,15 +180,19 @@ def _create_dictionaries(target_profile: ProfileUserContext,
         headers = {"Authorization": f"{source_profile.auth.token_type} {source_profile.auth.token}",
                    "Accept": "*/*"}
         timeout = source_profile.timeout
-        contents = lro.get(query_endpoint, headers=headers, timeout=timeout, fmt="verbatim")
         try:
             if d_file not in dictionary_files_so_far:
-                _create_dictionary_file(
-                    target_profile.projectname,
-                    d_file,
-                    contents,
-                    target_profile
-                )
+                # The export goes through a temporary file, not memory
+                with tempfile.TemporaryFile() as contents:
+                    lro.download(query_endpoint, headers=headers, timeout=timeout,
+                                 file_obj=contents)
+                    contents.seek(0)
+                    _create_dictionary_file(
+                        target_profile.projectname,
+                        d_file,
+                        contents,
+                        target_profile
+                    )
                 dictionary_files_so_far.add(d_file)
         except HttpException as exc:
             if exc.error_code != 400 or "already exists" not in str(exc.message):
@@ -229,7 +233,7 @@ def _create_dictionary_file(project_name: str,
     lro.create_file(
         file_url,
         headers=headers,
-        file_stream=io.BytesIO(contents),
+        file_stream=contents,
         remote_filename=dict_file,
         timeout=timeout
     )
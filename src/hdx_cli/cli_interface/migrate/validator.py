@@ -6,7 +6,7 @@ from .resources import (
     interactive_set_default_storage
 )
 from .catalog_operations import Catalog
-from hdx_cli.cli_interface.common.undecorated_click_commands import get_resource_list
+from hdx_cli.cli_interface.common.undecorated_click_commands import iter_resources
 from hdx_cli.library_api.common.context import ProfileUserContext
 from hdx_cli.library_api.common.storage import get_equivalent_storages
 from hdx_cli.library_api.common.logging import get_logger
@@ -51,12 +51,13 @@ def table_constraints(profile: ProfileUserContext,
 
     logger.info(f"{'  Looking for running alter jobs':<42} -> [!n]")
     alter_path = f'/config/v1/orgs/{profile.org_id}/jobs/alter/'
-    alter_jobs = get_resource_list(profile, alter_path).get('results')
-    is_alter_job_running = list(filter(
-        lambda x: x.get('status') == 'running' and
-                  x.get('settings', {}).get('project_name') == profile.projectname and
-                  x.get('settings', {}).get('table_name') == profile.tablename,
-        alter_jobs))
+    alter_jobs = iter_resources(profile, alter_path)
+    # Stops at the first running job, without fetching the remaining pages
+    is_alter_job_running = any(
+        x.get('status') == 'running' and
+        x.get('settings', {}).get('project_name') == profile.projectname and
+        x.get('settings', {}).get('table_name') == profile.tablename
+        for x in alter_jobs)
     if is_alter_job_running:
         raise HdxCliException(
             f"There is an alter job running on the '{profile.tablename}' table. "
@@ -0,0 +1,85 @@
+import shlex
+import sys
+import time
+from typing import Iterable, List, Tuple
+
+import click
+
+from ...library_api.common.command_runner import (run_in_process, global_option_args,
+                                                   subcommand_name)
+from ...library_api.common.exceptions import CommandLineException
+from ...library_api.common.logging import get_logger
+from ...library_api.utility.decorators import report_error_and_exit
+
+logger = get_logger()
+
+
+def _format_row(line_number, exit_code, elapsed_ms, command):
+    return f'{line_number:<8}{exit_code:<6}{elapsed_ms:<10}{command}'
+
+
+def parse_script(lines: Iterable[str], cli: click.Group) -> List[Tuple[int, List[str]]]:
+    """(line number, argv) of each command of a script for the root group
+    cli. Blank lines and '#' comments are skipped, a trailing backslash
+    continues a command on the next line and a leading 'hdxcli' is
+    optional."""
+    commands = []
+    pending, first_line = '', None
+    for line_number, line in enumerate(lines, start=1):
+        line = line.rstrip('\r\n')
+        first_line = first_line or line_number
+        if line.endswith('\\'):
+            pending += line[:-1] + ' '
+            continue
+        try:
+            argv = shlex.split(pending + line, comments=True)
+        except ValueError as exc:
+            raise CommandLineException(f'Line {first_line}: {exc}') from exc
+        if argv and argv[0] == 'hdxcli':
+            argv = argv[1:]
+        if argv and subcommand_name(cli, argv) == 'run-script':
+            raise CommandLineException(f'Line {first_line}: scripts cannot run other scripts.')
+        if argv:
+            commands.append((first_line, argv))
+        pending, first_line = '', None
+    if pending:
+        raise CommandLineException(f'Line {first_line}: the script ends in the middle of a '
+                                   'command continued with a backslash.')
+    return commands
+
+
+@click.command(name='run-script',
+               help='Run the hdxcli commands in FILE, one per line, in this process. Use - '
+                    'to read them from stdin. Global options given before run-script apply '
+                    'to every command.')
+@click.argument('script_file', metavar='FILE', type=click.File('r', encoding='utf-8'))
+@click.option('--continue-on-error', is_flag=True, default=False,
+              help='Run the remaining commands after one fails.')
+@click.pass_context
+@report_error_and_exit(exctype=Exception)
+def run_script(ctx: click.Context, script_file, continue_on_error):
+    cli = ctx.find_root().command
+    commands = parse_script(script_file, cli)
+    global_args = global_option_args(ctx)
+    results = []
+    started_at = time.perf_counter()
+    for line_number, argv in commands:
+        command_started_at = time.perf_counter()
+        exit_code = run_in_process(cli, [*global_args, *argv])
+        results.append((line_number, exit_code,
+                        (time.perf_counter() - command_started_at) * 1000, shlex.join(argv)))
+        if exit_code and not continue_on_error:
+            break
+    total_ms = (time.perf_counter() - started_at) * 1000
+
+    logger.info(f'{"-" * 80}')
+    logger.info(_format_row('line', 'exit', 'ms', 'command'))
+    logger.info(f'{"-" * 80}')
+    for line_number, exit_code, elapsed_ms, command in results:
+        logger.info(_format_row(line_number, exit_code, f'{elapsed_ms:.0f}', command))
+    logger.info(f'{"-" * 80}')
+    failed = [exit_code for _, exit_code, _, _ in results if exit_code]
+    logger.info(f'{len(results)} of {len(commands)} commands run, {len(failed)} failed, '
+                f'{total_ms:.0f} ms')
+    if failed:
+        sys.exit(failed[0])
@@ -4,6 +4,7 @@ import click
 import toml
 
 from ...library_api.common.auth import load_profile
+from ...library_api.common.config_files import forget_toml_file
 from ...library_api.common.generic_resource import access_resource_detailed
 from ...library_api.utility.decorators import report_error_and_exit, ensure_logged_in, with_profiles_context
 from ...library_api.common.exceptions import LogicException, ResourceNotFoundException
@@ -21,6 +22,7 @@ def _serialize_to_config_file(profile: ProfileUserContext,
         all_profiles[profile.profilename] = profile.as_dict_for_config()
     with open(config_file_path, 'w', encoding='utf-8') as stream:
         toml.dump(all_profiles, stream)
+    forget_toml_file(config_file_path)
 
 
 @click.command(help='Set project and/or table to apply subsequent commands on it', name='set')
@@ -0,0 +1,227 @@
+import shlex
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import click
+
+try:
+    import readline
+except ImportError:
+    # Not available on Windows: no completion nor history
+    readline = None
+
+from ...library_api.common import rest_operations as rest_ops
+from ...library_api.common.auth_utils import load_user_context, SESSION_DEFAULTS
+from ...library_api.common.command_runner import run_in_process, global_option_args
+from ...library_api.common.config_constants import SHELL_HISTORY_FILE
+from ...library_api.common.exceptions import HdxCliException
+from ...library_api.common.generic_resource import resolve_path
+from ...library_api.common.logging import get_logger
+from ...library_api.common.request_memo import RESPONSE_MEMO
+from ...library_api.utility.decorators import report_error_and_exit, ensure_logged_in
+
+logger = get_logger()
+
+# Listings kept in memory for commands and completion are dropped after this
+# many seconds, so changes made from elsewhere show up
+MEMO_TTL = 60
+HISTORY_LENGTH = 1000
+# Options whose value is the name of a resource of that kind
+NAME_OPTIONS = {'--project': 'project', '--table': 'table', '--transform': 'transform'}
+
+SHELL_HELP = """Type any hdxcli command without 'hdxcli', for instance 'project list'.
+Shell commands:
+  use PROJECT[.TABLE]   Set the project (and table) used by the next commands
+  use .TABLE            Set the table, in the current project
+  use -                 Go back to the project and table of the profile
+  use                   Show the current project and table
+  refresh               Forget the listings kept in memory
+  exit, quit            Leave the shell (or Ctrl-D)
+Tab completes commands, options and project, table and transform names."""
+
+
+class _Shell:
+    def __init__(self, ctx: click.Context):
+        self.cli = ctx.find_root().command
+        self.click_context = click.Context(self.cli)
+        self.global_args = global_option_args(ctx)
+        self.load_context = ctx.parent.obj['profilecontext']
+        self.user_options = ctx.parent.obj['useroptions']
+        self.user_context = ctx.parent.obj['usercontext']
+        self.memo_cleared_at = time.monotonic()
+        self._candidates: List[str] = []
+
+    @property
+    def prompt(self) -> str:
+        location = '.'.join(filter(None, (self.user_context.projectname,
+                                          self.user_context.tablename)))
+        return f"hdxcli {self.user_context.profilename}{f' [{location}]' if location else ''}> "
+
+    def _reload_user_context(self) -> None:
+        self.user_context = load_user_context(self.load_context, **self.user_options)
+
+    def _expire_memo(self) -> None:
+        if time.monotonic() - self.memo_cleared_at > MEMO_TTL:
+            RESPONSE_MEMO.clear()
+            self.memo_cleared_at = time.monotonic()
+
+    def use(self, args: List[str]) -> None:
+        profilename = self.user_context.profilename
+        if not args:
+            logger.info(f'project: {self.user_context.projectname or "-"}, '
+                        f'table: {self.user_context.tablename or "-"}')
+            return
+        if args == ['-']:
+            SESSION_DEFAULTS.pop(profilename, None)
+            self._reload_user_context()
+            return
+        project_name, _, table_name = args[0].partition('.')
+        project_name = project_name or self.user_context.projectname
+        if not project_name:
+            raise HdxCliException('No project given and no project in use.')
+        path_spec = [('projects', project_name)]
+        if table_name:
+            path_spec.append(('tables', table_name))
+        # Fails on unknown names, which are then not used
+        resolve_path(self.user_context, path_spec)
+        SESSION_DEFAULTS[profilename] = (project_name, table_name or None)
+        self.user_context.projectname = project_name
+        self.user_context.tablename = table_name or None
+
+    def _names(self, kind: str, project_name=None, table_name=None) -> List[str]:
+        if self.user_context.auth and self.user_context.auth.expires_at <= datetime.now():
+            self._reload_user_context()
+        path_spec = {'project': [('projects', None)],
+                     'table': [('projects', project_name), ('tables', None)],
+                     'transform': [('projects', project_name), ('tables', table_name),
+                                   ('transforms', None)]}[kind]
+        if any(name is None for _, name in path_spec[:-1]):
+            return []
+        token = self.user_context.auth
+        listing = rest_ops.list(resolve_path(self.user_context, path_spec).url,
+                                headers={'Authorization': f'{token.token_type} {token.token}',
+                                         'Accept': 'application/json'},
+                                timeout=self.user_context.timeout)
+        if isinstance(listing, dict):
+            listing = listing.get('results', [])
+        return sorted(item['name'] for item in listing if isinstance(item, dict) and 'name' in item)
+
+    def _option_value(self, words: List[str], option: str, default: Optional[str]):
+        for word, value in zip(words, words[1:]):
+            if word == option:
+                return value
+        return default
+
+    def _candidates_for(self, words: List[str], text: str) -> List[str]:
+        project_name = self._option_value(words, '--project', self.user_context.projectname)
+        table_name = self._option_value(words, '--table', self.user_context.tablename)
+        if words and words[0] == 'use':
+            if '.' in text:
+                project_prefix = text.partition('.')[0] or self.user_context.projectname
+                return [f"{text.partition('.')[0]}.{name}"
+                        for name in self._names('table', project_prefix)]
+            return self._names('project')
+        if words and words[-1] in NAME_OPTIONS:
+            return self._names(NAME_OPTIONS[words[-1]], project_name, table_name)
+
+        command, command_names = self.cli, []
+        for word in words:
+            if isinstance(command, click.Group) and (
+                    subcommand := command.get_command(self.click_context, word)):
+                command = subcommand
+                command_names.append(word)
+        if text.startswith('-'):
+            return [option for param in command.params for option in param.opts
+                    if option.startswith('--')]
+        if isinstance(command, click.Group):
+            names = command.list_commands(self.click_context)
+            return names + ['use', 'refresh', 'help', 'exit', 'quit'] if not words else names
+        if command_names and command_names[0] in NAME_OPTIONS.values():
+            return self._names(command_names[0], project_name, table_name)
+        return []
+
+    def complete(self, text: str, state: int) -> Optional[str]:
+        if state == 0:
+            try:
+                words = shlex.split(readline.get_line_buffer()[:readline.get_begidx()])
+                self._expire_memo()
+                self._candidates = [candidate for candidate in self._candidates_for(words, text)
+                                    if candidate.startswith(text)]
+            except Exception:  # pylint:disable=broad-except
+                # A failed lookup must not break the prompt
+                self._candidates = []
+        return self._candidates[state] if state < len(self._candidates) else None
+
+    def run_line(self, line: str) -> bool:
+        """Run one line, returns False when the shell must exit"""
+        argv = shlex.split(line, comments=True)
+        if argv and argv[0] == 'hdxcli':
+            argv = argv[1:]
+        if not argv:
+            return True
+        if argv[0] in ('exit', 'quit'):
+            return False
+        if argv[0] == 'use':
+            self.use(argv[1:])
+        elif argv[0] == 'refresh':
+            RESPONSE_MEMO.clear()
+            self.memo_cleared_at = time.monotonic()
+        elif argv[0] == 'help':
+            logger.info(SHELL_HELP)
+        elif argv[0] in ('shell', 'tui'):
+            raise HdxCliException(f"'{argv[0]}' cannot be run from the shell.")
+        else:
+            self._expire_memo()
+            run_in_process(self.cli, [*self.global_args, *argv])
+        return True
+
+    def loop(self) -> None:
+        while True:
+            try:
+                line = input(self.prompt)
+            except EOFError:
+                logger.info('')
+                return
+            except KeyboardInterrupt:
+                logger.info('')
+                continue
+            try:
+                if not self.run_line(line):
+                    return
+            except (HdxCliException, ValueError) as exc:
+                logger.error(f'Error: {exc}')
+
+
+def _setup_readline(shell: _Shell) -> None:
+    try:
+        readline.read_history_file(SHELL_HISTORY_FILE)
+    except OSError:
+        pass
+    readline.set_history_length(HISTORY_LENGTH)
+    readline.set_completer_delims(' \t\n')
+    readline.set_completer(shell.complete)
+    if 'libedit' in (readline.__doc__ or ''):
+        readline.parse_and_bind('bind ^I rl_complete')
+    else:
+        readline.parse_and_bind('tab: complete')
+
+
+@click.command(help='Interactive shell that keeps the login, connections and listings in '
+                    'memory between commands. Type help in it for its own commands.')
+@click.pass_context
+@report_error_and_exit(exctype=Exception)
+@ensure_logged_in
+def shell(ctx: click.Context):
+    the_shell = _Shell(ctx)
+    if readline:
+        _setup_readline(the_shell)
+    logger.info("hdxcli shell. Type 'help' for help, 'exit' or Ctrl-D to leave.")
+    try:
+        the_shell.loop()
+    finally:
+        if readline:
+            try:
+                readline.write_history_file(SHELL_HISTORY_FILE)
+            except OSError:
+                pass
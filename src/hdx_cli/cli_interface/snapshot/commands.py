@@ -0,0 +1,40 @@
+import click
+
+from ...library_api.common.async_rest_operations import DEFAULT_CONCURRENCY
+from ...library_api.common.logging import get_logger
+from ...library_api.common.snapshot import (build_snapshot,
+                                            save_snapshot,
+                                            default_snapshot_file)
+from ...library_api.utility.decorators import report_error_and_exit, ensure_logged_in
+
+logger = get_logger()
+
+
+@click.group(help='Local snapshots of the org configuration, used with --from-snapshot')
+@click.pass_context
+@report_error_and_exit(exctype=Exception)
+@ensure_logged_in
+def snapshot(ctx: click.Context):
+    user_profile = ctx.parent.obj['usercontext']
+    ctx.obj = {'usercontext': user_profile}
+
+
+@click.command(help='Fetch projects, tables, transforms, functions, dictionaries, storages, '
+                    'pools and sources of the org into a local snapshot file.')
+@click.option('--output', '-o', 'output_file', metavar='FILE', default=None,
+              type=click.Path(dir_okay=False, writable=True),
+              help='Snapshot file (default: snapshots/PROFILENAME.json.gz in the hdxcli '
+                   'config directory).')
+@click.option('--concurrency', type=click.IntRange(min=1), default=DEFAULT_CONCURRENCY,
+              help=f'Maximum number of requests in flight (default: {DEFAULT_CONCURRENCY}).')
+@click.pass_context
+@report_error_and_exit(exctype=Exception)
+def build(ctx: click.Context, output_file, concurrency):
+    user_profile = ctx.parent.obj['usercontext']
+    output_file = output_file or default_snapshot_file(user_profile.profilename)
+    the_snapshot = build_snapshot(user_profile, concurrency=concurrency)
+    save_snapshot(the_snapshot, output_file)
+    logger.info(f"Saved snapshot of {len(the_snapshot['responses'])} collections to {output_file}")
+
+
+snapshot.add_command(build)
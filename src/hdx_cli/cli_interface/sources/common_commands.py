@@ -1,8 +1,8 @@
 import click
 
 from ...library_api.utility.decorators import report_error_and_exit
-from ...library_api.common import rest_operations as rest_ops
-from ...library_api.common.exceptions import HdxCliException, LogicException
+from ...library_api.common.exceptions import HdxCliException
+from ...library_api.common.generic_resource import resolve_path
 from ...library_api.common.logging import get_logger
 
 from ..common.undecorated_click_commands import basic_create_with_body_from_string
@@ -17,31 +17,11 @@ def any_source_impl(ctx: click.Context, source_name: str):
         raise HdxCliException(f"No project/table parameters provided and "
                               f"no project/table set in profile '{user_profile.profilename}'")
 
-    hostname = user_profile.hostname
-    org_id = user_profile.org_id
-    scheme = user_profile.scheme
-    timeout = user_profile.timeout
-    list_projects_url = f'{scheme}://{hostname}/config/v1/orgs/{org_id}/projects/'
-    token = user_profile.auth
-    headers = {'Authorization': f'{token.token_type} {token.token}',
-               'Accept': 'application/json'}
-    projects_list = rest_ops.list(list_projects_url, headers=headers, timeout=timeout)
-
-    try:
-        project_id = [p['uuid'] for p in projects_list if p['name'] == project_name][0]
-
-        list_tables_url = f'{list_projects_url}{project_id}/tables/'
-        tables_list = rest_ops.list(list_tables_url,
-                                    headers=headers,
-                                    timeout=timeout)
-        table_id = [t['uuid'] for t in tables_list if t['name'] == table_name][0]
-
-        sources_path = f'/config/v1/orgs/{org_id}/projects/{project_id}/tables/{table_id}/sources/'
-    except IndexError as idx_err:
-        raise LogicException('Cannot find resource.') from idx_err
-    else:
-        ctx.obj = {'resource_path': f'{sources_path}{source_name}/',
-                   'usercontext': user_profile}
+    sources_path = resolve_path(user_profile, [('projects', project_name),
+                                               ('tables', table_name),
+                                               (f'sources/{source_name}', None)]).path
+    ctx.obj = {'resource_path': sources_path,
+               'usercontext': user_profile}
 
 
 @click.command(help="Create source. 'source_filename' contains the settings. "
@@ -1,12 +1,12 @@
 """Commands relative to tables handling operations"""
 import click
-import requests
 
 from ..common.migration import migrate_a_table
 from ...library_api.common import rest_operations as rest_ops
-from ...library_api.common.generic_resource import access_resource
+from ...library_api.common.generic_resource import resolve_path
 from ...library_api.utility.decorators import report_error_and_exit, ensure_logged_in
-from ...library_api.common.exceptions import LogicException, ResourceNotFoundException
+from ...library_api.common.exceptions import (LogicException,
+                                              HttpException)
 from ...library_api.common.context import ProfileUserContext
 from ...library_api.common.logging import get_logger
 from ...library_api.userdata.token import AuthInfo
@@ -18,7 +18,7 @@ from ..common.rest_operations import (delete as command_delete,
                                       stats as command_stats)
 
 from ..common.misc_operations import settings as command_settings
-from ..common.undecorated_click_commands import basic_create_from_dict_body
+from ..common.undecorated_click_commands import basic_create_from_dict_body, find_resource
 from ...library_api.utility.file_handling import load_json_settings_file, load_plain_file
 
 logger = get_logger()
@@ -44,13 +44,9 @@ def table(ctx: click.Context,
         raise LogicException(f"No project parameter provided and "
                              f"no project is set in profile '{user_profile.profilename}'")
 
-    project_body = access_resource(user_profile, [('projects', project_name)])
-    if not project_body:
-        raise ResourceNotFoundException(f"Project '{project_name}' not found.")
-
-    project_id = project_body.get('uuid')
-    org_id = user_profile.org_id
-    ctx.obj = {'resource_path': f'/config/v1/orgs/{org_id}/projects/{project_id}/tables/',
+    resource_path = resolve_path(user_profile, [('projects', project_name),
+                                                ('tables', None)]).path
+    ctx.obj = {'resource_path': resource_path,
                'usercontext': user_profile}
 
 
@@ -104,29 +100,17 @@ def create(ctx: click.Context,
 
 
 def _basic_truncate(profile, resource_path, resource_name: str):
-    hostname = profile.hostname
-    scheme = profile.scheme
     timeout = profile.timeout
-    list_url = f'{scheme}://{hostname}{resource_path}'
     auth = profile.auth
     headers = {'Authorization': f'{auth.token_type} {auth.token}',
                'Accept': 'application/json'}
-    resources = rest_ops.list(list_url, headers=headers, timeout=timeout)
-    url = None
-    for a_resource in resources:
-        if a_resource['name'] == resource_name:
-            if 'url' in a_resource:
-                url = a_resource['url'].replace('https://', f'{scheme}://')
-            else:
-                url = f"{scheme}://{hostname}{resource_path}{a_resource['uuid']}"
-            break
+    url, _ = find_resource(profile, resource_path, resource_name)
     if not url:
         return False
     url = f'{url}/truncate'
-    result = requests.post(url,
-                           headers=headers,
-                           timeout=timeout)
-    if result.status_code not in (200, 201):
+    try:
+        rest_ops.create(url, headers=headers, timeout=timeout)
+    except HttpException:
         return False
     return True
 
@@ -0,0 +1,44 @@
+"""hdxcli entry point.
+
+Shell completion requests are answered from the command manifest, and
+commands are forwarded to the hdxcli daemon when it is running, before the
+CLI itself is imported; otherwise they run in this process.
+"""
+import os
+import sys
+
+from hdx_cli.library_api.common.daemon_client import forward
+
+# Set by the completion scripts click generates for the hdxcli program
+COMPLETE_ENV = '_HDXCLI_COMPLETE'
+
+
+def _complete(instruction: str) -> None:
+    """Answer a completion request and exit, unless click must handle it
+    (to print the completion script, for instance)"""
+    # pylint:disable=import-outside-toplevel
+    from hdx_cli.library_api.common.completion import answer, load_manifest
+    from hdx_cli.library_api.common.config_constants import COMPLETION_MANIFEST_FILE
+    if (manifest := load_manifest()) is None:
+        from hdx_cli.cli_interface.common.command_manifest import build_manifest, write_manifest
+        from hdx_cli.main import hdx_cli
+        try:
+            manifest = write_manifest(hdx_cli, COMPLETION_MANIFEST_FILE)
+        except OSError:
+            manifest = build_manifest(hdx_cli)
+    if (output := answer(instruction, manifest)) is not None:
+        sys.stdout.write(f'{output}\n')
+        sys.exit(0)
+
+
+def main():
+    if instruction := os.getenv(COMPLETE_ENV):
+        _complete(instruction)
+    elif (exit_code := forward(sys.argv[1:])) is not None:
+        sys.exit(exit_code)
+    from hdx_cli.main import main as cli_main  # pylint:disable=import-outside-toplevel
+    cli_main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""Asyncio counterpart of rest_operations.
+
+The functions here mirror create/list/get/options/delete from rest_operations,
+but are coroutines, so a command can issue many requests concurrently from a
+single thread:
+
+    async def fetch_all(urls):
+        return await gather_with_limit(10, *(list(url, headers=headers, timeout=timeout)
+                                             for url in urls))
+
+    results = run(fetch_all(urls))
+
+When aiohttp is installed (pip install 'hdxcli[async]') it is used as the
+transport. Otherwise every request is delegated to the pooled requests
+sessions in a worker thread, which keeps the same API working with the base
+dependencies. Either way, requests go through the global retry policy,
+mutating calls drop the caches they make stale, as in rest_operations, and
+in snapshot mode reads are served from the snapshot and writes refused.
+"""
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - depends on the environment
+    aiohttp = None
+
+from ..utility.json_util import json_dumps_bytes, json_loads
+from .exceptions import HttpException
+from .http_trace import HTTP_TRACE, path_template
+from .rest_operations import invalidate
+from .retry import RETRY_POLICY
+from .sessions import send_request, IDEMPOTENT_METHODS
+from .snapshot import SNAPSHOT
+
+Headers = Dict[str, str]
+
+DEFAULT_CONCURRENCY = 20
+
+_CLIENT_SESSIONS: Dict[asyncio.AbstractEventLoop, Any] = {}
+
+
+def _get_client_session():
+    loop = asyncio.get_running_loop()
+    if not (session := _CLIENT_SESSIONS.get(loop)):
+        connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+        session = _CLIENT_SESSIONS[loop] = aiohttp.ClientSession(connector=connector)
+    return session
+
+
+def _clean_params(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+    # requests drops None values from query params, aiohttp rejects them
+    if not params:
+        return None
+    return {key: str(value) for key, value in params.items() if value is not None}
+
+
+async def _request(method: str,
+                   url: str,
+                   *,
+                   headers: Headers,
+                   timeout,
+                   params=None,
+                   json_body=None,
+                   data=None) -> Tuple[int, bytes]:
+    if aiohttp is None:
+        result = await asyncio.to_thread(send_request,
+                                         method,
+                                         url,
+                                         headers=headers,
+                                         params=params,
+                                         json=json_body,
+                                         data=data,
+                                         timeout=timeout)
+        return result.status_code, result.content
+
+    if json_body is not None:
+        data = json_dumps_bytes(json_body)
+        headers = {'Content-Type': 'application/json', **headers}
+    session = _get_client_session()
+    start = time.perf_counter()
+    attempts, ttfb = 0, None
+
+    async def _send():
+        nonlocal attempts, ttfb
+        attempts += 1
+        attempt_start = time.perf_counter()
+        async with session.request(method,
+                                   url,
+                                   headers=headers,
+                                   params=_clean_params(params),
+                                   data=data,
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            ttfb = time.perf_counter() - attempt_start
+            return response.status, response.headers, await response.read()
+
+    status, content, error = None, b'', None
+    try:
+        status, _, content = await RETRY_POLICY.call_async(
+            _send,
+            url=url,
+            idempotent=method in IDEMPOTENT_METHODS,
+            errors=(aiohttp.ClientConnectionError, asyncio.TimeoutError),
+            connect_errors=(aiohttp.ClientConnectorError,))
+    except Exception as exc:
+        error = type(exc).__name__
+        raise
+    finally:
+        if HTTP_TRACE.enabled:
+            # aiohttp does not expose connection setup timings, they are part of ttfb
+            HTTP_TRACE.record({'method': method,
+                               'path': path_template(url),
+                               'status': status,
+                               'error': error,
+                               'bytes_out': len(data) if isinstance(data, bytes) else 0,
+                               'bytes_in': len(content),
+                               'dns': None,
+                               'connect': None,
+                               'tls': None,
+                               'ttfb': round(ttfb, 6) if ttfb is not None else None,
+                               'total': round(time.perf_counter() - start, 6),
+                               'retries': max(0, attempts - 1)})
+    return status, content
+
+
+async def create(url: str, *,
+                 headers: Headers,
+                 timeout,
+                 body: Union[Dict[str, Any], bytes] = None,
+                 body_type='json'):
+    if SNAPSHOT.active:
+        SNAPSHOT.refuse('POST', url)
+    if body_type == 'json':
+        status, content = await _request('POST', url,
+                                         headers=headers,
+                                         timeout=timeout,
+                                         json_body=body)
+    else:
+        status, content = await _request('POST', url,
+                                         headers=headers,
+                                         timeout=timeout,
+                                         data=body)
+    invalidate(url)
+    if status not in (201, 200):
+        raise HttpException(status, content)
+
+
+async def list(url, *,
+               headers,
+               fmt='json',
+               timeout,
+               params=None):
+    if SNAPSHOT.active:
+        if fmt != 'json':
+            SNAPSHOT.refuse('GET', url)
+        return SNAPSHOT.get(url)
+    status, content = await _request('GET', url,
+                                     headers=headers,
+                                     timeout=timeout,
+                                     params=params)
+    if status != 200:
+        raise HttpException(status, content)
+    if fmt == 'json':
+        return json_loads(content)
+    return content
+
+
+get = list
+
+
+async def options(url, *,
+                  headers,
+                  timeout):
+    if SNAPSHOT.active:
+        return SNAPSHOT.options(url)
+    status, content = await _request('OPTIONS', url,
+                                     headers=headers,
+                                     timeout=timeout)
+    if status != 200:
+        raise HttpException(status, content)
+    return json_loads(content)
+
+
+async def delete(url, *,
+                 headers,
+                 timeout,
+                 params=None):
+    if SNAPSHOT.active:
+        SNAPSHOT.refuse('DELETE', url)
+    status, content = await _request('DELETE', url,
+                                     headers=headers,
+                                     timeout=timeout,
+                                     params=params)
+    invalidate(url)
+    if status != 204:
+        raise HttpException(status, content)
+    return json.loads('{}')
+
+
+async def gather_with_limit(limit: int,
+                            *aws: Awaitable,
+                            return_exceptions: bool = False) -> List[Any]:
+    """Like asyncio.gather, but with at most 'limit' awaitables in flight at
+    the same time. Results keep the order of the awaitables."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _bounded(awaitable):
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(_bounded(aw) for aw in aws),
+                                return_exceptions=return_exceptions)
+
+
+async def close() -> None:
+    """Close the transport bound to the running event loop, if any"""
+    loop = asyncio.get_running_loop()
+    if session := _CLIENT_SESSIONS.pop(loop, None):
+        await session.close()
+
+
+def run(coroutine: Awaitable):
+    """Run a coroutine to completion in a new event loop and release
+    the connections it opened."""
+    async def _runner():
+        try:
+            return await coroutine
+        finally:
+            await close()
+    return asyncio.run(_runner())
+
+
+def run_all(aws: Iterable[Awaitable],
+            *,
+            limit: int = DEFAULT_CONCURRENCY,
+            return_exceptions: bool = False) -> List[Any]:
+    """Synchronous entry point: run the awaitables concurrently with at most
+    'limit' in flight and return their results in order."""
+    return run(gather_with_limit(limit, *aws, return_exceptions=return_exceptions))
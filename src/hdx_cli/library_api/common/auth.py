@@ -4,8 +4,7 @@ from pathlib import Path
 import os
 from typing import overload, Union
 
-import toml
-
+from .config_files import load_toml_file, forget_toml_file
 from .config_constants import HDX_CONFIG_DIR, PROFILE_CONFIG_FILE
 from .exceptions import ProfileNotFoundException, CacheFileNotFoundException, LogicException
 from .context import ProfileUserContext, ProfileLoadContext
@@ -39,11 +38,9 @@ def load_profile(load_profile_context:
             profile_name = load_profile_context
         else:
             raise LogicException('Wrong profile type.')
-        with open(profile_config_file, 'r', encoding='utf-8') as stream:
-            profile_dict = toml.load(stream)[profile_name]
-            profile_dict['profilename'] = profile_name
-            profile_dict['profile_config_file'] = profile_config_file
-            return ProfileUserContext(**profile_dict)
+        return ProfileUserContext(**{**load_toml_file(profile_config_file)[profile_name],
+                                     'profilename': profile_name,
+                                     'profile_config_file': profile_config_file})
     except FileNotFoundError as ex:
         raise ProfileNotFoundException(
             f'File not found: {profile_config_file}') from ex
@@ -73,6 +70,7 @@ def save_profile_cache(a_profile: ProfileUserContext,
                                             'expires_at': expiration_time},
                                    'username': f'{username}',
                                    'hostname': f'{hostname}'}).save_to_stream(f)
+    forget_toml_file(cache_dir_path / f'{a_profile.profilename}')
 
 
 def _compose_profile_cache_filename(load_ctx: ProfileLoadContext) -> Path:
@@ -82,12 +80,9 @@ def _compose_profile_cache_filename(load_ctx: ProfileLoadContext) -> Path:
 
 
 def _try_load_profile_cache_data(load_ctx: ProfileLoadContext) -> CacheDict:
-    fname = None
+    fname = _compose_profile_cache_filename(load_ctx)
     try:
-        with open((inner_fname := _compose_profile_cache_filename(load_ctx)), 'r',
-        encoding='utf-8') as stream:
-            fname = inner_fname
-            return CacheDict.build_from_toml_stream(stream)
+        return CacheDict.build_from_dict(load_toml_file(fname))
     except FileNotFoundError as ex:
         raise CacheFileNotFoundException(f'Cache file not found {fname}') from ex
 
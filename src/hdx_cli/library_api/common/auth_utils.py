@@ -5,6 +5,7 @@ import dataclasses as dc
 
 import functools as ft
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 import toml
 
@@ -13,9 +14,33 @@ from .context import ProfileUserContext, ProfileLoadContext, DEFAULT_TIMEOUT
 from .exceptions import TokenExpiredException, HdxCliException
 from .login import login
 from .config_constants import HDX_CONFIG_DIR
+from .snapshot import SNAPSHOT
+
+# Default (project, table) per profile name for the rest of the process, set
+# by 'use' in hdxcli shell instead of being written to the profile file
+SESSION_DEFAULTS: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
 
 
 def load_user_context(load_context, **args):
+    if SNAPSHOT.active:
+        # Served from the snapshot, no token is needed
+        user_context = SNAPSHOT.user_context(load_profile(load_context))
+    else:
+        user_context = _load_logged_in_user_context(load_context, **args)
+    if session_defaults := SESSION_DEFAULTS.get(user_context.profilename):
+        user_context.projectname, user_context.tablename = session_defaults
+
+    uri_scheme = args.get('uri_scheme')
+    timeout = args.get('timeout')
+    if uri_scheme and uri_scheme != 'default':
+        user_context.scheme = args.get('uri_scheme')
+    if timeout and timeout != DEFAULT_TIMEOUT:
+        user_context.timeout = args.get('timeout')
+
+    return user_context
+
+
+def _load_logged_in_user_context(load_context, **args):
     load_set_params = ft.partial(_load_set_config_parameters,
                                  load_context=load_context)
 
@@ -43,14 +68,6 @@ def load_user_context(load_context, **args):
                            org_id=auth_info.org_id,
                            cache_dir_path=cache_dir_path)
         user_context.auth = auth_info
-
-    uri_scheme = args.get('uri_scheme')
-    timeout = args.get('timeout')
-    if uri_scheme and uri_scheme != 'default':
-        user_context.scheme = args.get('uri_scheme')
-    if timeout and timeout != DEFAULT_TIMEOUT:
-        user_context.timeout = args.get('timeout')
-
     return user_context
 
 
@@ -132,18 +149,11 @@ def _load_set_config_parameters(user_context: ProfileUserContext,
                                 load_context: ProfileLoadContext):
     """Given a profile to load and an old profile, it returns the user_context
     with the config parameters projectname and tablename loaded."""
-    config_params = {'projectname':
-                     (prof := load_profile(load_context)).projectname,
-                     'tablename':
-                     prof.tablename,
-                     'scheme': prof.scheme}
-    user_ctx_dict = dc.asdict(user_context) | config_params
-    # Keep old auth since asdict will transform AuthInfo into a dictionary.
-    old_auth = user_context.auth
-    new_user_ctx = ProfileUserContext(**user_ctx_dict)
-    # And reassign when done
-    new_user_ctx.auth = old_auth
-    return new_user_ctx
+    profile = load_profile(load_context)
+    return dc.replace(user_context,
+                      projectname=profile.projectname,
+                      tablename=profile.tablename,
+                      scheme=profile.scheme)
 
 
 def fail_if_token_expired(user_context: ProfileUserContext):
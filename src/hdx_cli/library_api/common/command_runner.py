@@ -0,0 +1,86 @@
+"""Run hdxcli commands inside an already running hdxcli process.
+
+Used by run-script and by the daemon. Each command goes through the whole
+click tree, global options included, exactly as on the command line. What
+the global options change for the process (logging, HTTP cache, tracing,
+snapshot mode, the resolution store) is put back as it was afterwards, so a
+command does not leak its options into the next one. Sessions, parsed
+profile and token files and the caches are shared by every command.
+"""
+import logging
+import traceback
+from typing import Iterable, List, Optional
+
+import click
+
+from .http_cache import HTTP_CACHE
+from .http_trace import HTTP_TRACE
+from .request_memo import RESPONSE_MEMO
+from .resolution_store import RESOLUTION_STORE
+from .retry import RETRY_POLICY
+from .snapshot import SNAPSHOT
+
+__all__ = ['run_in_process', 'global_option_args', 'subcommand_name']
+
+
+def global_option_args(ctx: click.Context, exclude: Iterable[str] = ()) -> List[str]:
+    """Command-line arguments that reproduce the global options given to the
+    root command of ctx, without those left to their defaults or whose
+    parameter name is in exclude"""
+    root_ctx = ctx.find_root()
+    args = []
+    for param in root_ctx.command.params:
+        value = root_ctx.params.get(param.name)
+        if (not isinstance(param, click.Option) or value is None or value is False or
+                value == param.default or param.name in exclude):
+            continue
+        args.append(param.opts[-1] if param.is_flag else param.opts[0])
+        if not param.is_flag:
+            args.append(str(value))
+    return args
+
+
+def subcommand_name(cli: click.Group, argv: List[str]) -> Optional[str]:
+    """Name of the subcommand of argv, after the global options of cli, or
+    None if there is none or the global options cannot be parsed. Only the
+    subcommand position counts: the same word as an argument of a command
+    (a resource or file name) is not a subcommand."""
+    context = click.Context(cli, info_name='hdxcli', resilient_parsing=True)
+    try:
+        rest = click.Command.parse_args(cli, context, list(argv))
+    except click.ClickException:
+        return None
+    return rest[0] if rest else None
+
+
+def run_in_process(cli: click.Group, argv: List[str], *, clear_memo: bool = False) -> int:
+    """Run argv with the root group cli and return its exit status. With
+    clear_memo, responses memoized by this command are not kept for the next
+    one, for callers whose commands may be far apart in time."""
+    root_logger = logging.getLogger()
+    saved_handlers, saved_level = list(root_logger.handlers), root_logger.level
+    saved_http_cache, saved_trace = HTTP_CACHE.enabled, HTTP_TRACE.enabled
+    saved_snapshot, saved_store = SNAPSHOT.active, RESOLUTION_STORE.enabled
+    saved_retry = RETRY_POLICY.max_attempts, RETRY_POLICY.budget
+    # The command installs its own logging handler
+    root_logger.handlers.clear()
+    try:
+        cli.main(args=argv, prog_name='hdxcli')
+        return 0
+    except SystemExit as exc:
+        return exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+    except Exception:  # pylint:disable=broad-except
+        traceback.print_exc()
+        return 1
+    finally:
+        root_logger.handlers[:] = saved_handlers
+        root_logger.setLevel(saved_level)
+        HTTP_CACHE.enabled = saved_http_cache
+        if not saved_trace:
+            HTTP_TRACE.finish()
+        if not saved_snapshot:
+            SNAPSHOT.unload()
+        RESOLUTION_STORE.enabled = saved_store
+        RETRY_POLICY.max_attempts, RETRY_POLICY.budget = saved_retry
+        if clear_memo:
+            RESPONSE_MEMO.clear()
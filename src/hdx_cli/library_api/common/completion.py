@@ -0,0 +1,230 @@
+"""Shell completion answered from the command manifest.
+
+Click completion runs the CLI for every TAB press, importing every command
+module on the way. Instead, the hdxcli entry point answers completion
+requests (_HDXCLI_COMPLETE=bash_complete and the like, as sent by the
+scripts of `_HDXCLI_COMPLETE=bash_source hdxcli`) from a JSON manifest of the
+command tree in HDX_CONFIG_DIR/cache, written the first time it is needed and
+again whenever the installed code changes (see
+cli_interface/common/command_manifest.py).
+
+Project, table and transform names come from the resolution store, so only
+names already resolved (or prewarmed with `hdxcli cache warm`) are offered,
+and no request is made.
+
+This module only depends on the standard library, config_constants and fingerprint.
+"""
+import json
+import os
+import shlex
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config_constants import COMPLETION_MANIFEST_FILE, PROFILE_CONFIG_FILE, RESOLUTION_STORE_FILE
+from .fingerprint import code_fingerprint
+
+__all__ = ['MANIFEST_VERSION', 'RESOURCE_KINDS', 'load_manifest', 'complete', 'answer']
+
+MANIFEST_VERSION = 1
+RESOURCE_KINDS = ('project', 'table', 'transform')
+# Namespace of the name -> id entries in the resolution store, as in generic_resource
+_RESOURCE_IDS_NAMESPACE = 'resource_ids'
+
+Completion = Tuple[str, str, str]
+
+
+def load_manifest(manifest_path: Path = COMPLETION_MANIFEST_FILE) -> Optional[Dict[str, Any]]:
+    """The manifest in manifest_path, or None if it is missing or outdated"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return None
+    if (manifest.get('version') != MANIFEST_VERSION or
+            manifest.get('fingerprint') != code_fingerprint()):
+        return None
+    return manifest
+
+
+def _split_arg_string(string: str) -> List[str]:
+    # As click does, an unterminated quote keeps the rest as the last word
+    lexer = shlex.shlex(string, posix=True)
+    lexer.whitespace_split = True
+    lexer.commenters = ''
+    words = []
+    try:
+        for word in lexer:
+            words.append(word)
+    except ValueError:
+        words.append(lexer.token)
+    return words
+
+
+def _completion_args(shell: str) -> Tuple[List[str], str]:
+    """Words before the one being completed, and that word"""
+    words = _split_arg_string(os.environ.get('COMP_WORDS', ''))
+    if shell == 'fish':
+        incomplete = os.environ.get('COMP_CWORD', '')
+        incomplete = _split_arg_string(incomplete)[0] if incomplete else ''
+        args = words[1:]
+        if incomplete and args and args[-1] == incomplete:
+            args.pop()
+        return args, incomplete
+    word_index = int(os.environ.get('COMP_CWORD', '0'))
+    return words[1:word_index], words[word_index] if word_index < len(words) else ''
+
+
+def _load_profiles(profile_config_file: Path = PROFILE_CONFIG_FILE) -> Dict[str, Any]:
+    try:
+        import tomllib  # pylint:disable=import-outside-toplevel
+        with open(profile_config_file, 'rb') as config_file:
+            return tomllib.load(config_file)
+    except ImportError:
+        import toml  # pylint:disable=import-outside-toplevel
+        with open(profile_config_file, 'r', encoding='utf-8') as config_file:
+            return toml.load(config_file)
+
+
+def _cached_ids(hostname: str, profile_name: str) -> Dict[str, Dict[str, str]]:
+    """{collection path: {name: id}} of the live entries of the resolution store"""
+    try:
+        connection = sqlite3.connect(f'file:{RESOLUTION_STORE_FILE}?mode=ro', uri=True)
+    except sqlite3.Error:
+        return {}
+    try:
+        rows = connection.execute('SELECT key, value, path FROM entries '
+                                  'WHERE host = ? AND profile = ? AND namespace = ? '
+                                  'AND expires_at >= ?',
+                                  (hostname, profile_name, _RESOURCE_IDS_NAMESPACE,
+                                   time.time())).fetchall()
+    except sqlite3.Error:
+        return {}
+    finally:
+        connection.close()
+    ids_by_path = {}
+    for key, value, path in rows:
+        if '?name=' in key and (resource_id := json.loads(value)):
+            ids_by_path.setdefault(path, {})[key.partition('?name=')[2]] = resource_id
+    return ids_by_path
+
+
+def _collection(ids_by_path: Dict[str, Dict[str, str]], path_suffix: str) -> Dict[str, str]:
+    return {name: resource_id
+            for path, ids in ids_by_path.items() if path.endswith(path_suffix)
+            for name, resource_id in ids.items()}
+
+
+def _resource_names(kind: str, values: Dict[str, str]) -> List[str]:
+    profiles = _load_profiles()
+    if kind == 'profile':
+        return list(profiles)
+    profile = profiles.get(values.get('profile') or 'default', {})
+    ids_by_path = _cached_ids(profile.get('hostname', ''), values.get('profile') or 'default')
+    projects = _collection(ids_by_path, '/projects')
+    if kind == 'project':
+        return list(projects)
+    project_id = projects.get(values.get('project') or profile.get('projectname'))
+    tables = _collection(ids_by_path, f'/projects/{project_id}/tables') if project_id else {}
+    if kind == 'table':
+        return list(tables)
+    table_id = tables.get(values.get('table') or profile.get('tablename'))
+    return list(_collection(ids_by_path, f'/tables/{table_id}/transforms')) if table_id else []
+
+
+def _complete_value(param: Dict[str, Any], incomplete: str,
+                    values: Dict[str, str]) -> List[Completion]:
+    if param['choices']:
+        return [('plain', choice, '') for choice in param['choices']]
+    if param['kind'] == 'file':
+        return [('file', incomplete, '')]
+    if param['kind']:
+        return [('plain', name, '') for name in _resource_names(param['kind'], values)]
+    return []
+
+
+def _find_option(command: Dict[str, Any], option_name: str) -> Optional[Dict[str, Any]]:
+    return next((option for option in command['options'] if option_name in option['opts']),
+                None)
+
+
+def complete(manifest: Dict[str, Any], args: List[str], incomplete: str) -> List[Completion]:
+    """(type, value, help) of each completion of incomplete after args, as
+    click would complete them"""
+    command = manifest['root']
+    # Names given so far, by kind ('profile', 'project', ...)
+    values: Dict[str, str] = {}
+    used_options, positional_index, expected_option, only_arguments = [], 0, None, False
+    for arg in args:
+        if expected_option:
+            if expected_option['kind']:
+                values[expected_option['kind']] = arg
+            expected_option = None
+        elif arg == '--':
+            only_arguments = True
+        elif arg.startswith('-') and not only_arguments:
+            option_name, has_value, value = arg.partition('=')
+            if option := _find_option(command, option_name):
+                used_options.append(option)
+                if has_value and option['kind']:
+                    values[option['kind']] = value
+                elif not has_value and not option['flag']:
+                    expected_option = option
+        elif arg in command['commands'] and not positional_index:
+            command = command['commands'][arg]
+            used_options, only_arguments = [], False
+        else:
+            if positional_index < len(command['arguments']):
+                if kind := command['arguments'][positional_index]['kind']:
+                    values[kind] = arg
+            positional_index += 1
+
+    if expected_option:
+        completions = _complete_value(expected_option, incomplete, values)
+    elif incomplete.startswith('-') and not only_arguments:
+        completions = [('plain', option_name, option['help'])
+                       for option in command['options']
+                       if option['multiple'] or option not in used_options
+                       for option_name in option['opts']]
+    elif command['commands'] and not positional_index:
+        completions = [('plain', name, subcommand['help'])
+                       for name, subcommand in command['commands'].items()
+                       if not subcommand['hidden']]
+    elif arguments := command['arguments']:
+        # A variadic argument takes every remaining word
+        argument = arguments[min(positional_index, len(arguments) - 1)]
+        if positional_index < len(arguments) or argument['nargs'] == -1:
+            completions = _complete_value(argument, incomplete, values)
+        else:
+            completions = []
+    else:
+        completions = []
+    return [completion for completion in completions
+            if completion[0] != 'plain' or completion[1].startswith(incomplete)]
+
+
+def _format(shell: str, completion: Completion) -> str:
+    completion_type, value, help_text = completion
+    if shell == 'zsh':
+        help_text = help_text or '_'
+        value = value.replace(':', r'\:') if help_text != '_' else value
+        return f'{completion_type}\n{value}\n{help_text}'
+    if shell == 'fish' and help_text:
+        return f"{completion_type},{value}\t{help_text.replace(chr(9), ' ')}"
+    return f'{completion_type},{value}'
+
+
+def answer(instruction: str, manifest: Dict[str, Any]) -> Optional[str]:
+    """Output for the completion instruction (bash_complete, zsh_complete or
+    fish_complete), or None if it is not one of them"""
+    shell, _, action = instruction.partition('_')
+    if action != 'complete' or shell not in ('bash', 'zsh', 'fish'):
+        return None
+    args, incomplete = _completion_args(shell)
+    try:
+        completions = complete(manifest, args, incomplete)
+    except (OSError, ValueError, KeyError, sqlite3.Error):
+        # A broken profile file or cache must not break the prompt
+        completions = []
+    return '\n'.join(_format(shell, completion) for completion in completions)
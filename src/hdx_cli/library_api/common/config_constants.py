@@ -6,7 +6,10 @@ from hdx_cli.library_api.common.logging import get_logger
 
 logger = get_logger()
 
-__all__ = ['HDX_CONFIG_DIR', 'PROFILE_CONFIG_FILE', 'PROFILE_CACHE_DIR']
+__all__ = ['HDX_CONFIG_DIR', 'PROFILE_CONFIG_FILE', 'PROFILE_CACHE_DIR', 'HTTP_CACHE_DIR',
+           'RESOLUTION_STORE_FILE', 'SNAPSHOT_DIR',
+           'SCHEMA_CACHE_DIR', 'DAEMON_SOCKET_FILE', 'DAEMON_LOG_FILE',
+           'SHELL_HISTORY_FILE', 'COMPLETION_MANIFEST_FILE']
 
 HDX_CONFIG_DIR_DEFAULT = Path.home() / '.hdx_cli'
 HDX_CONFIG_DIR_ENV = os.getenv('HDX_CONFIG_DIR')
@@ -14,6 +17,14 @@ HDX_CONFIG_DIR = Path(HDX_CONFIG_DIR_ENV) if HDX_CONFIG_DIR_ENV else HDX_CONFIG_
 
 PROFILE_CONFIG_FILE = HDX_CONFIG_DIR / 'config.toml'
 PROFILE_CACHE_DIR = HDX_CONFIG_DIR
+HTTP_CACHE_DIR = HDX_CONFIG_DIR / 'cache' / 'http'
+RESOLUTION_STORE_FILE = HDX_CONFIG_DIR / 'cache' / 'resolution.db'
+SNAPSHOT_DIR = HDX_CONFIG_DIR / 'snapshots'
+SCHEMA_CACHE_DIR = HDX_CONFIG_DIR / 'cache' / 'schemas'
+COMPLETION_MANIFEST_FILE = HDX_CONFIG_DIR / 'cache' / 'completion.json'
+DAEMON_SOCKET_FILE = HDX_CONFIG_DIR / 'daemon.sock'
+DAEMON_LOG_FILE = HDX_CONFIG_DIR / 'daemon.log'
+SHELL_HISTORY_FILE = HDX_CONFIG_DIR / 'shell_history'
 
 
 if HDX_CONFIG_DIR_ENV and not HDX_CONFIG_DIR.exists():
@@ -0,0 +1,40 @@
+"""Parsed TOML configuration files, memoized for the process.
+
+The profile configuration and the token cache are read several times while a
+command starts up (token, profile, default project and table). Each file is
+parsed once and served from memory afterwards, as long as its modification
+time and size are unchanged.
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Tuple, Union
+
+import toml
+
+__all__ = ['load_toml_file', 'forget_toml_file']
+
+_PARSED_FILES: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_LOCK = threading.Lock()
+
+
+def load_toml_file(file_path: Union[str, Path]) -> Dict[str, Any]:
+    """Parsed content of file_path. The result is shared by every caller and
+    must not be modified. Raises FileNotFoundError if it does not exist."""
+    file_key = os.path.abspath(file_path)
+    file_stat = os.stat(file_key)
+    signature = (file_stat.st_mtime_ns, file_stat.st_size)
+    with _LOCK:
+        if (cached := _PARSED_FILES.get(file_key)) and cached[0] == signature:
+            return cached[1]
+    with open(file_key, 'r', encoding='utf-8') as stream:
+        content = toml.load(stream)
+    with _LOCK:
+        _PARSED_FILES[file_key] = (signature, content)
+    return content
+
+
+def forget_toml_file(file_path: Union[str, Path]) -> None:
+    """Drop file_path from memory, after writing it"""
+    with _LOCK:
+        _PARSED_FILES.pop(os.path.abspath(file_path), None)
@@ -0,0 +1,190 @@
+"""Server side of the hdxcli daemon, see daemon_client.
+
+The daemon runs the commands it receives one at a time, in its own process,
+with sys.stdin, sys.stdout and sys.stderr bound to the connection and the
+HDX_* and proxy variables of the client in its environment, so prompts work
+as in a local run. Passwords (getpass.getpass, click hidden prompts) are read
+by the client, as the daemon has no terminal to turn echo off.
+
+Everything kept at module level survives between commands: the imported
+command modules, parsed profile and token files, pooled HTTP sessions and
+the resolution store. What the global options of a command change is reset
+after it (see command_runner), and so is the in-process response memo,
+since other processes may change the cluster in between commands.
+"""
+import getpass
+import io
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict
+
+from .command_runner import run_in_process, subcommand_name
+from .daemon_client import is_forwarded_variable, read_message, send_message, LOCAL_COMMANDS
+from .fingerprint import code_fingerprint
+from .logging import get_logger
+
+logger = get_logger()
+
+__all__ = ['serve', 'DEFAULT_IDLE_TIMEOUT']
+
+DEFAULT_IDLE_TIMEOUT = 3600
+
+
+class _MessageWriter(io.TextIOBase):
+    """Text stream whose writes are sent to the client as stream messages"""
+
+    def __init__(self, connection: socket.socket, stream_name: str):
+        super().__init__()
+        self._connection = connection
+        self._stream_name = stream_name
+
+    @property
+    def encoding(self) -> str:
+        return 'utf-8'
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        # Text only, so that click does not take it for a binary stream
+        if not isinstance(text, str):
+            raise TypeError(f'write() argument must be str, not {type(text).__name__}')
+        if text:
+            send_message(self._connection, {self._stream_name: text})
+        return len(text)
+
+
+class _MessageReader(io.TextIOBase):
+    """Text stream that asks the client for its stdin when read"""
+
+    def __init__(self, connection: socket.socket, stream: BinaryIO):
+        super().__init__()
+        self._connection = connection
+        self._stream = stream
+        self._buffer = ''
+        self._at_eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self, mode: str) -> None:
+        send_message(self._connection, {'read': mode})
+        text = (read_message(self._stream) or {}).get('stdin', '')
+        self._at_eof = self._at_eof or not text
+        self._buffer += text
+
+    def readline(self, size=-1) -> str:
+        if '\n' not in self._buffer and not self._at_eof:
+            self._fill('line')
+        line, newline, self._buffer = self._buffer.partition('\n')
+        return line + newline
+
+    def read(self, size=-1) -> str:
+        if not self._at_eof:
+            self._fill('all')
+            self._at_eof = True
+        if size is None or size < 0:
+            text, self._buffer = self._buffer, ''
+        else:
+            text, self._buffer = self._buffer[:size], self._buffer[size:]
+        return text
+
+
+def _remote_getpass(connection: socket.socket, stream: BinaryIO):
+    def _getpass(prompt: str = 'Password: ', stream_=None) -> str:  # pylint:disable=unused-argument
+        send_message(connection, {'read': 'secret', 'prompt': prompt})
+        return (read_message(stream) or {}).get('stdin', '')
+    return _getpass
+
+
+def _run_command(cli, connection: socket.socket, stream: BinaryIO,
+                 request: Dict[str, Any]) -> int:
+    saved_streams = sys.stdin, sys.stdout, sys.stderr
+    saved_cwd = os.getcwd()
+    saved_environ = dict(os.environ)
+    saved_getpass = getpass.getpass
+    sys.stdin = _MessageReader(connection, stream)
+    sys.stdout = _MessageWriter(connection, 'stdout')
+    sys.stderr = _MessageWriter(connection, 'stderr')
+    getpass.getpass = _remote_getpass(connection, stream)
+    for name in [name for name in os.environ if is_forwarded_variable(name)]:
+        del os.environ[name]
+    os.environ.update(request.get('env', {}))
+    try:
+        os.chdir(request['cwd'])
+        return run_in_process(cli, request['argv'], clear_memo=True)
+    finally:
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_environ)
+        getpass.getpass = saved_getpass
+        sys.stdin, sys.stdout, sys.stderr = saved_streams
+
+
+def serve(cli, socket_path: Path, *, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+    """Run the commands of the click group cli received on socket_path until
+    stopped, or until no command arrives for idle_timeout seconds"""
+    # Import every command up front, forwarded commands then start warm
+    context = cli.make_context('hdxcli', ['--help'], resilient_parsing=True)
+    for command_name in cli.list_commands(context):
+        cli.get_command(context, command_name)
+
+    fingerprint = code_fingerprint()
+
+    socket_path = Path(socket_path)
+    socket_path.unlink(missing_ok=True)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(socket_path))
+    os.chmod(socket_path, 0o600)
+    socket_inode = socket_path.stat().st_ino
+    listener.listen(16)
+    listener.settimeout(idle_timeout)
+    started_at = time.time()
+    commands_run = 0
+    logger.debug(f'hdxcli daemon listening on {socket_path}')
+    try:
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except socket.timeout:
+                logger.debug('hdxcli daemon idle, exiting')
+                return
+            connection.settimeout(None)
+            with connection, connection.makefile('rb') as stream:
+                try:
+                    request = read_message(stream) or {}
+                    if request.get('code', fingerprint) != fingerprint:
+                        # Installed code changed since this daemon started
+                        logger.debug('hdxcli daemon outdated, exiting')
+                        send_message(connection, {'outdated': {'pid': os.getpid(),
+                                                               'idle_timeout': idle_timeout}})
+                        return
+                    if request.get('control') == 'status':
+                        send_message(connection, {'status': {'pid': os.getpid(),
+                                                             'uptime': time.time() - started_at,
+                                                             'commands_run': commands_run}})
+                    elif request.get('control') == 'stop':
+                        send_message(connection, {'status': {'pid': os.getpid(),
+                                                             'stopping': True}})
+                        return
+                    elif ('argv' in request and
+                          subcommand_name(cli, request['argv']) in LOCAL_COMMANDS):
+                        send_message(connection, {'local': True})
+                    elif 'argv' in request:
+                        commands_run += 1
+                        send_message(connection,
+                                     {'exit': _run_command(cli, connection, stream, request)})
+                except (OSError, ValueError) as exc:
+                    # The client went away or sent garbage, only that command is lost
+                    logger.debug(f'hdxcli daemon: dropped connection: {exc}')
+    finally:
+        listener.close()
+        # Unless a new daemon already replaced it
+        try:
+            if socket_path.stat().st_ino == socket_inode:
+                socket_path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,151 @@
+"""Client side of the hdxcli daemon.
+
+When `hdxcli daemon start` is running, its Unix socket is in HDX_CONFIG_DIR
+and forward() runs commands in it: argv and the working directory are sent,
+and stdout, stderr and the exit status are streamed back. The daemon keeps
+imports, parsed profiles and tokens, HTTP sessions and the resolution caches
+warm between commands.
+
+This module only depends on the standard library, config_constants and
+fingerprint, so a forwarded command does not pay for importing the CLI.
+
+Messages are JSON objects, one per line. A request is either
+{"argv": [...], "cwd": "...", "env": {...}, "code": "..."} or
+{"control": "status" | "stop", "code": "..."}, where env holds the HDX_* and
+proxy variables of the client and code the fingerprint of its installed
+code. The daemon answers with {"stdout": "..."} and {"stderr": "..."} messages
+followed by a final {"exit": code} or {"status": {...}}; with {"local": true}
+when the command must run in the client (see LOCAL_COMMANDS); or with
+{"outdated": {...}} when it runs other code than the client, in which case it
+exits and the client starts a new one. Stdin is only read when the command
+reads it: the daemon sends {"read": "line" | "all"} and the client replies
+{"stdin": "..."}, with "" at end of file. Passwords are asked with
+{"read": "secret", "prompt": "..."} and read by the client with getpass, so
+they are not echoed on its terminal.
+"""
+import json
+import os
+import socket
+import sys
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from .config_constants import DAEMON_LOG_FILE, DAEMON_SOCKET_FILE
+from .fingerprint import code_fingerprint
+
+__all__ = ['forward', 'send_control', 'send_message', 'read_message', 'spawn_daemon',
+           'forwarded_environment', 'is_forwarded_variable', 'NO_DAEMON_ENV',
+           'LOCAL_COMMANDS']
+
+# Set to any non-empty value to run every command in the invoking process
+NO_DAEMON_ENV = 'HDX_NO_DAEMON'
+# Commands that need the terminal or manage the daemon itself
+LOCAL_COMMANDS = frozenset({'daemon', 'init', 'shell', 'tui'})
+# Environment variables of the client that commands run by the daemon see
+FORWARDED_ENV_PREFIXES = ('HDX_',)
+FORWARDED_ENV = frozenset({'HTTP_PROXY', 'HTTPS_PROXY', 'ALL_PROXY', 'NO_PROXY',
+                           'REQUESTS_CA_BUNDLE', 'CURL_CA_BUNDLE', 'SSL_CERT_FILE',
+                           'SSL_CERT_DIR'})
+
+
+def send_message(connection: socket.socket, message: Dict[str, Any]) -> None:
+    connection.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def read_message(stream: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Next message on stream, or None once the other side closes it"""
+    line = stream.readline()
+    return json.loads(line) if line else None
+
+
+def is_forwarded_variable(name: str) -> bool:
+    # Proxy variables are also used in lower case
+    return name.upper() in FORWARDED_ENV or name.startswith(FORWARDED_ENV_PREFIXES)
+
+
+def forwarded_environment() -> Dict[str, str]:
+    return {name: value for name, value in os.environ.items() if is_forwarded_variable(name)}
+
+
+def spawn_daemon(idle_timeout: Optional[int] = None) -> None:
+    """Start a daemon in the background, detached from the terminal"""
+    import subprocess  # pylint:disable=import-outside-toplevel
+    args = [sys.executable, '-m', 'hdx_cli.main', 'daemon', 'start', '--foreground']
+    if idle_timeout:
+        args.extend(['--idle-timeout', str(int(idle_timeout))])
+    with open(DAEMON_LOG_FILE, 'a', encoding='utf-8') as log_file:
+        # pylint: disable=consider-using-with
+        subprocess.Popen(args,
+                         stdin=subprocess.DEVNULL,
+                         stdout=log_file,
+                         stderr=log_file,
+                         start_new_session=True)
+
+
+def _connect(socket_path=DAEMON_SOCKET_FILE) -> Optional[socket.socket]:
+    if not os.path.exists(socket_path):
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(str(socket_path))
+    except OSError:
+        # Left behind by a daemon that did not exit cleanly
+        connection.close()
+        return None
+    return connection
+
+
+def send_control(command: str, socket_path=DAEMON_SOCKET_FILE) -> Optional[Dict[str, Any]]:
+    """Answer of the daemon to a control command, or None if it is not running
+    (an outdated daemon exits instead of answering)"""
+    if not (connection := _connect(socket_path)):
+        return None
+    with connection, connection.makefile('rb') as stream:
+        send_message(connection, {'control': command, 'code': code_fingerprint()})
+        answer = read_message(stream)
+    return None if answer is None or 'outdated' in answer else answer
+
+
+def _read_stdin(mode: str, prompt: str) -> str:
+    if mode == 'secret':
+        import getpass  # pylint:disable=import-outside-toplevel
+        try:
+            return getpass.getpass(prompt)
+        except EOFError:
+            return ''
+    if sys.stdin is None:
+        return ''
+    return sys.stdin.readline() if mode == 'line' else sys.stdin.read()
+
+
+def forward(argv: List[str], socket_path=DAEMON_SOCKET_FILE) -> Optional[int]:
+    """Run argv in the daemon and return its exit status, or None if the
+    command must run in this process (no daemon, a local command, or a daemon
+    that runs other code, which is then replaced by a new one)"""
+    if os.getenv(NO_DAEMON_ENV):
+        return None
+    if not (connection := _connect(socket_path)):
+        return None
+    with connection, connection.makefile('rb') as stream:
+        send_message(connection, {'argv': argv,
+                                  'cwd': os.getcwd(),
+                                  'env': forwarded_environment(),
+                                  'code': code_fingerprint()})
+        while (message := read_message(stream)) is not None:
+            if 'stdout' in message:
+                sys.stdout.write(message['stdout'])
+                sys.stdout.flush()
+            elif 'stderr' in message:
+                sys.stderr.write(message['stderr'])
+                sys.stderr.flush()
+            elif 'read' in message:
+                send_message(connection, {'stdin': _read_stdin(message['read'],
+                                                               message.get('prompt', ''))})
+            elif 'exit' in message:
+                return message['exit']
+            elif 'local' in message:
+                return None
+            elif 'outdated' in message:
+                spawn_daemon(message['outdated'].get('idle_timeout'))
+                return None
+    print('Error: the hdxcli daemon closed the connection.', file=sys.stderr)
+    return 1
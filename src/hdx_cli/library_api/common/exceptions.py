@@ -11,6 +11,10 @@ class HttpException(HdxCliException):
         self.message = message
 
 
+class CircuitOpenException(HdxCliException):
+    'Requests to a host are paused after too many consecutive failures'
+
+
 class CommandLineException(HdxCliException):
     pass
 
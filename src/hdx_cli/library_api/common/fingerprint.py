@@ -0,0 +1,26 @@
+"""Fingerprint of the installed hdx_cli code, used to tell when the files
+written or the processes started by another version are outdated (the
+completion manifest, the daemon).
+
+This module only depends on the standard library.
+"""
+import os
+from pathlib import Path
+
+__all__ = ['code_fingerprint']
+
+_PACKAGE_DIR = Path(__file__).resolve().parents[2]
+
+
+def code_fingerprint() -> str:
+    """Changes whenever a module of the package is added, removed or modified"""
+    count, latest_mtime, total_size = 0, 0, 0
+    for directory, subdirectories, files in os.walk(_PACKAGE_DIR):
+        subdirectories[:] = [name for name in subdirectories if name != '__pycache__']
+        for name in files:
+            if name.endswith('.py'):
+                stat = os.stat(os.path.join(directory, name))
+                count += 1
+                latest_mtime = max(latest_mtime, stat.st_mtime_ns)
+                total_size += stat.st_size
+    return f'{count}:{latest_mtime}:{total_size}'
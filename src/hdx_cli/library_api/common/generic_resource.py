@@ -1,10 +1,189 @@
-from typing import Tuple, Optional, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Tuple, Optional, List, Any, Dict
 
 from . import rest_operations as rest_ops
 from .context import ProfileUserContext
+from .exceptions import (HttpException,
+                         ResourceNotFoundException,
+                         ProjectNotFoundException,
+                         TableNotFoundException,
+                         TransformNotFoundException)
+from .resolution_store import RESOLUTION_STORE
 
 ResourceKind = str
 ResourceName = str
+PathSpec = List[Tuple[ResourceKind, Optional[ResourceName]]]
+
+RESOURCE_IDS_NAMESPACE = 'resource_ids'
+VERIFIED_PATHS_NAMESPACE = 'verified_paths'
+
+# Seconds a resolved path is trusted without checking its stored ids again
+DEFAULT_VERIFIED_TTL = 60
+
+DEFAULT_RESOLVE_CONCURRENCY = 8
+
+_NOT_FOUND = {'projects': (ProjectNotFoundException, 'project'),
+              'tables': (TableNotFoundException, 'table'),
+              'transforms': (TransformNotFoundException, 'transform')}
+
+
+@dataclass
+class ResolvedPath:
+    """Ids of the named resources along a path spec, and the path and url of
+    the last element: a resource or, when its name is None, a collection."""
+    ids: List[str]
+    path: str
+    url: str
+
+
+def resource_id_key(collection_path: str, resource_name: str, filter_field: str = 'name') -> str:
+    """Key of a name -> id entry of the collection in collection_path in the resolution store"""
+    return f'{collection_path}?{filter_field}={resource_name}'
+
+
+def _headers(ctx: ProfileUserContext) -> Dict[str, str]:
+    token = ctx.auth
+    return {'Authorization': f'{token.token_type} {token.token}',
+            'Accept': 'application/json'}
+
+
+def cache_collection_ids(ctx: ProfileUserContext, collection_path: str) -> List[Dict[str, Any]]:
+    """List the collection in collection_path, store the ids of all its
+    resources in the resolution store (replacing what was known about it)
+    and return the listing."""
+    resources = rest_ops.list(f'{ctx.scheme}://{ctx.hostname}{collection_path}',
+                              headers=_headers(ctx),
+                              timeout=ctx.timeout)
+    if isinstance(resources, dict):
+        resources = resources.get('results', [])
+    resources = [r for r in resources if isinstance(r, dict)]
+    resource_ids = {resource_id_key(collection_path, r['name']): r.get('uuid', r.get('id'))
+                    for r in resources
+                    if 'name' in r and ('uuid' in r or 'id' in r)}
+    RESOLUTION_STORE.set_many(ctx, RESOURCE_IDS_NAMESPACE, resource_ids,
+                              path=collection_path, replace=True)
+    return resources
+
+
+def _lookup_resource_id(ctx: ProfileUserContext, collection_path: str, resource_name: str,
+                        *, fresh: bool) -> Tuple[Optional[str], bool]:
+    """Id of resource_name in the collection, or None, and whether it comes
+    from the resolution store"""
+    key = resource_id_key(collection_path, resource_name)
+    if not fresh and (resource_id := RESOLUTION_STORE.get(ctx, RESOURCE_IDS_NAMESPACE, key)):
+        return resource_id, True
+    # The whole listing is stored, so later lookups of its siblings are free
+    for resource in cache_collection_ids(ctx, collection_path):
+        if resource.get('name') == resource_name:
+            return resource.get('uuid', resource.get('id')), False
+    return None, False
+
+
+def _is_current(ctx: ProfileUserContext, resource_path: str, resource_name: str) -> bool:
+    """Whether the resource in resource_path still exists with that name"""
+    try:
+        resource = rest_ops.get(f'{ctx.scheme}://{ctx.hostname}{resource_path}',
+                                headers=_headers(ctx),
+                                timeout=ctx.timeout)
+    except HttpException as exc:
+        if exc.error_code != 404:
+            raise
+        return False
+    return not isinstance(resource, dict) or resource.get('name', resource_name) == resource_name
+
+
+def resolve_path(ctx: ProfileUserContext,
+                 path_spec: PathSpec,
+                 *,
+                 base_path='',
+                 fresh=False) -> ResolvedPath:
+    """Resolve a path spec like [('projects', 'myproject'), ('tables', 'mytable'),
+    ('transforms', None)] to the ids of the named resources and the path of the
+    last element.
+
+    Ids come from the resolution store when known. Otherwise the collection is
+    listed once and all its names are stored. A path resolved or checked in
+    the last DEFAULT_VERIFIED_TTL seconds is trusted, so a warm path costs no
+    requests. Past that, as find_resource does, the last named resource is
+    fetched by its id, which checks every stored id of its path: if it is gone
+    (404) or was renamed, the stored ids are stale and the path is resolved
+    again from fresh listings, as it is with fresh. A resource removed or
+    renamed by another client within the window is only noticed by the
+    request made with the returned path.
+    Raises ResourceNotFoundException (or the project, table or transform
+    subclass) when a name does not exist.
+    """
+    path = base_path or f'/config/v1/orgs/{ctx.org_id}/'
+    ids = []
+    # Last named resource, and whether a stored id was used
+    resource_path, checked_name, from_store = None, None, False
+    try:
+        for resource_kind, resource_name in path_spec:
+            path = f'{path}{resource_kind}/'
+            if resource_name is None:
+                break
+            resource_id, stored = _lookup_resource_id(ctx, path, resource_name, fresh=fresh)
+            if not resource_id:
+                exception_type, label = _NOT_FOUND.get(resource_kind,
+                                                       (ResourceNotFoundException, resource_kind))
+                raise exception_type(f'Cannot find {label} name: {resource_name}')
+            ids.append(resource_id)
+            path = resource_path = f'{path}{resource_id}/'
+            checked_name = resource_name
+            from_store = from_store or stored
+    except HttpException as exc:
+        # Listing a collection below a stale stored id fails with a 404
+        if not from_store or exc.error_code != 404:
+            raise
+        return resolve_path(ctx, path_spec, base_path=base_path, fresh=True)
+    verified_key = f'{resource_path}?name={checked_name}'
+    if from_store and not RESOLUTION_STORE.get(ctx, VERIFIED_PATHS_NAMESPACE, verified_key):
+        if not _is_current(ctx, resource_path, checked_name):
+            return resolve_path(ctx, path_spec, base_path=base_path, fresh=True)
+        from_store = False
+    if resource_path and not from_store:
+        # Kept with the collection of the last resource, so that a change on
+        # it or on a resource above drops the entry
+        RESOLUTION_STORE.set(ctx, VERIFIED_PATHS_NAMESPACE, verified_key, True,
+                             path=resource_path.rstrip('/').rpartition('/')[0],
+                             ttl=DEFAULT_VERIFIED_TTL)
+    return ResolvedPath(ids, path, f'{ctx.scheme}://{ctx.hostname}{path}')
+
+
+def resolve_paths(ctx: ProfileUserContext,
+                  path_specs: List[PathSpec],
+                  *,
+                  base_path='',
+                  max_workers=DEFAULT_RESOLVE_CONCURRENCY) -> List[ResolvedPath]:
+    """resolve_path for several independent path specs, concurrently"""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda path_spec: resolve_path(ctx, path_spec,
+                                                                base_path=base_path),
+                                 path_specs))
+
+
+def warm_resource_ids(ctx: ProfileUserContext,
+                      *,
+                      max_workers=DEFAULT_RESOLVE_CONCURRENCY) -> int:
+    """Store the ids of every project, table and transform of the org of ctx.
+    The tables of all projects, then the transforms of all tables, are listed
+    concurrently. Returns the number of resources stored."""
+    projects_path = f'/config/v1/orgs/{ctx.org_id}/projects/'
+    projects = cache_collection_ids(ctx, projects_path)
+    collection_paths = [f'{projects_path}{project["uuid"]}/tables/' for project in projects]
+    resolved = len(projects)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tables_listings = list(executor.map(lambda path: cache_collection_ids(ctx, path),
+                                            collection_paths))
+        transforms_paths = [f'{tables_path}{table["uuid"]}/transforms/'
+                            for tables_path, tables in zip(collection_paths, tables_listings)
+                            for table in tables]
+        transforms_listings = executor.map(lambda path: cache_collection_ids(ctx, path),
+                                           transforms_paths)
+        resolved += sum(len(tables) for tables in tables_listings)
+        resolved += sum(len(transforms) for transforms in transforms_listings)
+    return resolved
 
 
 def access_resource_detailed(ctx: ProfileUserContext,
@@ -0,0 +1,233 @@
+"""Revalidating on-disk cache for collection listings.
+
+Opt-in cache of the JSON bodies returned by rest_operations.list. Entries keep
+the ETag/Last-Modified validators sent by the server and are revalidated with
+a conditional request every time, so an unchanged collection costs a 304 with
+no body. Responses without validators are reused for a short TTL instead.
+
+Entries are keyed by url (so scheme, host and org), query parameters, Accept
+header and profile, not by the credentials, which change with every login.
+Each entry is one file: a JSON header line followed by the raw body. Files are
+kept in directories that follow the path of their url, one per path segment,
+so a change only visits the directories of its url and of the collections
+above it. Entries not used for max_age seconds, then the least recently used
+ones beyond max_size bytes, are evicted at most once per PRUNE_INTERVAL.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from .config_constants import HTTP_CACHE_DIR
+from .exceptions import HttpException
+from .logging import get_logger
+from .request_memo import memo_key, normalize_url
+
+logger = get_logger()
+
+__all__ = ['HttpDiskCache', 'HTTP_CACHE', 'DEFAULT_TTL', 'DEFAULT_MAX_AGE', 'DEFAULT_MAX_SIZE']
+
+DEFAULT_TTL = 15
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+PRUNE_INTERVAL = 3600
+
+_PRUNED_MARKER = 'pruned'
+
+
+def _directory_name(segment: str) -> str:
+    # The prefix keeps '.' and '..' segments and entry names out of the way
+    return '_' + quote(segment, safe='')
+
+
+class HttpDiskCache:
+    """Conditional GET cache stored in cache_dir. Disabled until enable() is called."""
+
+    def __init__(self, cache_dir: Path,
+                 ttl: float = DEFAULT_TTL,
+                 max_age: float = DEFAULT_MAX_AGE,
+                 max_size: int = DEFAULT_MAX_SIZE):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_size = max_size
+        self.profile = ''
+        self.enabled = False
+
+    def enable(self, profile: Optional[str] = None, ttl: Optional[float] = None) -> None:
+        if profile is not None:
+            self.profile = profile
+        if ttl is not None:
+            self.ttl = ttl
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def _url_dir(self, url) -> Path:
+        split_url = urlsplit(normalize_url(url))
+        url_dir = self.cache_dir / _directory_name(f'{split_url.scheme}://{split_url.netloc}')
+        for segment in split_url.path.split('/'):
+            if segment:
+                url_dir /= _directory_name(segment)
+        return url_dir
+
+    def _entry_path(self, url, headers, params) -> Path:
+        _, params_key, _, accept = memo_key(url, headers, params)
+        key = repr((self.profile, params_key, accept)).encode('utf-8')
+        return self._url_dir(url) / f'{hashlib.sha256(key).hexdigest()}.entry'
+
+    @staticmethod
+    def _touch(entry_path: Path) -> None:
+        # The modification time is the last use, for the eviction
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _read_entry(entry_path: Path) -> Tuple[Optional[Dict], Optional[bytes]]:
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                header = json.loads(entry_file.readline())
+                return header, entry_file.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def _write_entry(self, entry_path: Path, header: Dict, content: bytes) -> None:
+        try:
+            self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            entry_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=entry_path.parent)
+            with os.fdopen(file_descriptor, 'wb') as entry_file:
+                entry_file.write(json.dumps(header).encode('utf-8') + b'\n')
+                entry_file.write(content)
+            os.replace(temp_path, entry_path)
+        except OSError as exc:
+            logger.debug(f'Could not write http cache entry {entry_path}: {exc}')
+            return
+        self._prune_if_due()
+
+    def get(self, url, *, headers, timeout, params=None) -> bytes:
+        """GET url, answering from the cache when the server confirms (or the
+        TTL allows) that the stored body is still current."""
+        # requests is only imported by the commands that send requests
+        from .sessions import send_request  # pylint:disable=import-outside-toplevel
+        entry_path = self._entry_path(url, headers, params)
+        header, content = self._read_entry(entry_path)
+
+        request_headers = dict(headers or {})
+        if header:
+            has_validators = header.get('etag') or header.get('last_modified')
+            if not has_validators and time.time() - header['stored_at'] < self.ttl:
+                self._touch(entry_path)
+                return content
+            if etag := header.get('etag'):
+                request_headers['If-None-Match'] = etag
+            if last_modified := header.get('last_modified'):
+                request_headers['If-Modified-Since'] = last_modified
+
+        result = send_request('GET', url,
+                              headers=request_headers,
+                              params=params,
+                              timeout=timeout)
+        if result.status_code == 304 and header:
+            self._touch(entry_path)
+            return content
+        if result.status_code != 200:
+            raise HttpException(result.status_code, result.content)
+
+        self._write_entry(entry_path,
+                          {'url': normalize_url(url),
+                           'etag': result.headers.get('ETag'),
+                           'last_modified': result.headers.get('Last-Modified'),
+                           'stored_at': time.time()},
+                          result.content)
+        return result.content
+
+    def invalidate(self, url: str) -> None:
+        """Remove the entries affected by a change on url: those of url and
+        of the resources below it, then those of the collections above it"""
+        url_dir = self._url_dir(url)
+        shutil.rmtree(url_dir, ignore_errors=True)
+        for parent_dir in url_dir.parents:
+            if parent_dir == self.cache_dir:
+                break
+            for entry_path in parent_dir.glob('*.entry'):
+                try:
+                    entry_path.unlink()
+                except OSError:
+                    pass
+
+    def _iter_entries(self):
+        for entry_path in self.cache_dir.rglob('*.entry'):
+            try:
+                yield entry_path, entry_path.stat()
+            except OSError:
+                pass
+
+    def stats(self) -> Tuple[int, int]:
+        """Number of entries and their size in bytes"""
+        entries, size = 0, 0
+        for _, entry_stat in self._iter_entries():
+            entries += 1
+            size += entry_stat.st_size
+        return entries, size
+
+    def prune(self) -> None:
+        """Evict the entries not used for max_age seconds, then the least
+        recently used ones until the cache fits in max_size bytes"""
+        entries = sorted((entry_stat.st_mtime, entry_stat.st_size, entry_path)
+                         for entry_path, entry_stat in self._iter_entries())
+        total_size = sum(size for _, size, _ in entries)
+        oldest_use = time.time() - self.max_age
+        for used_at, size, entry_path in entries:
+            if used_at >= oldest_use and total_size <= self.max_size:
+                break
+            try:
+                entry_path.unlink()
+            except OSError:
+                continue
+            total_size -= size
+        for directory, _, _ in os.walk(self.cache_dir, topdown=False):
+            if directory != str(self.cache_dir):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    # Not empty
+                    pass
+
+    def _prune_if_due(self) -> None:
+        marker = self.cache_dir / _PRUNED_MARKER
+        try:
+            if time.time() - marker.stat().st_mtime < PRUNE_INTERVAL:
+                return
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return
+        try:
+            marker.touch()
+        except OSError:
+            return
+        self.prune()
+
+    def clear(self) -> None:
+        if not self.cache_dir.exists():
+            return
+        for child in self.cache_dir.iterdir():
+            if child.is_dir():
+                shutil.rmtree(child, ignore_errors=True)
+                continue
+            try:
+                child.unlink()
+            except OSError:
+                pass
+
+
+HTTP_CACHE = HttpDiskCache(HTTP_CACHE_DIR)
@@ -0,0 +1,171 @@
+"""Per-request timing trace of the REST layer (global --trace-http option).
+
+When enabled, every request sent through sessions.send_request is written as
+one JSON line to the trace file, and a latency summary per endpoint is printed
+to stderr when the process exits. Connection setup timings come from the
+traced urllib3 connection classes of sessions and a getaddrinfo wrapper, which
+are only installed while tracing. requests and urllib3 are not imported here,
+the module is loaded on every startup.
+"""
+import atexit
+import json
+import re
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+from urllib.parse import urlsplit
+
+__all__ = ['HttpTracer', 'HTTP_TRACE', 'CONNECTION_TIMINGS', 'path_template']
+
+_UUID_RE = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+                      r'[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+_NUMBER_SEGMENT_RE = re.compile(r'/\d+(?=/|$)')
+
+
+def path_template(url: str) -> str:
+    """Path of url with identifiers replaced, so requests to the same kind of
+    resource are grouped together"""
+    path = _UUID_RE.sub('{uuid}', urlsplit(url).path)
+    return _NUMBER_SEGMENT_RE.sub('/{id}', path)
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    index = max(0, int(round(percent / 100 * len(sorted_values))) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class _Timings(threading.local):
+    """Connection setup timings of the request in flight in this thread"""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+
+
+CONNECTION_TIMINGS = _Timings()
+
+
+def _body_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, str)):
+        return len(body)
+    # Streamed bodies have no size known in advance
+    return 0
+
+
+def _response_size(response) -> int:
+    if response._content_consumed and response._content:
+        return len(response._content)
+    return int(response.headers.get('Content-Length') or 0)
+
+
+class HttpTracer:
+    """Collects one record per request. Disabled until enable() is called,
+    which must happen before the first request is sent."""
+
+    def __init__(self):
+        self.enabled = False
+        self.records: List[Dict[str, Any]] = []
+        self._trace_file = None
+        self._lock = threading.Lock()
+        self._getaddrinfo = None
+
+    def enable(self, trace_path: str) -> None:
+        if self.enabled:
+            # Commands run in-process by a script or the daemon share the trace
+            return
+        self._trace_file = open(trace_path, 'a', encoding='utf-8')
+        self.enabled = True
+        self.records = []
+        self._getaddrinfo = socket.getaddrinfo
+        socket.getaddrinfo = self._timed_getaddrinfo
+        atexit.register(self.finish)
+
+    def _timed_getaddrinfo(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._getaddrinfo(*args, **kwargs)
+        finally:
+            CONNECTION_TIMINGS.dns += time.perf_counter() - start
+
+    def trace(self,
+              method: str,
+              url: str,
+              call: Callable[[], Any],
+              *,
+              attempts: Callable[[], int]):
+        """Run call (which sends the request, retries included) and record it"""
+        CONNECTION_TIMINGS.reset()
+        start = time.perf_counter()
+        response = None
+        error = None
+        try:
+            response = call()
+            return response
+        except Exception as exc:
+            error = type(exc).__name__
+            raise
+        finally:
+            total = time.perf_counter() - start
+            setup = CONNECTION_TIMINGS.dns + CONNECTION_TIMINGS.connect + CONNECTION_TIMINGS.tls
+            elapsed = response.elapsed.total_seconds() if response is not None else None
+            self.record({
+                'method': method,
+                'path': path_template(url),
+                'status': response.status_code if response is not None else None,
+                'error': error,
+                'bytes_out': _body_size(response.request.body) if response is not None else 0,
+                'bytes_in': _response_size(response) if response is not None else 0,
+                'dns': round(CONNECTION_TIMINGS.dns, 6),
+                'connect': round(CONNECTION_TIMINGS.connect, 6),
+                'tls': round(CONNECTION_TIMINGS.tls, 6),
+                'ttfb': round(max(0.0, elapsed - setup), 6) if elapsed is not None else None,
+                'total': round(total, 6),
+                'retries': max(0, attempts() - 1),
+            })
+
+    def record(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.records.append(record)
+            if self._trace_file:
+                self._trace_file.write(json.dumps(record) + '\n')
+                self._trace_file.flush()
+
+    def summary(self) -> str:
+        by_endpoint = defaultdict(list)
+        for record in self.records:
+            by_endpoint[(record['method'], record['path'])].append(record['total'] * 1000)
+
+        width = max([len('ENDPOINT')] + [len(f'{method} {path}') for method, path in by_endpoint])
+        header = f"{'ENDPOINT':<{width}} {'COUNT':>6} {'P50 ms':>9} {'P95 ms':>9} {'P99 ms':>9}"
+        lines = [header, '-' * len(header)]
+        for (method, path), latencies in sorted(by_endpoint.items(),
+                                                key=lambda item: -sum(item[1])):
+            latencies.sort()
+            lines.append(f'{f"{method} {path}":<{width}} {len(latencies):>6} '
+                         f'{_percentile(latencies, 50):>9.1f} '
+                         f'{_percentile(latencies, 95):>9.1f} '
+                         f'{_percentile(latencies, 99):>9.1f}')
+        lines.append(f'{len(self.records)} requests')
+        return '\n'.join(lines)
+
+    def finish(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        socket.getaddrinfo = self._getaddrinfo
+        if self._trace_file:
+            self._trace_file.close()
+            self._trace_file = None
+        if self.records:
+            print(self.summary(), file=sys.stderr)
+
+
+HTTP_TRACE = HttpTracer()
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 import json
-from getpass import getpass
+import getpass
 
 
 import requests as req
@@ -8,6 +8,7 @@ import requests as req
 from ..userdata.token import AuthInfo
 from .exceptions import LoginException, HdxCliException, LogicException
 from .logging import get_logger
+from .sessions import send_request
 
 logger = get_logger()
 
@@ -21,9 +22,11 @@ def _do_login(username, hostname,
         url = f'{scheme}://{hostname}/config/v1/login'
         login_data = {'username': f'{username}',
                       'password': f'{password}'}
-        result = req.post(url, json=login_data,
-                          headers={'Accept': 'application/json'},
-                          timeout=15)
+        # Logging in again only issues another token, so it is safe to retry
+        result = send_request('POST', url, json=login_data,
+                              headers={'Accept': 'application/json'},
+                              timeout=15,
+                              idempotent=True)
     except req.ConnectTimeout as exc:
         raise HdxCliException("Timeout exception.") from exc
     except req.ConnectionError as exc:
@@ -49,7 +52,7 @@ def _do_login(username, hostname,
 def _do_interactive_login(username, hostname,
                           *,
                           use_ssl):
-    password = getpass(f'Enter your password ({hostname}): ')
+    password = getpass.getpass(f'Enter your password ({hostname}): ')
     return _do_login(username, hostname,
                      use_ssl=use_ssl,
                      password=password)
@@ -0,0 +1,91 @@
+"""multipart/form-data bodies read from their file as they are sent.
+
+requests builds the whole body of files= uploads in memory. MultipartFileBody
+is passed as data= instead: it is a file-like object that produces the form
+fields, then the file, chunk by chunk, with a Content-Length known in
+advance, and it can be rewound for a retry.
+"""
+import io
+import os
+from typing import BinaryIO, Dict, Optional, Union
+
+from urllib3.filepost import choose_boundary
+
+__all__ = ['MultipartFileBody']
+
+
+class MultipartFileBody(io.RawIOBase):
+    """Body with the given form fields and file_stream as the 'file' field,
+    the same one requests sends for files={'file': file_stream}.
+    file_stream is read from its current position."""
+
+    def __init__(self,
+                 file_stream: Union[BinaryIO, bytes],
+                 fields: Optional[Dict[str, Optional[str]]] = None,
+                 file_field: str = 'file'):
+        super().__init__()
+        if isinstance(file_stream, (bytes, bytearray)):
+            file_stream = io.BytesIO(file_stream)
+        self._file = file_stream
+        self._file_start = file_stream.tell()
+        self._file_size = file_stream.seek(0, os.SEEK_END) - self._file_start
+        file_stream.seek(self._file_start)
+
+        boundary = choose_boundary()
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        head = io.BytesIO()
+        for name, value in (fields or {}).items():
+            # As requests does, fields without a value are left out
+            if value is None:
+                continue
+            head.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"'
+                       f'\r\n\r\n{value}\r\n'.encode('utf-8'))
+        filename = getattr(file_stream, 'name', None)
+        if not isinstance(filename, str) or filename.startswith('<'):
+            filename = file_field
+        head.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+                   f'filename="{os.path.basename(filename)}"\r\n\r\n'.encode('utf-8'))
+        self._head = head.getvalue()
+        self._tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        self._position = 0
+
+    def __len__(self) -> int:
+        return len(self._head) + self._file_size + len(self._tail)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += len(self)
+        self._position = min(max(0, offset), len(self))
+        file_offset = min(max(0, self._position - len(self._head)), self._file_size)
+        self._file.seek(self._file_start + file_offset)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer)
+        written = 0
+        while written < len(view) and self._position < len(self):
+            file_end = len(self._head) + self._file_size
+            if self._position < len(self._head):
+                chunk = self._head[self._position:self._position + len(view) - written]
+            elif self._position < file_end:
+                chunk = self._file.read(min(len(view) - written, file_end - self._position))
+                if not chunk:
+                    raise IOError('The uploaded file was truncated while it was sent.')
+            else:
+                offset = self._position - file_end
+                chunk = self._tail[offset:offset + len(view) - written]
+            view[written:written + len(chunk)] = chunk
+            written += len(chunk)
+            self._position += len(chunk)
+        return written
@@ -6,6 +6,7 @@ from pathlib import Path
 
 import toml
 
+from .config_files import forget_toml_file
 from .context import ProfileUserContext
 from .exceptions import HdxCliException
 from .logging import get_logger
@@ -93,6 +94,7 @@ def save_profile(username: str,
     os.makedirs(Path(profile_config_file).parent, exist_ok=True)
     with open(profile_config_file, 'w+', encoding='utf-8') as config_file:
         toml.dump(initial_profile, config_file)
+    forget_toml_file(profile_config_file)
 
     _delete_authorization_file(profilename, profile_config_file)
 
@@ -118,6 +120,7 @@ def delete_profile(profile_name: str,
 
     with open(profile_config_file, 'w+', encoding='utf-8') as config_file:
         toml.dump(initial_profile, config_file)
+    forget_toml_file(profile_config_file)
 
     _delete_authorization_file(profile_name, profile_config_file)
 
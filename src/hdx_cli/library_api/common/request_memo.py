@@ -0,0 +1,94 @@
+import threading
+from typing import Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import urlsplit
+
+__all__ = ['ResponseMemo', 'RESPONSE_MEMO', 'memo_key', 'normalize_url', 'is_affected_by']
+
+
+def normalize_url(url: str) -> str:
+    split_url = urlsplit(url)
+    return f'{split_url.scheme}://{split_url.netloc}{split_url.path.rstrip("/")}'
+
+
+def is_affected_by(entry_url: str, changed_url: str) -> bool:
+    """Whether a GET on entry_url may return something different after a change
+    on changed_url: it is the same url, a collection above it or a resource
+    below it. Both urls must be normalized."""
+    return (entry_url == changed_url or
+            entry_url.startswith(changed_url + '/') or
+            changed_url.startswith(entry_url + '/'))
+
+
+def memo_key(url: str,
+             headers: Optional[Dict[str, str]],
+             params: Optional[Dict] = None) -> Tuple:
+    """Key a GET by url, query parameters and the headers that change the
+    response (credentials and content negotiation)."""
+    headers = headers or {}
+    params_key = tuple(sorted((str(key), str(value))
+                              for key, value in (params or {}).items()
+                              if value is not None))
+    return (url, params_key, headers.get('Authorization'), headers.get('Accept'))
+
+
+class ResponseMemo:
+    """Memo of GET response bodies for the life of one invocation.
+
+    Identical GETs are issued once: concurrent callers wait for the request
+    already in flight and later callers reuse the stored body. Bodies are kept
+    as bytes, so every caller decodes its own copy and can mutate it freely.
+    Any mutating call on a url drops the entries of that url, its ancestors
+    (the collections listing it) and its descendants.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, bytes] = {}
+        self._urls: Dict[Hashable, str] = {}
+        self._in_flight: Dict[Hashable, threading.Event] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], bytes]) -> bytes:
+        """Return the memoized body for key, calling fetch (once) if needed"""
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    return self._entries[key]
+                in_flight = self._in_flight.get(key)
+                if not in_flight:
+                    in_flight = self._in_flight[key] = threading.Event()
+                    break
+            # Another thread is fetching the same resource. If it fails, the
+            # loop tries again and this thread does the request by itself.
+            in_flight.wait()
+
+        try:
+            content = fetch()
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = content
+                self._urls[key] = normalize_url(key[0])
+            return content
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.set()
+
+    def invalidate(self, url: str) -> None:
+        """Forget the entries affected by a change on url"""
+        changed_url = normalize_url(url)
+        with self._lock:
+            for key, entry_url in tuple(self._urls.items()):
+                if is_affected_by(entry_url, changed_url):
+                    del self._urls[key]
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._urls.clear()
+
+
+RESPONSE_MEMO = ResponseMemo()
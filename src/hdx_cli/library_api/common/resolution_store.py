@@ -0,0 +1,262 @@
+"""Persistent name -> id resolution store.
+
+Lookups of project, table, transform and other resource ids by name are kept
+in a SQLite database under HDX_CONFIG_DIR/cache. Entries are scoped by host,
+org, profile and namespace and expire after a TTL. Misses (empty results) are
+stored too, with a much shorter TTL, so a resource created right after a
+failed lookup is found soon.
+
+Every entry records the collection it was resolved from. A mutating request
+on that collection, on a resource above it or on a resource below it drops
+the entry (see invalidate), in this process and for later ones.
+
+The database runs in WAL mode and every write is its own small transaction,
+so concurrent hdxcli invocations can read and write it without clobbering
+each other's entries.
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from .config_constants import RESOLUTION_STORE_FILE
+from .logging import get_logger
+
+logger = get_logger()
+
+__all__ = ['ResolutionStore', 'RESOLUTION_STORE', 'DEFAULT_TTL', 'DEFAULT_NEGATIVE_TTL']
+
+DEFAULT_TTL = 3600
+DEFAULT_NEGATIVE_TTL = 60
+
+_SCHEMA_VERSION = 3
+
+_SCHEMA = """
+DROP TABLE IF EXISTS entries;
+DROP TABLE IF EXISTS counters;
+CREATE TABLE entries (
+    host TEXT NOT NULL,
+    org TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    path TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (host, org, profile, namespace, key)
+);
+CREATE INDEX entries_expires_at ON entries (expires_at);
+CREATE TABLE counters (
+    host TEXT NOT NULL,
+    org TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (host, org, profile, namespace)
+);
+PRAGMA user_version = %d;
+""" % _SCHEMA_VERSION
+
+
+def _is_resolution_affected(collection_path: str, changed_path: str) -> bool:
+    """Whether names resolved from collection_path may change after a change
+    on changed_path: the collection itself, one of its members or a resource
+    above it. Changes deeper below a member (its own collections or actions
+    like truncate) do not rename or remove the member."""
+    if changed_path == collection_path or collection_path.startswith(changed_path + '/'):
+        return True
+    parent_path, _, _ = changed_path.rpartition('/')
+    return parent_path == collection_path
+
+
+def _scope(user_ctx):
+    return (user_ctx.hostname or '', user_ctx.org_id or '', user_ctx.profilename or '')
+
+
+class ResolutionStore:
+    """Name -> id store in db_path. The database is opened on first use; if it
+    cannot be opened, every lookup is a miss and writes are dropped."""
+
+    def __init__(self, db_path: Path,
+                 ttl: float = DEFAULT_TTL,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL):
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._unavailable = False
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop reading and writing entries until enable() is called"""
+        self.enabled = False
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if not self.enabled:
+            return None
+        if self._connection or self._unavailable:
+            return self._connection
+        try:
+            self.db_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path,
+                                         timeout=5,
+                                         isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            if connection.execute('PRAGMA user_version').fetchone()[0] != _SCHEMA_VERSION:
+                connection.executescript(_SCHEMA)
+            connection.execute('DELETE FROM entries WHERE expires_at < ?', (time.time(),))
+        except sqlite3.Error as exc:
+            logger.debug(f'Resolution store {self.db_path} unavailable: {exc}')
+            self._unavailable = True
+            return None
+        self._connection = connection
+        return connection
+
+    def _execute(self, statement: str, parameters=()) -> list:
+        with self._lock:
+            if not (connection := self._connect()):
+                return []
+            try:
+                return connection.execute(statement, parameters).fetchall()
+            except sqlite3.Error as exc:
+                logger.debug(f'Resolution store error: {exc}')
+                return []
+
+    def _count(self, user_ctx, namespace: str, column: str) -> None:
+        self._execute(f'INSERT INTO counters (host, org, profile, namespace, {column}) '
+                      f'VALUES (?, ?, ?, ?, 1) '
+                      f'ON CONFLICT (host, org, profile, namespace) '
+                      f'DO UPDATE SET {column} = {column} + 1',
+                      (*_scope(user_ctx), namespace))
+
+    def get(self, user_ctx, namespace: str, key: str) -> Optional[Any]:
+        """Stored value for key, or None if absent or expired. Negative entries
+        are returned as stored (an empty list, for instance), not as None."""
+        rows = self._execute('SELECT value FROM entries '
+                             'WHERE host = ? AND org = ? AND profile = ? AND namespace = ? '
+                             'AND key = ? AND expires_at >= ?',
+                             (*_scope(user_ctx), namespace, key, time.time()))
+        if not rows:
+            self._count(user_ctx, namespace, 'misses')
+            return None
+        self._count(user_ctx, namespace, 'hits')
+        return json.loads(rows[0][0])
+
+    def set(self, user_ctx, namespace: str, key: str, value: Any,
+            *,
+            path: Optional[str] = None,
+            ttl: Optional[float] = None,
+            negative_ttl: Optional[float] = None) -> None:
+        """Store value for key, resolved from the collection in path. Entries
+        without a path are dropped by any change on the host. Falsy values are
+        negative entries and use negative_ttl."""
+        if value:
+            lifetime = self.ttl if ttl is None else ttl
+        else:
+            lifetime = self.negative_ttl if negative_ttl is None else negative_ttl
+        self._execute('INSERT OR REPLACE INTO entries '
+                      '(host, org, profile, namespace, key, value, path, expires_at) '
+                      'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                      (*_scope(user_ctx), namespace, key, json.dumps(value),
+                       (path or '').rstrip('/'), time.time() + lifetime))
+
+    def set_many(self, user_ctx, namespace: str, values: Dict[str, Any],
+                 *,
+                 path: Optional[str] = None,
+                 replace: bool = False) -> None:
+        """Store several positive entries resolved from the same collection in
+        a single transaction. With replace, the other entries of the collection
+        in namespace are removed: values is its complete listing."""
+        expires_at = time.time() + self.ttl
+        rows = [(*_scope(user_ctx), namespace, key, json.dumps(value),
+                 (path or '').rstrip('/'), expires_at)
+                for key, value in values.items()]
+        with self._lock:
+            if not (connection := self._connect()):
+                return
+            try:
+                with connection:
+                    connection.execute('BEGIN')
+                    if replace:
+                        connection.execute('DELETE FROM entries WHERE host = ? AND org = ? '
+                                           'AND profile = ? AND namespace = ? AND path = ?',
+                                           (*_scope(user_ctx), namespace,
+                                            (path or '').rstrip('/')))
+                    connection.executemany('INSERT OR REPLACE INTO entries '
+                                           '(host, org, profile, namespace, key, value, path, '
+                                           'expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                           rows)
+            except sqlite3.Error as exc:
+                logger.debug(f'Resolution store error: {exc}')
+
+    def remove(self, user_ctx, namespace: str, key: str) -> None:
+        self._execute('DELETE FROM entries '
+                      'WHERE host = ? AND org = ? AND profile = ? AND namespace = ? AND key = ?',
+                      (*_scope(user_ctx), namespace, key))
+
+    def invalidate(self, url: str) -> None:
+        """Remove the entries of every profile that a change on url may make stale"""
+        split_url = urlsplit(url)
+        changed_path = split_url.path.rstrip('/')
+        stale_rows = [(rowid,) for rowid, path in
+                      self._execute('SELECT rowid, path FROM entries WHERE host = ?',
+                                    (split_url.netloc,))
+                      if not path or _is_resolution_affected(path, changed_path)]
+        if not stale_rows:
+            return
+        with self._lock:
+            if not (connection := self._connect()):
+                return
+            try:
+                connection.executemany('DELETE FROM entries WHERE rowid = ?', stale_rows)
+            except sqlite3.Error as exc:
+                logger.debug(f'Resolution store error: {exc}')
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Live entries, their size in bytes, hits and misses per host, profile
+        and namespace"""
+        scopes = {}
+        for host, profile, namespace, entries, size in self._execute(
+                'SELECT host, profile, namespace, COUNT(*), '
+                'SUM(LENGTH(key) + LENGTH(value) + LENGTH(path)) FROM entries '
+                'WHERE expires_at >= ? GROUP BY host, profile, namespace',
+                (time.time(),)):
+            scopes[(host, profile, namespace)] = {'entries': entries, 'size': size,
+                                                  'hits': 0, 'misses': 0}
+        for host, profile, namespace, hits, misses in self._execute(
+                'SELECT host, profile, namespace, SUM(hits), SUM(misses) FROM counters '
+                'GROUP BY host, profile, namespace'):
+            scope = scopes.setdefault((host, profile, namespace),
+                                      {'entries': 0, 'size': 0})
+            scope.update(hits=hits, misses=misses)
+        return [{'host': host, 'profile': profile, 'namespace': namespace, **scope}
+                for (host, profile, namespace), scope in sorted(scopes.items())]
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Remove all entries and counters, or only those of namespace"""
+        if namespace is None:
+            self._execute('DELETE FROM entries')
+            self._execute('DELETE FROM counters')
+            return
+        self._execute('DELETE FROM entries WHERE namespace = ?', (namespace,))
+        self._execute('DELETE FROM counters WHERE namespace = ?', (namespace,))
+
+    def size_on_disk(self) -> int:
+        """Bytes used by the database and its write-ahead log"""
+        return sum(path.stat().st_size
+                   for path in (self.db_path,
+                                self.db_path.with_name(self.db_path.name + '-wal'))
+                   if path.exists())
+
+
+RESOLUTION_STORE = ResolutionStore(RESOLUTION_STORE_FILE)
@@ -1,27 +1,55 @@
-import time
-from typing import Dict, Any, Union
+from typing import Dict, Any, BinaryIO, Optional, Union
 import json
-import requests
+import zlib
 from requests import RequestException
 
-from .exceptions import HdxCliException, HttpException
+from ..utility.json_util import json_loads
+from .exceptions import CircuitOpenException, HdxCliException, HttpException
+from .http_cache import HTTP_CACHE
+from .multipart import MultipartFileBody
+from .request_memo import RESPONSE_MEMO, memo_key
+from .resolution_store import RESOLUTION_STORE
+from .sessions import send_request
+from .snapshot import SNAPSHOT
 
 Headers = Dict[str, str]
 
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# zlib window bits for each kind of compressed payload
+_DECOMPRESS_WBITS = {'gzip': zlib.MAX_WBITS | 16,
+                     'deflate': zlib.MAX_WBITS,
+                     'auto': zlib.MAX_WBITS | 32}
+
+
+def invalidate(url):
+    """Drop the cached GETs and name -> id resolutions that a change on url
+    makes stale. Every mutating call goes through here, async_rest_operations
+    included."""
+    RESPONSE_MEMO.invalidate(url)
+    HTTP_CACHE.invalidate(url)
+    RESOLUTION_STORE.invalidate(url)
+
 
 def create(url: str, *,
            headers: Headers,
            timeout,
            body: Union[Dict[str, Any], bytes] = None,
-           body_type='json'):
+           body_type='json',
+           idempotent=False):
+    if SNAPSHOT.active:
+        SNAPSHOT.refuse('POST', url)
     if body_type == 'json':
-        result = requests.post(url, json=body,
-                               headers=headers,
-                               timeout=timeout)
+        result = send_request('POST', url, json=body,
+                              headers=headers,
+                              timeout=timeout,
+                              idempotent=idempotent)
     else:
-        result = requests.post(url, data=body,
-                               headers=headers,
-                               timeout=timeout)
+        result = send_request('POST', url, data=body,
+                              headers=headers,
+                              timeout=timeout,
+                              idempotent=idempotent)
+    invalidate(url)
 
     if result.status_code not in (201, 200):
         raise HttpException(result.status_code, result.content)
@@ -31,10 +59,17 @@ def create_file(url: str, *,
                 headers: Headers,
                 file_stream,
                 remote_filename,
-                timeout):
-    result = requests.post(url, files={'file': file_stream}, data={'name': remote_filename},
-                           headers=headers,
-                           timeout=timeout)
+                timeout,
+                idempotent=False):
+    if SNAPSHOT.active:
+        SNAPSHOT.refuse('POST', url)
+    # Sent from the file as it is read, requests would build it in memory
+    body = MultipartFileBody(file_stream, fields={'name': remote_filename})
+    result = send_request('POST', url, data=body,
+                          headers={**headers, 'Content-Type': body.content_type},
+                          timeout=timeout,
+                          idempotent=idempotent)
+    invalidate(url)
 
     if result.status_code not in (201, 200):
         raise HttpException(result.status_code, result.content)
@@ -44,23 +79,19 @@ def post_with_retries(url: str,
                       data: dict,
                       user: str = None,
                       password: str = None,
-                      retries: int = 3,
-                      backoff_factor: float = 0.5,
                       timeout: int = 30
                       ):
+    """POST retried by the global retry policy as if it were idempotent.
+    Returns the last response, or None if no response was received, the
+    circuit breaker of the host included."""
+    if SNAPSHOT.active:
+        SNAPSHOT.refuse('POST', url)
     auth = (user, password) if user and password else None
-
-    for attempt in range(retries):
-        response = None
-        try:
-            response = requests.post(url, json=data, timeout=timeout, auth=auth)
-            response.raise_for_status()
-            return response
-        except RequestException:
-            if attempt >= retries - 1:
-                return response
-            sleep_time = backoff_factor * (2 ** attempt)
-            time.sleep(sleep_time)
+    try:
+        return send_request('POST', url, json=data, timeout=timeout, auth=auth,
+                            idempotent=True)
+    except (RequestException, CircuitOpenException):
+        return None
 
 
 def update_with_patch(url, *,
@@ -68,11 +99,14 @@ def update_with_patch(url, *,
                       timeout,
                       body,
                       params):
-    result = requests.patch(url,
-                            json=body,
-                            headers=headers,
-                            params=params,
-                            timeout=timeout)
+    if SNAPSHOT.active:
+        SNAPSHOT.refuse('PATCH', url)
+    result = send_request('PATCH', url,
+                          json=body,
+                          headers=headers,
+                          params=params,
+                          timeout=timeout)
+    invalidate(url)
     if result.status_code != 200:
         raise HttpException(result.status_code, result.content)
 
@@ -82,11 +116,14 @@ def update_with_put(url, *,
                     timeout,
                     body,
                     params):
-    result = requests.put(url,
+    if SNAPSHOT.active:
+        SNAPSHOT.refuse('PUT', url)
+    result = send_request('PUT', url,
                           json=body,
                           headers=headers,
                           params=params,
                           timeout=timeout)
+    invalidate(url)
     if result.status_code != 200:
         raise HttpException(result.status_code, result.content)
 
@@ -95,40 +132,98 @@ def list(url, *,
          headers,
          fmt='json',
          timeout,
-         params=None):
-    result = requests.get(url,
-                          headers=headers,
-                          params=params,
-                          timeout=timeout)
-    if result.status_code != 200:
-        raise HttpException(result.status_code, result.content)
-    if fmt == 'json':
-        return json.loads(result.content)
-    return result.content
+         params=None,
+         memo=True):
+    """GET url. JSON bodies are memoized for the process unless memo is
+    False, for pages that are read once, like those of long listings."""
+    if SNAPSHOT.active:
+        if fmt != 'json':
+            SNAPSHOT.refuse('GET', url)
+        return SNAPSHOT.get(url)
+
+    def _fetch():
+        if HTTP_CACHE.enabled and fmt == 'json':
+            return HTTP_CACHE.get(url, headers=headers, timeout=timeout, params=params)
+        result = send_request('GET', url,
+                              headers=headers,
+                              params=params,
+                              timeout=timeout)
+        if result.status_code != 200:
+            raise HttpException(result.status_code, result.content)
+        return result.content
+
+    if fmt != 'json':
+        # Exports and downloads can be large and are not requested twice
+        return _fetch()
+    if not memo:
+        return json_loads(_fetch())
+    return json_loads(RESPONSE_MEMO.get_or_fetch(memo_key(url, headers, params), _fetch))
 
 
 get = list
 
 
+def download(url, *,
+             headers,
+             timeout,
+             file_obj: BinaryIO,
+             params=None,
+             decompress: Optional[str] = None,
+             chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> int:
+    """Stream the body of a GET into file_obj (a file, pipe or any writable
+    binary object) chunk by chunk, so the response is never held in memory.
+    decompress ('gzip', 'deflate' or 'auto') inflates a compressed payload on
+    the fly; Content-Encoding is always handled by the transport.
+    Returns the number of bytes written."""
+    if SNAPSHOT.active:
+        SNAPSHOT.refuse('GET', url)
+    result = send_request('GET', url,
+                          headers=headers,
+                          params=params,
+                          timeout=timeout,
+                          stream=True)
+    with result:
+        if result.status_code != 200:
+            raise HttpException(result.status_code, result.content)
+
+        decompressor = zlib.decompressobj(_DECOMPRESS_WBITS[decompress]) if decompress else None
+        written = 0
+        for chunk in result.iter_content(chunk_size=chunk_size):
+            if decompressor:
+                chunk = decompressor.decompress(chunk)
+            file_obj.write(chunk)
+            written += len(chunk)
+        if decompressor:
+            chunk = decompressor.flush()
+            file_obj.write(chunk)
+            written += len(chunk)
+    return written
+
+
 def options(url, *,
             headers,
             timeout):
-    result = requests.options(url,
-                              headers=headers,
-                              timeout=timeout)
+    if SNAPSHOT.active:
+        return SNAPSHOT.options(url)
+    result = send_request('OPTIONS', url,
+                          headers=headers,
+                          timeout=timeout)
     if result.status_code != 200:
         raise HttpException(result.status_code, result.content)
-    return json.loads(result.content)
+    return json_loads(result.content)
 
 
 def delete(url, *,
            headers,
            timeout,
            params=None):
-    result = requests.delete(url,
-                             headers=headers,
-                             params=params,
-                             timeout=timeout)
+    if SNAPSHOT.active:
+        SNAPSHOT.refuse('DELETE', url)
+    result = send_request('DELETE', url,
+                          headers=headers,
+                          params=params,
+                          timeout=timeout)
+    invalidate(url)
     if result.status_code != 204:
         raise HttpException(result.status_code, result.content)
     return json.loads('{}')
@@ -0,0 +1,212 @@
+"""Retry policy shared by every call of the REST layer.
+
+Failed requests are retried with exponential backoff and full jitter,
+honoring Retry-After when the server sends it. Requests that are not
+idempotent are only retried when the server guarantees they were not
+processed (429/503) or when the connection could not be established.
+A per-host circuit breaker makes calls fail fast after too many consecutive
+failures, instead of hammering a cluster that is down.
+"""
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Mapping, Optional, Tuple, Type
+from urllib.parse import urlsplit
+
+from .exceptions import CircuitOpenException
+from .logging import get_logger
+
+logger = get_logger()
+
+__all__ = ['RetryPolicy', 'RETRY_POLICY', 'configure_retry_policy', 'DEFAULT_RETRIES']
+
+DEFAULT_RETRIES = 2
+
+# Statuses meaning the request was not processed, safe to retry for any method
+_NOT_PROCESSED_STATUSES = frozenset({429, 503})
+
+
+def _retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    if not (retry_after := headers.get('Retry-After')):
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class _CircuitState:
+    consecutive_failures: int = 0
+    opened_at: Optional[float] = None
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = DEFAULT_RETRIES + 1
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    retry_statuses: FrozenSet[int] = frozenset({408, 429, 500, 502, 503, 504})
+    # Maximum number of retries for the whole process, None means unlimited
+    budget: Optional[int] = None
+    breaker_threshold: int = 5
+    breaker_cooldown: float = 30.0
+    retries_done: int = 0
+    _circuits: Dict[str, _CircuitState] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: a random delay up to the exponential backoff of attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _take_retry(self) -> bool:
+        with self._lock:
+            if self.budget is not None and self.retries_done >= self.budget:
+                return False
+            self.retries_done += 1
+            return True
+
+    def _check_circuit(self, host: str) -> None:
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if not circuit or circuit.opened_at is None:
+                return
+            if time.monotonic() - circuit.opened_at < self.breaker_cooldown:
+                raise CircuitOpenException(
+                    f'Too many consecutive failures talking to {host}. '
+                    f'Requests are paused for {self.breaker_cooldown:.0f} seconds.')
+            # Half-open: let this request through, one more failure reopens it
+            circuit.opened_at = None
+            circuit.consecutive_failures = self.breaker_threshold - 1
+
+    def _record(self, host: str, success: bool) -> None:
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _CircuitState())
+            if success:
+                circuit.consecutive_failures = 0
+                circuit.opened_at = None
+                return
+            circuit.consecutive_failures += 1
+            if circuit.consecutive_failures >= self.breaker_threshold:
+                circuit.opened_at = time.monotonic()
+
+    def _retry_statuses(self, idempotent: bool,
+                        retry_statuses: Optional[FrozenSet[int]]) -> FrozenSet[int]:
+        retry_statuses = self.retry_statuses if retry_statuses is None else retry_statuses
+        if not idempotent:
+            retry_statuses = retry_statuses & _NOT_PROCESSED_STATUSES
+        return retry_statuses
+
+    def _delay_after_error(self, host: str, attempt: int, safe_to_retry: bool) -> Optional[float]:
+        """Seconds to wait before retrying after a transport error, or None
+        if the error must be raised"""
+        self._record(host, success=False)
+        if attempt == self.max_attempts - 1 or not safe_to_retry or not self._take_retry():
+            return None
+        return self.backoff(attempt)
+
+    def _delay_after_status(self, host: str, attempt: int, status: int,
+                            headers: Mapping[str, str],
+                            retry_statuses: FrozenSet[int]) -> Optional[float]:
+        """Seconds to wait before retrying after a response with status, or
+        None if the response must be returned"""
+        if status not in retry_statuses:
+            self._record(host, success=status < 500)
+            return None
+        self._record(host, success=False)
+        if attempt == self.max_attempts - 1 or not self._take_retry():
+            return None
+        delay = self.backoff(attempt)
+        if (retry_after := _retry_after_seconds(headers)) is not None:
+            delay = min(self.backoff_max, max(delay, retry_after))
+        return delay
+
+    def call(self,
+             send: Callable[[], 'requests.Response'],
+             *,
+             url: str,
+             idempotent: bool = True,
+             retry_statuses: Optional[FrozenSet[int]] = None) -> 'requests.Response':
+        """Call send() until it returns a response that must not be retried,
+        attempts are exhausted or the retry budget runs out. The last
+        response is returned and the last exception is raised."""
+        # Already imported by the caller, not on every startup
+        import requests  # pylint:disable=import-outside-toplevel
+        host = urlsplit(url).netloc
+        retry_statuses = self._retry_statuses(idempotent, retry_statuses)
+
+        for attempt in range(self.max_attempts):
+            self._check_circuit(host)
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                safe_to_retry = idempotent or isinstance(exc, requests.ConnectTimeout)
+                if (delay := self._delay_after_error(host, attempt, safe_to_retry)) is None:
+                    raise
+                logger.debug(f'Retrying {url} in {delay:.2f}s after error: {exc}')
+                time.sleep(delay)
+                continue
+
+            delay = self._delay_after_status(host, attempt, response.status_code,
+                                             response.headers, retry_statuses)
+            if delay is None:
+                return response
+            # Release the connection of a discarded (possibly streamed) response
+            response.close()
+            logger.debug(f'Retrying {url} in {delay:.2f}s after status {response.status_code}')
+            time.sleep(delay)
+        assert False, "Unreachable code"
+
+    async def call_async(self,
+                         send: Callable[[], Awaitable[Tuple[int, Mapping[str, str], Any]]],
+                         *,
+                         url: str,
+                         idempotent: bool = True,
+                         retry_statuses: Optional[FrozenSet[int]] = None,
+                         errors: Tuple[Type[BaseException], ...] = (),
+                         connect_errors: Tuple[Type[BaseException], ...] = ()
+                         ) -> Tuple[int, Mapping[str, str], Any]:
+        """Coroutine counterpart of call, for asyncio transports. send()
+        returns (status, headers, body) with the body already read. errors
+        are the transport errors worth a retry, and connect_errors those
+        raised before the request was sent, retried for any method."""
+        host = urlsplit(url).netloc
+        retry_statuses = self._retry_statuses(idempotent, retry_statuses)
+
+        for attempt in range(self.max_attempts):
+            self._check_circuit(host)
+            try:
+                status, headers, body = await send()
+            except errors as exc:
+                safe_to_retry = idempotent or isinstance(exc, connect_errors)
+                if (delay := self._delay_after_error(host, attempt, safe_to_retry)) is None:
+                    raise
+                logger.debug(f'Retrying {url} in {delay:.2f}s after error: {exc!r}')
+                await asyncio.sleep(delay)
+                continue
+
+            delay = self._delay_after_status(host, attempt, status, headers, retry_statuses)
+            if delay is None:
+                return status, headers, body
+            logger.debug(f'Retrying {url} in {delay:.2f}s after status {status}')
+            await asyncio.sleep(delay)
+        assert False, "Unreachable code"
+
+
+RETRY_POLICY = RetryPolicy()
+
+
+def configure_retry_policy(*,
+                           retries: Optional[int] = None,
+                           budget: Optional[int] = None) -> None:
+    """Apply the global retry options to the shared policy"""
+    if retries is not None:
+        RETRY_POLICY.max_attempts = max(0, retries) + 1
+    RETRY_POLICY.budget = budget
@@ -0,0 +1,150 @@
+"""On-disk cache of the settings schemas of the config API.
+
+The settings commands describe a resource with the POST action returned by
+OPTIONS on its collection. That schema only changes when the cluster is
+upgraded, so it is stored per host, kind of collection and cluster version,
+together with its flattened index of dotted keys. The cluster version is
+itself cached for a short TTL, so a warm settings command sends no OPTIONS
+and no version request.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config_constants import SCHEMA_CACHE_DIR
+from .http_trace import path_template
+from .logging import get_logger
+from .sessions import send_request
+from .snapshot import SNAPSHOT
+from . import rest_operations as rest_ops
+
+logger = get_logger()
+
+__all__ = ['SettingsSchema', 'SchemaCache', 'SCHEMA_CACHE', 'flatten_settings_schema',
+           'DEFAULT_VERSION_TTL']
+
+DEFAULT_VERSION_TTL = 3600
+# Without a known cluster version, schemas are trusted for a day at most
+UNKNOWN_VERSION_SCHEMA_TTL = 24 * 3600
+
+# What /version answers, like v4.8.9 or 4.10.1-rc2
+_VERSION_RE = re.compile(r'v?\d+(\.\d+)+[\w.+-]{0,40}')
+
+
+def flatten_settings_schema(actions: Dict[str, Any], prefix='') -> List[Tuple[str, str]]:
+    """Dotted key and type of every writable leaf setting of a POST action,
+    in schema order. Nested objects are walked through their children."""
+    index = []
+    for setting_name, setting_val in actions.items():
+        if setting_val.get('read_only'):
+            continue
+        full_key_name = f'{prefix}.{setting_name}' if prefix else setting_name
+        if setting_val.get('type') == 'nested object' and setting_val.get('children'):
+            index.extend(flatten_settings_schema(setting_val['children'], full_key_name))
+        else:
+            index.append((full_key_name, setting_val.get('type')))
+    return index
+
+
+@dataclass
+class SettingsSchema:
+    """POST action of a collection, or None if it does not accept POST, and
+    its flattened (dotted key, type) index"""
+    actions: Optional[Dict[str, Any]]
+    index: List[Tuple[str, str]]
+
+    @classmethod
+    def from_options(cls, options: Dict[str, Any]) -> 'SettingsSchema':
+        actions = options.get('actions', {}).get('POST')
+        return cls(actions, flatten_settings_schema(actions) if actions else [])
+
+
+class SchemaCache:
+    """Settings schemas stored in cache_dir, one JSON file each"""
+
+    def __init__(self, cache_dir: Path, version_ttl: float = DEFAULT_VERSION_TTL):
+        self.cache_dir = Path(cache_dir)
+        self.version_ttl = version_ttl
+
+    def _file(self, *key_parts: str) -> Path:
+        key = '\0'.join(key_parts).encode('utf-8')
+        return self.cache_dir / f'{hashlib.sha256(key).hexdigest()}.json'
+
+    @staticmethod
+    def _read(file_path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as input_file:
+                return json.load(input_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, file_path: Path, content: Dict[str, Any]) -> None:
+        try:
+            self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as output_file:
+                json.dump(content, output_file)
+            os.replace(temp_path, file_path)
+        except OSError as exc:
+            logger.debug(f'Could not write schema cache entry {file_path}: {exc}')
+
+    def cluster_version(self, user_ctx) -> str:
+        """Version reported by /version on the cluster, or '' if unavailable.
+        Only a version or a 404 (a cluster without /version) is cached: any
+        other answer, like the error page of a proxy, is not a version and is
+        asked again next time."""
+        version_file = self._file('version', user_ctx.hostname)
+        if ((cached := self._read(version_file)) and
+                time.time() - cached['stored_at'] < self.version_ttl):
+            return cached['version']
+        try:
+            result = send_request('GET', f'{user_ctx.scheme}://{user_ctx.hostname}/version',
+                                  timeout=user_ctx.timeout)
+        except Exception as exc:  # pylint:disable=broad-except
+            logger.debug(f'Could not get the cluster version: {exc}')
+            return ''
+        version = result.text.strip() if result.status_code == 200 else ''
+        if version and not _VERSION_RE.fullmatch(version):
+            logger.debug(f'Unexpected answer to the cluster version request: {version[:80]!r}')
+            return ''
+        if version or result.status_code == 404:
+            self._write(version_file, {'version': version, 'stored_at': time.time()})
+        return version
+
+    def get(self, user_ctx, settings_url: str, *, headers, timeout) -> SettingsSchema:
+        """Settings schema of the collection in settings_url"""
+        if SNAPSHOT.active:
+            return SettingsSchema.from_options(rest_ops.options(settings_url,
+                                                                headers=headers,
+                                                                timeout=timeout))
+        version = self.cluster_version(user_ctx)
+        schema_file = self._file('schema', user_ctx.hostname, path_template(settings_url),
+                                 version)
+        if ((cached := self._read(schema_file)) and
+                (version or time.time() - cached['stored_at'] < UNKNOWN_VERSION_SCHEMA_TTL)):
+            return SettingsSchema(cached['actions'],
+                                  [tuple(entry) for entry in cached['index']])
+
+        schema = SettingsSchema.from_options(rest_ops.options(settings_url,
+                                                              headers=headers,
+                                                              timeout=timeout))
+        self._write(schema_file, {'actions': schema.actions,
+                                  'index': schema.index,
+                                  'stored_at': time.time()})
+        return schema
+
+    def clear(self) -> None:
+        for entry_path in self.cache_dir.glob('*.json'):
+            try:
+                entry_path.unlink()
+            except OSError:
+                pass
+
+
+SCHEMA_CACHE = SchemaCache(SCHEMA_CACHE_DIR)
@@ -0,0 +1,161 @@
+import atexit
+import threading
+import time
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from ..utility.json_util import json_dumps_bytes
+from .http_trace import HTTP_TRACE, CONNECTION_TIMINGS
+from .retry import RETRY_POLICY
+
+__all__ = ['DEFAULT_POOL_SIZE', 'IDEMPOTENT_METHODS', 'get_session', 'send_request',
+           'set_pool_size', 'close_sessions']
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+DEFAULT_POOL_SIZE = 10
+
+_SESSIONS: Dict[Tuple[str, str], requests.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+_POOL_SIZE = DEFAULT_POOL_SIZE
+
+
+# Connections that report their setup timings to the trace, only used while
+# tracing
+class _TracedConnectionMixin:
+    def _new_conn(self):
+        dns_before = CONNECTION_TIMINGS.dns
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            # Name resolution happens inside _new_conn, it is reported apart
+            CONNECTION_TIMINGS.connect += (time.perf_counter() - start -
+                                           (CONNECTION_TIMINGS.dns - dns_before))
+
+
+class _TracedHTTPConnection(_TracedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TracedHTTPSConnection(_TracedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        setup_before = CONNECTION_TIMINGS.dns + CONNECTION_TIMINGS.connect
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            setup = CONNECTION_TIMINGS.dns + CONNECTION_TIMINGS.connect - setup_before
+            CONNECTION_TIMINGS.tls += time.perf_counter() - start - setup
+
+
+class _TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TracedHTTPConnection
+
+
+class _TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TracedHTTPSConnection
+
+
+class TracedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report their setup timings"""
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _TracedHTTPConnectionPool,
+                                                   'https': _TracedHTTPSConnectionPool}
+
+
+def _mount_adapters(session: requests.Session, pool_size: int) -> None:
+    adapter_class = TracedHTTPAdapter if HTTP_TRACE.enabled else HTTPAdapter
+    for prefix in ('http://', 'https://'):
+        if old_adapter := session.adapters.get(prefix):
+            old_adapter.close()
+        session.mount(prefix, adapter_class(pool_connections=1,
+                                            pool_maxsize=pool_size))
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the shared keep-alive session for the scheme and host of url.
+    Connections (and TLS handshakes) are reused by every request made to the
+    same host during the life of the process.
+    """
+    split_url = urlsplit(url)
+    key = (split_url.scheme, split_url.netloc)
+    if session := _SESSIONS.get(key):
+        return session
+    with _SESSIONS_LOCK:
+        if not (session := _SESSIONS.get(key)):
+            session = requests.Session()
+            _mount_adapters(session, _POOL_SIZE)
+            _SESSIONS[key] = session
+    return session
+
+
+def _rewindable_streams(kwargs) -> List[Tuple[Any, int]]:
+    files = kwargs.get('files') or {}
+    candidates = [*files.values(), kwargs.get('data')]
+    return [(stream, stream.tell()) for stream in candidates
+            if hasattr(stream, 'seek') and hasattr(stream, 'tell')]
+
+
+def send_request(method: str,
+                 url: str,
+                 *,
+                 idempotent: Optional[bool] = None,
+                 retry_statuses: Optional[FrozenSet[int]] = None,
+                 **kwargs) -> requests.Response:
+    """Send a request on the shared session of the host, retried according to
+    the global retry policy. kwargs are passed to requests."""
+    method = method.upper()
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    if kwargs.get('json') is not None:
+        # Encode JSON bodies with the fast codec instead of the one of requests
+        kwargs['data'] = json_dumps_bytes(kwargs.pop('json'))
+        kwargs['headers'] = {'Content-Type': 'application/json', **(kwargs.get('headers') or {})}
+    streams = _rewindable_streams(kwargs)
+    attempts = 0
+
+    def _send():
+        nonlocal attempts
+        attempts += 1
+        # A retried upload must send the file from the start again
+        for stream, position in streams:
+            stream.seek(position)
+        return get_session(url).request(method, url, **kwargs)
+
+    def _call():
+        return RETRY_POLICY.call(_send,
+                                 url=url,
+                                 idempotent=idempotent,
+                                 retry_statuses=retry_statuses)
+
+    if not HTTP_TRACE.enabled:
+        return _call()
+    return HTTP_TRACE.trace(method, url, _call, attempts=lambda: attempts)
+
+
+def set_pool_size(pool_size: int) -> None:
+    """Set the maximum number of connections kept per host. Sessions already
+    created get new pools, so it must be called before requests are issued
+    concurrently."""
+    global _POOL_SIZE
+    with _SESSIONS_LOCK:
+        _POOL_SIZE = max(1, pool_size)
+        for session in _SESSIONS.values():
+            _mount_adapters(session, _POOL_SIZE)
+
+
+def close_sessions() -> None:
+    with _SESSIONS_LOCK:
+        for session in _SESSIONS.values():
+            session.close()
+        _SESSIONS.clear()
+
+
+atexit.register(close_sessions)
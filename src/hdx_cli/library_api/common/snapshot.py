@@ -0,0 +1,222 @@
+"""Local snapshot of the configuration tree of an org.
+
+build_snapshot fetches the projects, tables, transforms, functions,
+dictionaries, storages, pools and sources of an org with bounded concurrency,
+following every page of paginated collections, plus the OPTIONS description
+of each kind of collection, and save_snapshot writes them to one gzipped JSON
+file.
+
+Once SNAPSHOT.load() is called, rest_operations answers GETs and OPTIONS from
+the snapshot and any other request is refused, so read-only commands run
+with no network calls at all. Single resources are found in the listing of
+their collection.
+"""
+import copy
+import gzip
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from ..userdata.token import AuthInfo
+from ..utility.json_util import json_dumps_bytes, json_loads
+from .config_constants import SNAPSHOT_DIR
+from .context import ProfileUserContext
+from .exceptions import HdxCliException, HttpException
+from .http_trace import path_template
+from .logging import get_logger
+
+logger = get_logger()
+
+__all__ = ['ConfigSnapshot', 'SNAPSHOT', 'build_snapshot', 'save_snapshot',
+           'default_snapshot_file', 'SNAPSHOT_VERSION']
+
+SNAPSHOT_VERSION = 1
+
+_PROJECT_COLLECTIONS = ('tables', 'functions', 'dictionaries')
+_TABLE_COLLECTIONS = ('transforms', 'sources/kafka', 'sources/kinesis', 'sources/siem')
+
+
+def default_snapshot_file(profilename: str) -> Path:
+    return SNAPSHOT_DIR / f'{profilename}.json.gz'
+
+
+def _normalize_path(url: str) -> str:
+    return urlsplit(url).path.rstrip('/')
+
+
+def _is_envelope(listing) -> bool:
+    return isinstance(listing, dict) and 'results' in listing
+
+
+def _items(listing) -> List[Dict[str, Any]]:
+    if isinstance(listing, dict):
+        listing = listing.get('results', [])
+    return [item for item in listing if isinstance(item, dict)]
+
+
+def build_snapshot(user_ctx: ProfileUserContext,
+                   *,
+                   concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Fetch the configuration tree of the org of user_ctx, with at most
+    concurrency requests in flight (DEFAULT_CONCURRENCY of
+    async_rest_operations by default). Collections a cluster does not serve
+    (an unavailable source kind, for instance) are left out."""
+    # Not imported at module level: async_rest_operations depends on this module
+    from . import async_rest_operations as async_rest_ops  # pylint:disable=import-outside-toplevel
+    concurrency = concurrency or async_rest_ops.DEFAULT_CONCURRENCY
+    token = user_ctx.auth
+    headers = {'Authorization': f'{token.token_type} {token.token}',
+               'Accept': 'application/json'}
+    base_url = f'{user_ctx.scheme}://{user_ctx.hostname}'
+    org_path = f'/config/v1/orgs/{user_ctx.org_id}'
+    responses: Dict[str, Any] = {}
+
+    async def _list_all(path: str):
+        """Listing of path, with every page of a paginated collection"""
+        listing = await async_rest_ops.list(f'{base_url}{path}/',
+                                            headers=headers,
+                                            timeout=user_ctx.timeout)
+        if not _is_envelope(listing):
+            return listing
+        next_url = listing.get('next')
+        while next_url:
+            page = await async_rest_ops.list(next_url.replace('https://',
+                                                              f'{user_ctx.scheme}://'),
+                                             headers=headers,
+                                             timeout=user_ctx.timeout)
+            listing['results'].extend(page.get('results', []))
+            next_url = page.get('next')
+        listing.update(next=None, previous=None)
+        return listing
+
+    def _fetch_all(paths: List[str]) -> None:
+        results = async_rest_ops.run_all((_list_all(path) for path in paths),
+                                         limit=concurrency,
+                                         return_exceptions=True)
+        for path, result in zip(paths, results):
+            if isinstance(result, HttpException):
+                logger.debug(f'Snapshot: skipping {path} ({result.error_code})')
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            responses[path] = result
+
+    _fetch_all([f'{org_path}/projects', f'{org_path}/storages', '/config/v1/pools'])
+    project_paths = [f'{org_path}/projects/{project["uuid"]}'
+                     for project in _items(responses.get(f'{org_path}/projects', []))]
+    _fetch_all([f'{project_path}/{collection}'
+                for project_path in project_paths
+                for collection in _PROJECT_COLLECTIONS])
+    table_paths = [f'{project_path}/tables/{table["uuid"]}'
+                   for project_path in project_paths
+                   for table in _items(responses.get(f'{project_path}/tables', []))]
+    _fetch_all([f'{table_path}/{collection}'
+                for table_path in table_paths
+                for collection in _TABLE_COLLECTIONS])
+
+    # One OPTIONS per kind of collection is enough for the settings commands
+    options_paths = {}
+    for path in responses:
+        options_paths.setdefault(path_template(path), path)
+    options = async_rest_ops.run_all((async_rest_ops.options(f'{base_url}{path}/',
+                                                             headers=headers,
+                                                             timeout=user_ctx.timeout)
+                                      for path in options_paths.values()),
+                                     limit=concurrency,
+                                     return_exceptions=True)
+    return {'version': SNAPSHOT_VERSION,
+            'meta': {'hostname': user_ctx.hostname,
+                     'org_id': user_ctx.org_id,
+                     'profilename': user_ctx.profilename,
+                     'created_at': time.time()},
+            'responses': responses,
+            'options': {template: result
+                        for template, result in zip(options_paths, options)
+                        if not isinstance(result, BaseException)}}
+
+
+def save_snapshot(snapshot: Dict[str, Any], snapshot_file: Path) -> None:
+    snapshot_file = Path(snapshot_file)
+    snapshot_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    with gzip.open(snapshot_file, 'wb') as output:
+        output.write(json_dumps_bytes(snapshot))
+
+
+class ConfigSnapshot:
+    """Snapshot that serves the read requests of the process once loaded"""
+
+    def __init__(self):
+        self.active = False
+        self.snapshot_file: Optional[Path] = None
+        self.meta: Dict[str, Any] = {}
+        self._responses: Dict[str, Any] = {}
+        self._options: Dict[str, Any] = {}
+
+    def load(self, snapshot_file: Path) -> None:
+        try:
+            with gzip.open(snapshot_file, 'rb') as snapshot_input:
+                snapshot = json_loads(snapshot_input.read())
+        except FileNotFoundError as exc:
+            raise HdxCliException(f"Snapshot file not found: {snapshot_file}. "
+                                  f"Run 'hdxcli snapshot build' first.") from exc
+        except (OSError, ValueError) as exc:
+            raise HdxCliException(f'Invalid snapshot file {snapshot_file}: {exc}') from exc
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise HdxCliException(f"Unsupported snapshot version in {snapshot_file}. "
+                                  f"Run 'hdxcli snapshot build' again.")
+        self.snapshot_file = Path(snapshot_file)
+        self.meta = snapshot['meta']
+        self._responses = snapshot['responses']
+        self._options = snapshot['options']
+        self.active = True
+
+    def unload(self) -> None:
+        self.active = False
+        self.snapshot_file = None
+        self.meta = {}
+        self._responses = {}
+        self._options = {}
+
+    def user_context(self, profile: ProfileUserContext) -> ProfileUserContext:
+        """profile completed with the org of the snapshot, without logging in"""
+        if profile.hostname != self.meta['hostname']:
+            raise HdxCliException(f"Snapshot {self.snapshot_file} was built for "
+                                  f"{self.meta['hostname']}, not for {profile.hostname}.")
+        profile.org_id = self.meta['org_id']
+        profile.auth = AuthInfo(token='', expires_at=datetime.max,
+                                org_id=self.meta['org_id'])
+        return profile
+
+    def get(self, url: str) -> Any:
+        """Body of a GET on url: a listing, or a single resource taken from the
+        listing of its collection. Raises a 404 HttpException otherwise.
+        Listings hold the whole collection, so paginated ones are served as a
+        single last page whatever the query string."""
+        path = _normalize_path(url)
+        if path in self._responses:
+            listing = copy.deepcopy(self._responses[path])
+            if _is_envelope(listing):
+                listing.update(next=None, previous=None)
+            return listing
+        collection_path, _, resource_id = path.rpartition('/')
+        if collection_path in self._responses:
+            for item in _items(self._responses[collection_path]):
+                if resource_id in (item.get('uuid'), str(item.get('id'))):
+                    return copy.deepcopy(item)
+        raise HttpException(404, f'{path} is not in the snapshot {self.snapshot_file}'.encode())
+
+    def options(self, url: str) -> Any:
+        template = path_template(_normalize_path(url))
+        if template not in self._options:
+            raise HttpException(404, f'No OPTIONS for {template} in the snapshot '
+                                     f'{self.snapshot_file}'.encode())
+        return copy.deepcopy(self._options[template])
+
+    def refuse(self, method: str, url: str) -> None:
+        raise HdxCliException(f'Cannot send {method} {_normalize_path(url)}: commands run '
+                              f'with --from-snapshot are read-only and offline.')
+
+
+SNAPSHOT = ConfigSnapshot()
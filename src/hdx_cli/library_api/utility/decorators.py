@@ -1,17 +1,14 @@
 import functools
-from pathlib import Path
 from functools import wraps
-import pickle
-import atexit
 import sys
 
 import click
 
 from .json_util import http_error_pretty_format
-from ..common.auth_utils import load_user_context
 from ..common.exceptions import HdxCliException, HttpException
 from ..common.logging import get_logger
 from ..common.profile import get_profiles
+from ..common.resolution_store import RESOLUTION_STORE
 
 logger = get_logger()
 
@@ -56,51 +53,44 @@ def confirmation_prompt(prompt, confirmation_message,
     return confirmation_prompt_deco
 
 
-_CACHE_DICT = None
+def get_from_disk_cache(namespace, user_ctx, resource_key):
+    return RESOLUTION_STORE.get(user_ctx, namespace, resource_key)
 
 
-def _save_cache(cache_file_path):
-    global _CACHE_DICT
-    with open(cache_file_path, 'wb') as cache_file:
-        pickle.dump(_CACHE_DICT, cache_file)
+def set_in_disk_cache(namespace, user_ctx, resource_key, value, *, path=None):
+    RESOLUTION_STORE.set(user_ctx, namespace, resource_key, value, path=path)
 
 
-def _load_cache(cache_file):
-    global _CACHE_DICT
-    try:
-        with open(cache_file, 'rb') as f:
-            _CACHE_DICT = pickle.load(f)
-    except FileNotFoundError:
-        Path(cache_file.parent).mkdir(parents=True, exist_ok=True)
-        _CACHE_DICT = {}
+def remove_from_disk_cache(namespace, user_ctx, resource_key):
+    RESOLUTION_STORE.remove(user_ctx, namespace, resource_key)
 
 
-def find_in_disk_cache(cache_file, namespace):
-    """Find an entry in a disk cache in namespace and profile with key.
+def find_in_disk_cache(namespace, *,
+                       collection_path=None,
+                       scope_fields=(),
+                       ttl=None,
+                       negative_ttl=None):
+    """Find an entry in the resolution store in namespace and profile with key.
     Currently this disk cache is being used with tables,
     transforms, projects, etc. to lower the number of requests to the
-    server
+    server. Empty results are kept for negative_ttl only.
+
+    scope_fields are the user context fields (e.g. 'projectname') the result
+    also depends on, and collection_path(user_ctx) is the path of the
+    collection the entry is resolved from, so changes on it drop the entry.
     """
     def find_in_disk_cache_wrapper(func):
+        @wraps(func)
         def find_in_disk_cache_deco(user_ctx,
                                     resource_key):
-            global _CACHE_DICT
-            key_to_find = f'{user_ctx.profilename}.{namespace}.{resource_key}'
-            if not _CACHE_DICT:
-                _load_cache(cache_file)
-                atexit.register(_save_cache, cache_file)
-            # Entry found in cache
-            if value := _CACHE_DICT.get(key_to_find):
-                cache_hits = _CACHE_DICT.setdefault('_hits', 0)
-                cache_hits += 1
-                _CACHE_DICT['_hits'] = cache_hits
+            key = '/'.join([str(getattr(user_ctx, field)) for field in scope_fields] +
+                           [resource_key])
+            if (value := RESOLUTION_STORE.get(user_ctx, namespace, key)) is not None:
                 return value
-            # Entry not found
             value = func(user_ctx, resource_key)
-            cache_misses = _CACHE_DICT.setdefault('_misses', 0)
-            cache_misses += 1
-            _CACHE_DICT['_misses'] = cache_misses
-            _CACHE_DICT[key_to_find] = value
+            RESOLUTION_STORE.set(user_ctx, namespace, key, value,
+                                 path=collection_path(user_ctx) if collection_path else None,
+                                 ttl=ttl, negative_ttl=negative_ttl)
             return value
         return find_in_disk_cache_deco
     return find_in_disk_cache_wrapper
@@ -109,6 +99,8 @@ def find_in_disk_cache(cache_file, namespace):
 def ensure_logged_in(f):
     @wraps(f)
     def decorated_function(ctx: click.Context, *args, **kwargs):
+        # Logins bring in requests, commands that do not log in skip it
+        from ..common.auth_utils import load_user_context  # pylint:disable=import-outside-toplevel
         profile_context = ctx.parent.obj['profilecontext']
         user_options = ctx.parent.obj['useroptions']
         user_context = load_user_context(profile_context,
@@ -1,7 +1,62 @@
 import logging
-from typing import Mapping, Any
+import math
+from typing import Mapping, Any, Optional, Union
 import json
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+JSON_CODEC = 'orjson' if orjson else 'json'
+
+# orjson turns integers beyond 64 bits into floats, they have 19+ digits
+_DIGITS_TO_ZERO_TABLE = bytes.maketrans(b'123456789', b'000000000')
+_BIG_NUMBER_DIGITS = b'0' * 19
+
+
+def json_loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Parse a JSON document with the fastest codec available"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if orjson and _BIG_NUMBER_DIGITS not in data.translate(_DIGITS_TO_ZERO_TABLE):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN and Infinity are rejected by orjson but accepted by json
+            pass
+    return json.loads(data)
+
+
+def _has_non_finite_float(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(map(_has_non_finite_float, obj.values()))
+    if isinstance(obj, (list, tuple)):
+        return any(map(_has_non_finite_float, obj))
+    return False
+
+
+def json_dumps_bytes(obj: Any) -> bytes:
+    """Compact UTF-8 encoding of obj, meant for request bodies. NaN and
+    Infinity are kept as json writes them, orjson would turn them into null."""
+    if orjson:
+        try:
+            encoded = orjson.dumps(obj)
+        except orjson.JSONEncodeError:
+            pass
+        else:
+            # Non-finite floats are the only values besides None written as null
+            if b'null' not in encoded or not _has_non_finite_float(obj):
+                return encoded
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def json_dumps(obj: Any, indent: Optional[int] = None) -> str:
+    """json.dumps(obj, indent=indent), which is what commands print"""
+    return json.dumps(obj, indent=indent)
+
 
 def get_dot_separated_key(dot_sep_key: str, mapping: Mapping[str, Any]):
     dot_sep_key_parts = dot_sep_key.split('.')
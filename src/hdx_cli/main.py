@@ -1,32 +1,22 @@
+import sys
+
 import click
-from trogon import tui
-
-from hdx_cli.cli_interface.project import commands as project_
-from hdx_cli.cli_interface.table import commands as table_
-from hdx_cli.cli_interface.transform import commands as transform_
-from hdx_cli.cli_interface.job import commands as job_
-from hdx_cli.cli_interface.stream import commands as stream_
-from hdx_cli.cli_interface.function import commands as function_
-from hdx_cli.cli_interface.dictionary import commands as dictionary_
-from hdx_cli.cli_interface.storage import commands as storage_
-from hdx_cli.cli_interface.profile import commands as profile_
-from hdx_cli.cli_interface.pool import commands as pool_
-from hdx_cli.cli_interface.sources import commands as sources_
-# from hdx_cli.cli_interface.migrate import commands as migrate_
-from hdx_cli.cli_interface.migrate import commands_v2 as migrate_
-from hdx_cli.cli_interface.integration import commands as integration_
-from hdx_cli.cli_interface.user import commands as user_
-from hdx_cli.cli_interface.role import commands as role_
-from hdx_cli.cli_interface.query_option import commands as query_option_
 
+from hdx_cli.cli_interface.common.fan_out import FanOutGroup, DEFAULT_PROFILES_JOBS
 from hdx_cli.library_api.utility.decorators import report_error_and_exit
 from hdx_cli.library_api.common.context import ProfileLoadContext, DEFAULT_TIMEOUT
-from hdx_cli.library_api.common.exceptions import ConfigurationNotFoundException, ConfigurationExistsException
+from hdx_cli.library_api.common.exceptions import (ConfigurationNotFoundException,
+                                                   ConfigurationExistsException,
+                                                   LogicException)
 from hdx_cli.library_api.common.config_constants import PROFILE_CONFIG_FILE
 from hdx_cli.library_api.common.first_use import is_first_time_use, first_time_use_config
+from hdx_cli.library_api.common.http_cache import HTTP_CACHE
+from hdx_cli.library_api.common.http_trace import HTTP_TRACE
+from hdx_cli.library_api.common.resolution_store import RESOLUTION_STORE
+from hdx_cli.library_api.common.retry import DEFAULT_RETRIES, configure_retry_policy
+from hdx_cli.library_api.common.snapshot import SNAPSHOT, default_snapshot_file
 
 from hdx_cli.library_api.common.logging import set_debug_logger, set_info_logger, get_logger
-from hdx_cli.cli_interface.set import commands as set_commands
 
 VERSION = "1.0-rc63"
 
@@ -40,13 +30,52 @@ def configure_logger(debug=False):
     set_info_logger()
 
 
+# Subcommands are only imported when invoked
+LAZY_SUBCOMMANDS = {
+    'project': 'hdx_cli.cli_interface.project.commands:project',
+    'table': 'hdx_cli.cli_interface.table.commands:table',
+    'transform': 'hdx_cli.cli_interface.transform.commands:transform',
+    'set': 'hdx_cli.cli_interface.set.commands:set_default_resources',
+    'unset': 'hdx_cli.cli_interface.set.commands:unset_default_resources',
+    'job': 'hdx_cli.cli_interface.job.commands:job',
+    'stream': 'hdx_cli.cli_interface.stream.commands:stream',
+    'function': 'hdx_cli.cli_interface.function.commands:function',
+    'dictionary': 'hdx_cli.cli_interface.dictionary.commands:dictionary',
+    'storage': 'hdx_cli.cli_interface.storage.commands:storage',
+    'pool': 'hdx_cli.cli_interface.pool.commands:pool',
+    'profile': 'hdx_cli.cli_interface.profile.commands:profile',
+    'sources': 'hdx_cli.cli_interface.sources.commands:sources',
+    'migrate': 'hdx_cli.cli_interface.migrate.commands_v2:migrate',
+    'integration': 'hdx_cli.cli_interface.integration.commands:integration',
+    'user': 'hdx_cli.cli_interface.user.commands:user',
+    'role': 'hdx_cli.cli_interface.role.commands:role',
+    'query-option': 'hdx_cli.cli_interface.query_option.commands:query_option',
+    'snapshot': 'hdx_cli.cli_interface.snapshot.commands:snapshot',
+    'cache': 'hdx_cli.cli_interface.cache.commands:cache',
+    'daemon': 'hdx_cli.cli_interface.daemon.commands:daemon',
+    'run-script': 'hdx_cli.cli_interface.script.commands:run_script',
+    'shell': 'hdx_cli.cli_interface.shell.commands:shell',
+}
+
+
 # pylint: disable=line-too-long
-@tui(help='Open textual user interface')
-@click.group(help='hdxcli is a tool to perform operations against Hydrolix cluster resources such as tables,' +
+@click.group(cls=FanOutGroup, lazy_subcommands=LAZY_SUBCOMMANDS,
+             help='hdxcli is a tool to perform operations against Hydrolix cluster resources such as tables,' +
              ' projects and transforms via different profiles. hdxcli supports profile configuration management ' +
              ' to perform operations on different profiles and sets of projects and tables.')
 @click.option('--profile', metavar='PROFILENAME', default=None,
               help="Perform operation with a different profile (default profile is 'default').")
+@click.option('--profiles', metavar='PROFILENAMES', default=None,
+              help='Run the command for each of these comma-separated profiles, in parallel, '
+                   'and tag its output with the profile name.')
+@click.option('--all-profiles', is_flag=True, default=False,
+              help='Run the command for every profile, as --profiles does.')
+@click.option('--profiles-jobs', type=click.IntRange(min=1), default=DEFAULT_PROFILES_JOBS,
+              help=f'Number of profiles run at the same time with --profiles or '
+                   f'--all-profiles (default: {DEFAULT_PROFILES_JOBS}).')
+@click.option('--profiles-output', type=click.Choice(['text', 'json']), default='text',
+              help='Output of --profiles or --all-profiles: lines tagged with the profile '
+                   'name, or one JSON list with the output and exit code of each profile.')
 @click.option('--password', metavar='PASSWORD', default=None,
               help="Login password. If provided and the access token is expired, it will be used.")
 @click.option('--profile-config-file', hidden=True, default=None,
@@ -55,18 +84,43 @@ def configure_logger(debug=False):
               help='Scheme used.')
 @click.option('--timeout', type=int, default=DEFAULT_TIMEOUT,
               help=f'Set request timeout in seconds (default: {DEFAULT_TIMEOUT}).')
+@click.option('--http-cache', is_flag=True, default=False,
+              help='Cache collection listings on disk and revalidate them with conditional '
+                   'requests, so unchanged collections are not downloaded again.')
+@click.option('--retries', type=click.IntRange(min=0), default=DEFAULT_RETRIES,
+              help=f'Number of times a failed request is retried (default: {DEFAULT_RETRIES}).')
+@click.option('--retry-budget', type=click.IntRange(min=0), default=None,
+              help='Maximum number of retries for the whole command (default: unlimited).')
+@click.option('--trace-http', metavar='FILE', default=None,
+              type=click.Path(dir_okay=False, writable=True),
+              help='Append a JSON line with the timings of every request to FILE and print '
+                   'a latency summary per endpoint at exit.')
+@click.option('--from-snapshot', is_flag=True, default=False,
+              help="Serve read-only commands from the snapshot made by 'snapshot build', "
+                   "without any network calls.")
+@click.option('--snapshot-file', metavar='FILE', default=None,
+              type=click.Path(dir_okay=False),
+              help='Snapshot file used by --from-snapshot (default: the one of the profile).')
 @click.option('--debug', hidden=True, is_flag=True, default=False,
               help=f'Enable debug mode, which displays additional information and '
                    f'debug messages for troubleshooting purposes.')
 @click.pass_context
 @report_error_and_exit(exctype=Exception)
 # pylint: enable=line-too-long
-def hdx_cli(ctx, profile, password, profile_config_file, uri_scheme, timeout, debug):
+def hdx_cli(ctx, profile, profiles, all_profiles, profiles_jobs, profiles_output, password,
+            profile_config_file, uri_scheme, timeout, http_cache, retries, retry_budget,
+            trace_http, from_snapshot, snapshot_file, debug):
     """
         Command-line entry point for hdx cli interface
     """
     configure_logger(debug)
-    if ctx.invoked_subcommand == 'version' or ctx.invoked_subcommand == 'init':
+    if http_cache:
+        HTTP_CACHE.enable(profile=profile or 'default')
+    configure_retry_policy(retries=retries, budget=retry_budget)
+    if trace_http:
+        HTTP_TRACE.enable(trace_http)
+    fan_out = profiles or all_profiles
+    if ctx.invoked_subcommand in ('version', 'init', 'daemon', 'run-script') and not fan_out:
         return
 
     profile_config_file = profile_config_file if profile_config_file else PROFILE_CONFIG_FILE
@@ -76,16 +130,33 @@ def hdx_cli(ctx, profile, password, profile_config_file, uri_scheme, timeout, de
             "Please run the 'hdxcli init' to create a new configuration."
         )
 
-    profile = 'default' if not profile else profile
-    load_context = ProfileLoadContext(profile, profile_config_file)
-    ctx.obj = {'profilecontext': load_context}
-
     user_options = {
         'password': password,
         'profile_config_file': profile_config_file,
         'uri_scheme': uri_scheme,
         'timeout': timeout
     }
+    if fan_out:
+        if profile:
+            raise LogicException('--profile cannot be used with --profiles or --all-profiles.')
+        # pylint:disable=import-outside-toplevel
+        from hdx_cli.cli_interface.common.fan_out import fan_out_profiles, run_for_profiles
+        sys.exit(run_for_profiles(ctx,
+                                  fan_out_profiles(profiles, all_profiles, profile_config_file),
+                                  user_options,
+                                  jobs=profiles_jobs,
+                                  output_format=profiles_output,
+                                  offline=from_snapshot))
+
+    profile = 'default' if not profile else profile
+    if from_snapshot:
+        if ctx.invoked_subcommand == 'snapshot':
+            raise LogicException('Snapshots cannot be built with --from-snapshot.')
+        SNAPSHOT.load(snapshot_file or default_snapshot_file(profile))
+        # Ids resolved from the snapshot may be outdated, keep them out of the store
+        RESOLUTION_STORE.disable()
+    load_context = ProfileLoadContext(profile, profile_config_file)
+    ctx.obj = {'profilecontext': load_context}
     ctx.obj['useroptions'] = user_options
 
 
@@ -105,25 +176,20 @@ def version():
     logger.info(VERSION)
 
 
+@click.command(help='Open textual user interface')
+@click.pass_context
+def tui(ctx):
+    # Textual is heavy, it is only imported when the TUI is requested
+    from trogon import Trogon  # pylint:disable=import-outside-toplevel
+    # Trogon builds its menu from hdx_cli.commands, which only holds the
+    # subcommands already imported
+    for name in hdx_cli.list_commands(ctx):
+        hdx_cli.get_command(ctx, name)
+    Trogon(hdx_cli, command_name='tui', click_context=ctx).run()
+
+
+hdx_cli.add_command(tui)
 hdx_cli.add_command(init)
-hdx_cli.add_command(project_.project)
-hdx_cli.add_command(table_.table)
-hdx_cli.add_command(transform_.transform)
-hdx_cli.add_command(set_commands.set_default_resources)
-hdx_cli.add_command(set_commands.unset_default_resources)
-hdx_cli.add_command(job_.job)
-hdx_cli.add_command(stream_.stream)
-hdx_cli.add_command(function_.function)
-hdx_cli.add_command(dictionary_.dictionary)
-hdx_cli.add_command(storage_.storage)
-hdx_cli.add_command(pool_.pool)
-hdx_cli.add_command(profile_.profile)
-hdx_cli.add_command(sources_.sources)
-hdx_cli.add_command(migrate_.migrate)
-hdx_cli.add_command(integration_.integration)
-hdx_cli.add_command(user_.user)
-hdx_cli.add_command(role_.role)
-hdx_cli.add_command(query_option_.query_option)
 hdx_cli.add_command(version)
 
 
@@ -0,0 +1,65 @@
+import json
+import math
+import random
+
+import pytest
+
+from hdx_cli.library_api.utility.json_util import json_dumps, json_dumps_bytes, json_loads
+
+SPECIAL_VALUES = [float('nan'), float('inf'), float('-inf'), 1e16, 1e-05, -0.0, 2 ** 70,
+                  '\x7f', '\x00\x1f', 'ñandú', ' ', '"\\/', None, True, False]
+
+
+def _random_document(randomizer: random.Random, depth: int = 0):
+    if depth > 3 or randomizer.random() < 0.3:
+        choice = randomizer.random()
+        if choice < 0.4:
+            return randomizer.choice(SPECIAL_VALUES)
+        if choice < 0.6:
+            return randomizer.uniform(-1e20, 1e20)
+        if choice < 0.8:
+            return randomizer.randint(-2 ** 64, 2 ** 64)
+        return ''.join(chr(randomizer.randrange(0x250)) for _ in range(randomizer.randrange(8)))
+    if randomizer.random() < 0.5:
+        return [_random_document(randomizer, depth + 1) for _ in range(randomizer.randrange(4))]
+    return {f'key_{index}\x7f': _random_document(randomizer, depth + 1)
+            for index in range(randomizer.randrange(4))}
+
+
+def _documents():
+    randomizer = random.Random(0)
+    return [*({'value': value} for value in SPECIAL_VALUES),
+            *(_random_document(randomizer) for _ in range(300))]
+
+
+def _same_json(first, second) -> bool:
+    # NaN is not equal to itself
+    return json.dumps(first) == json.dumps(second)
+
+
+@pytest.mark.parametrize('indent', [None, 2, 3, 4])
+def test_json_dumps_is_json_dumps(indent):
+    for document in _documents():
+        assert json_dumps(document, indent=indent) == json.dumps(document, indent=indent)
+
+
+def test_json_dumps_bytes_decodes_as_json_dumps():
+    for document in _documents():
+        encoded = json_dumps_bytes(document)
+        assert _same_json(json.loads(encoded), document)
+
+
+def test_json_dumps_bytes_keeps_non_finite_floats():
+    encoded = json_dumps_bytes({'values': [float('nan'), float('inf'), float('-inf'), None]})
+    assert encoded == b'{"values":[NaN,Infinity,-Infinity,null]}'
+
+
+def test_json_loads_is_json_loads():
+    for document in _documents():
+        encoded = json.dumps(document, indent=2)
+        assert _same_json(json_loads(encoded), json.loads(encoded))
+
+
+def test_show_edit_update_round_trip_keeps_nan():
+    shown = json_dumps({'threshold': float('nan')}, indent=4)
+    assert math.isnan(json_loads(json_dumps_bytes(json_loads(shown)))['threshold'])